@@ -0,0 +1,95 @@
+"""
+Micro-benchmark the JSON codecs on typical FOSSBilling list payloads.
+
+Usage:
+    python benchmarks/bench_codecs.py [--records 500] [--repeat 50]
+
+Each available codec decodes a client list page and a system log page from
+raw bytes, and encodes a bulk invoice payload. The "text + json" row shows
+the cost of first decoding the body to a string, as ``response.json()`` does.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fossbilling.codecs import CODECS  # noqa: E402
+
+
+def client_page(count: int) -> bytes:
+    records = [
+        {
+            'id': i, 'aid': None, 'group_id': 1, 'email': f'client{i}@example.com',
+            'first_name': 'Jane', 'last_name': f'Doe {i}', 'company': 'Example Ltd',
+            'phone': '+1 555 0100', 'country': 'US', 'status': 'active', 'type': 'individual',
+            'currency': 'USD', 'balance': '0.00',
+            'created_at': '2024-01-01 10:00:00', 'updated_at': '2024-01-02 10:00:00',
+        }
+        for i in range(count)
+    ]
+    return json.dumps({'list': records, 'page': 1, 'per_page': count, 'pages': 10,
+                       'total': count * 10}).encode()
+
+
+def log_page(count: int) -> bytes:
+    records = [
+        {
+            'id': i, 'client_id': i % 100, 'admin_id': None, 'priority': 6,
+            'message': f'Client #{i % 100} logged in from 203.0.113.{i % 255} ' + 'ü' * 10,
+            'ip': f'203.0.113.{i % 255}', 'created_at': '2024-01-01 10:00:00',
+        }
+        for i in range(count)
+    ]
+    return json.dumps({'list': records, 'page': 1, 'per_page': count, 'pages': 1,
+                       'total': count}, ensure_ascii=False).encode()
+
+
+def invoice_payload(count: int) -> dict:
+    return {
+        'client_id': 1,
+        'items': [{'title': f'Hosting #{i}', 'price': 9.99, 'quantity': 1, 'taxed': True}
+                  for i in range(count)],
+        'due_date': '2024-12-31',
+    }
+
+
+def report(label: str, seconds: float, repeat: int, size: int) -> None:
+    per_call = seconds / repeat
+    print(f"  {label:<14} {per_call * 1e3:8.3f} ms/call  {size / per_call / 1e6:8.1f} MB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    codecs = {}
+    for name, codec_class in CODECS.items():
+        try:
+            codecs[name] = codec_class()
+        except ImportError:
+            print(f"({name} not installed, skipped)")
+
+    for title, payload in (('client list page', client_page(args.records)),
+                           ('log page', log_page(args.records))):
+        print(f"decode {title} ({len(payload) / 1024:.0f} KiB)")
+        seconds = timeit.timeit(lambda: json.loads(payload.decode('utf-8')), number=args.repeat)
+        report('text + json', seconds, args.repeat, len(payload))
+        for name, codec in codecs.items():
+            seconds = timeit.timeit(lambda: codec.loads(payload), number=args.repeat)
+            report(name, seconds, args.repeat, len(payload))
+
+    body = invoice_payload(args.records)
+    size = len(json.dumps(body))
+    print(f"encode invoice payload ({size / 1024:.0f} KiB)")
+    for name, codec in codecs.items():
+        seconds = timeit.timeit(lambda: codec.dumps(body), number=args.repeat)
+        report(name, seconds, args.repeat, size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare the memory held by raw response dictionaries and typed models.
+
+Usage:
+    python benchmarks/bench_models.py [--records 100000]
+
+Synthetic invoice records are decoded from JSON (as the client does) and kept
+alive either as dictionaries or as :class:`~fossbilling.models.InvoiceModel`
+instances. The retained memory is measured with tracemalloc.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fossbilling.models import InvoiceModel  # noqa: E402
+
+
+def make_payload(count: int) -> bytes:
+    records = [
+        {
+            'id': i,
+            'client_id': i % 5000,
+            'serie': 'FOSS',
+            'nr': str(i),
+            'hash': f'{i:032x}',
+            'status': 'unpaid' if i % 3 else 'paid',
+            'currency': 'USD',
+            'currency_rate': '1.000000',
+            'subtotal': f'{i % 500}.00',
+            'tax': f'{i % 50}.00',
+            'total': f'{i % 550}.00',
+            'due_at': '2024-02-01 00:00:00',
+            'paid_at': None,
+            'created_at': '2024-01-01 10:00:00',
+            'updated_at': '2024-01-02 10:00:00',
+        }
+        for i in range(count)
+    ]
+    return json.dumps({'list': records}).encode()
+
+
+def measure(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=100000)
+    args = parser.parse_args()
+
+    payload = make_payload(args.records)
+
+    dicts, dict_bytes, dict_time = measure(lambda: json.loads(payload)['list'])
+    del dicts
+    models, model_bytes, model_time = measure(
+        lambda: [InvoiceModel(record) for record in json.loads(payload)['list']]
+    )
+
+    started = time.perf_counter()
+    total = sum(model.total for model in models)
+    first_access = time.perf_counter() - started
+    started = time.perf_counter()
+    sum(model.total for model in models)
+    second_access = time.perf_counter() - started
+    del models, total
+
+    print(f"{args.records} invoices")
+    print(f"dicts:  {dict_bytes / 1e6:8.1f} MB retained, decoded in {dict_time:.2f}s")
+    print(f"models: {model_bytes / 1e6:8.1f} MB retained, decoded in {model_time:.2f}s "
+          f"({100 * (1 - model_bytes / dict_bytes):.0f}% less memory)")
+    print(f"sum(total): first access {first_access:.3f}s (parses), "
+          f"second access {second_access:.3f}s (cached)")
+
+
+if __name__ == '__main__':
+    main()
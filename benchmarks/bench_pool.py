@@ -0,0 +1,58 @@
+"""
+Benchmark the effect of the connection pool size on a Client shared by many threads.
+
+Usage:
+    python benchmarks/bench_pool.py [--threads 32] [--requests 2000] [--latency 0.002]
+
+For each pool size, one Client is shared by all threads. The report shows
+throughput and how many TCP connections the server had to accept; with a
+pool smaller than the thread count, connections are discarded and reopened.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fossbilling import Client  # noqa: E402
+
+from mock_server import start_server  # noqa: E402
+
+
+def run(server, pool_maxsize: int, threads: int, requests: int) -> None:
+    client = Client(server.url, 'benchmark', pool_maxsize=pool_maxsize)
+    server.reset_counters()
+
+    def call(i: int) -> None:
+        client.system.info()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    print(f"pool_maxsize={pool_maxsize:>3}  "
+          f"{requests / elapsed:8.0f} req/s  "
+          f"connections opened={server.connections}")
+    client.session.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.002)
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[1, 4, 10, 32])
+    args = parser.parse_args()
+
+    server = start_server(latency=args.latency)
+    print(f"{args.threads} threads, {args.requests} requests, {args.latency * 1000:.1f} ms latency")
+    for pool_maxsize in args.pool_sizes:
+        run(server, pool_maxsize, args.threads, args.requests)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure the cost of importing the SDK and constructing a client.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 20] [--budget-ms 50]
+
+Every run starts a fresh interpreter, which imports ``fossbilling``,
+constructs a ``Client`` and touches each of its resources without making a
+request, and reports how long each step took and which heavy modules it
+loaded. The script exits with status 1 if the median import plus
+construction time exceeds the budget, or if an HTTP library is loaded before
+the first request, so it can run as a CI check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#: Modules that must not be loaded until the client sends its first request
+FORBIDDEN = ('requests', 'urllib3', 'httpx', 'asyncio', 'sqlite3')
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import fossbilling
+imported = time.perf_counter()
+client = fossbilling.Client('https://billing.example.com', 'key')
+client.clients, client.invoices, client.orders, client.services, client.system
+constructed = time.perf_counter()
+print(json.dumps({{
+    'import': imported - start,
+    'construct': constructed - imported,
+    'loaded': [name for name in {FORBIDDEN!r} if name in sys.modules],
+}}))
+"""
+
+
+def probe() -> dict:
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--budget-ms', type=float, default=50.0,
+                        help="maximum median time for import plus construction")
+    args = parser.parse_args()
+
+    samples = [probe() for _ in range(args.runs)]
+    for step in ('import', 'construct'):
+        times = [sample[step] * 1e3 for sample in samples]
+        print(f"  {step:<10} min {min(times):7.2f} ms  median {statistics.median(times):7.2f} ms")
+    total = statistics.median((sample['import'] + sample['construct']) * 1e3 for sample in samples)
+    print(f"  {'total':<10}                median {total:7.2f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"startup took {total:.2f} ms, over the {args.budget_ms:.0f} ms budget")
+    loaded = sorted({name for sample in samples for name in sample['loaded']})
+    if loaded:
+        failures.append(f"loaded before the first request: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
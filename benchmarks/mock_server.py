@@ -0,0 +1,284 @@
+"""
+A local stand-in for the FOSSBilling API, used by the benchmarks.
+
+Run it standalone with ``python benchmarks/mock_server.py --port 8080`` or
+start it in-process with :func:`start_server`.
+
+The server answers the endpoints the SDK calls with realistic records
+(paths are relative to ``/api/``):
+
+- ``GET admin/<entity>`` returns a page of clients, invoices, orders or
+  services (``page`` and ``per_page`` query parameters)
+- ``GET admin/<entity>/<id>`` returns one record, or 404 past ``records``
+- ``GET admin/invoice/<id>/pdf`` streams a PDF of ``pdf_size`` bytes
+- ``GET admin/system/logs`` returns a page of log entries
+- anything else echoes the path, method and query as a small JSON document
+
+Page bodies are encoded once and cached, so serving them costs the benchmark
+process as little CPU as possible. With ``gzip`` enabled, JSON bodies of at
+least 1 KiB are gzip-compressed for clients that accept it.
+"""
+import argparse
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PDF_CHUNK_SIZE = 64 * 1024
+GZIP_MIN_SIZE = 1024
+
+
+def client_record(i: int, padding: str) -> Dict[str, Any]:
+    return {
+        'id': i, 'aid': None, 'group_id': 1 + i % 3, 'email': f'client{i}@example.com',
+        'first_name': 'Jane', 'last_name': f'Doe {i}', 'company': 'Example Ltd',
+        'phone': '+1 555 0100', 'country': 'US', 'status': 'active', 'type': 'individual',
+        'currency': 'USD', 'balance': f'{i % 100}.00', 'notes': padding,
+        'created_at': '2024-01-01 10:00:00', 'updated_at': '2024-01-02 10:00:00',
+    }
+
+
+def invoice_record(i: int, padding: str) -> Dict[str, Any]:
+    return {
+        'id': i, 'client_id': 1 + i % 500, 'serie': 'FOSS', 'nr': str(i), 'hash': f'{i:032x}',
+        'status': 'unpaid' if i % 3 else 'paid', 'currency': 'USD',
+        'currency_rate': '1.000000', 'subtotal': f'{i % 500}.00', 'tax': f'{i % 50}.00',
+        'total': f'{i % 550}.00', 'notes': padding,
+        'lines': [{'id': i * 10 + n, 'title': f'Hosting plan #{n}', 'price': '9.99',
+                   'quantity': 1, 'unit': 'month', 'taxed': True, 'total': '9.99'}
+                  for n in range(2)],
+        'due_at': '2024-02-01 00:00:00', 'paid_at': None,
+        'created_at': '2024-01-01 10:00:00', 'updated_at': '2024-01-02 10:00:00',
+    }
+
+
+def order_record(i: int, padding: str) -> Dict[str, Any]:
+    return {
+        'id': i, 'client_id': 1 + i % 500, 'product_id': 1 + i % 20,
+        'title': f'Shared hosting #{i}', 'status': 'active', 'period': '1M', 'quantity': 1,
+        'price': '9.99', 'discount': '0.00', 'total': '9.99', 'currency': 'USD',
+        'reason': None, 'notes': padding, 'expires_at': '2025-01-01 00:00:00',
+        'activated_at': '2024-01-01 10:00:00', 'suspended_at': None, 'canceled_at': None,
+        'created_at': '2024-01-01 10:00:00', 'updated_at': '2024-01-02 10:00:00',
+    }
+
+
+def service_record(i: int, padding: str) -> Dict[str, Any]:
+    return {
+        'id': i, 'order_id': i, 'client_id': 1 + i % 500, 'product_id': 1 + i % 20,
+        'type': 'hosting', 'title': f'example{i}.com', 'status': 'active', 'notes': padding,
+        'expires_at': '2025-01-01 00:00:00',
+        'created_at': '2024-01-01 10:00:00', 'updated_at': '2024-01-02 10:00:00',
+    }
+
+
+def log_record(i: int, padding: str) -> Dict[str, Any]:
+    return {
+        'id': i, 'client_id': i % 100, 'admin_id': None, 'priority': 6,
+        'message': f'Client #{i % 100} logged in from 203.0.113.{i % 255}{padding}',
+        'ip': f'203.0.113.{i % 255}', 'created_at': '2024-01-01 10:00:00',
+    }
+
+
+RECORDS: Dict[str, Callable[[int, str], Dict[str, Any]]] = {
+    'client': client_record,
+    'invoice': invoice_record,
+    'order': order_record,
+    'service': service_record,
+    'system/logs': log_record,
+}
+
+
+class MockFOSSBillingServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server that answers FOSSBilling-style API requests.
+
+    Args:
+        address: ``(host, port)`` to listen on; port 0 picks a free port
+        latency: Seconds to sleep before answering each request; may be
+            changed while the server is running
+        records: Number of records of each entity type
+        padding: Extra characters added to every record, to model larger
+            payloads
+        pdf_size: Size in bytes of the invoice PDFs
+        gzip: Compress JSON responses for clients accepting gzip
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = ('127.0.0.1', 0), latency: float = 0.0,
+                 records: int = 1000, padding: int = 0, pdf_size: int = 256 * 1024,
+                 gzip: bool = False):
+        super().__init__(address, MockRequestHandler)
+        self.latency = latency
+        self.records = records
+        self.padding = 'x' * padding
+        self.pdf = (b'%PDF-1.4\n' + b'0' * pdf_size)[:pdf_size]
+        self.gzip = gzip
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._pages: Dict[Tuple[str, int, int, bool], bytes] = {}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def count(self, attribute: str) -> None:
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + 1)
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+
+    def page(self, entity: str, page: int, per_page: int, compressed: bool = False) -> bytes:
+        """Return the encoded listing page, building it on first use."""
+        key = (entity, page, per_page, compressed)
+        body = self._pages.get(key)
+        if body is None and compressed:
+            body = gzip.compress(self.page(entity, page, per_page), mtime=0)
+            self._pages[key] = body
+        elif body is None:
+            first = (page - 1) * per_page + 1
+            last = min(page * per_page, self.records)
+            make = RECORDS[entity]
+            body = json.dumps({
+                'list': [make(i, self.padding) for i in range(first, last + 1)],
+                'page': page, 'per_page': per_page,
+                'pages': max(1, -(-self.records // per_page)), 'total': self.records,
+            }).encode()
+            self._pages[key] = body
+        return body
+
+    def record(self, entity: str, record_id: int) -> Optional[bytes]:
+        """Return one encoded record, or None if it does not exist."""
+        if not 1 <= record_id <= self.records:
+            return None
+        return json.dumps(RECORDS[entity](record_id, self.padding)).encode()
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Routes a request to the matching canned response."""
+
+    protocol_version = 'HTTP/1.1'
+    server: MockFOSSBillingServer
+
+    # Headers and body are buffered and leave in a single send, and Nagle's
+    # algorithm is off: otherwise the body segment can sit behind the
+    # client's delayed ACK for the header segment, adding ~40 ms per request.
+    wbufsize = PDF_CHUNK_SIZE
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        # One handler instance per TCP connection, so this counts connections.
+        super().setup()
+        self.server.count('connections')
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _accepts_gzip(self) -> bool:
+        return self.server.gzip and 'gzip' in self.headers.get('Accept-Encoding', '')
+
+    def _respond(self, status: int, payload: Any, content_type: str = 'application/json',
+                 compressed: bool = False) -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        if not compressed and len(body) >= GZIP_MIN_SIZE and self._accepts_gzip():
+            body = gzip.compress(body, mtime=0)
+            compressed = True
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_pdf(self) -> None:
+        pdf = memoryview(self.server.pdf)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(pdf)))
+        self.end_headers()
+        for offset in range(0, len(pdf), PDF_CHUNK_SIZE):
+            self.wfile.write(pdf[offset:offset + PDF_CHUNK_SIZE])
+
+    def _handle(self) -> None:
+        self.server.count('requests')
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        url = urlparse(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+        parts = parts[2:] if parts[:2] == ['api', 'admin'] else []
+        if parts[:1] == ['system']:
+            entity = '/'.join(parts[:2])
+        else:
+            entity = parts[0] if parts else ''
+
+        if self.command == 'GET' and entity in RECORDS:
+            if len(parts) == 1 or entity == 'system/logs':
+                page = max(1, int(query.get('page', 1)))
+                per_page = max(1, int(query.get('per_page', 100)))
+                compressed = self._accepts_gzip()
+                return self._respond(200, self.server.page(entity, page, per_page, compressed),
+                                     compressed=compressed)
+            if len(parts) == 3 and entity == 'invoice' and parts[2] == 'pdf':
+                return self._send_pdf()
+            if len(parts) == 2 and parts[1].isdigit():
+                body = self.server.record(entity, int(parts[1]))
+                if body is None:
+                    return self._respond(404, {'error': {'message': f'{entity} not found'}})
+                return self._respond(200, body)
+        self._respond(200, {'path': url.path, 'method': self.command, 'query': query})
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+def start_server(latency: float = 0.0, port: int = 0, **options: Any) -> MockFOSSBillingServer:
+    """
+    Start a mock server on a background thread and return it.
+
+    ``options`` are passed to :class:`MockFOSSBillingServer`.
+    """
+    server = MockFOSSBillingServer(('127.0.0.1', port), latency=latency, **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds to sleep before each response')
+    parser.add_argument('--records', type=int, default=1000,
+                        help='number of records of each entity type')
+    parser.add_argument('--padding', type=int, default=0,
+                        help='extra characters per record')
+    parser.add_argument('--pdf-size', type=int, default=256 * 1024,
+                        help='size of invoice PDFs in bytes')
+    parser.add_argument('--gzip', action='store_true',
+                        help='gzip JSON responses for clients that accept it')
+    args = parser.parse_args()
+
+    server = MockFOSSBillingServer(('127.0.0.1', args.port), latency=args.latency,
+                                   records=args.records, padding=args.padding,
+                                   pdf_size=args.pdf_size, gzip=args.gzip)
+    print(f"Serving mock FOSSBilling API on {server.url}", flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
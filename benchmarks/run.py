@@ -0,0 +1,287 @@
+"""
+Benchmark suite for the SDK, run against the local mock FOSSBilling server.
+
+Usage:
+    python benchmarks/run.py [--output report.json] [--compare baseline.json]
+                             [--scenarios request list pdf bulk] [--latency 0.0]
+
+The mock server (``benchmarks/mock_server.py``) runs in a separate process
+by default, so serving requests does not compete with the client for the
+GIL. Scenarios:
+
+- ``request``: one small GET at a time through ``Client.get``, next to the
+  same request made with a bare ``requests.Session``; the difference is the
+  SDK's per-request overhead. The same call is also timed over an
+  ``InMemoryTransport``, which measures that overhead without any network.
+- ``list``: walking a whole listing with ``iter_all``, as dictionaries, as
+  typed models, and with concurrent page fetches
+- ``pdf``: streaming invoice PDFs to disk with ``download_pdf``
+- ``bulk``: concurrent batch reads with ``get_many``
+
+Every benchmark reports throughput, latency percentiles of its operations and
+the peak memory allocated by one operation (measured with tracemalloc in a
+separate, untimed run). ``--output`` writes the report as JSON, and
+``--compare`` prints the change against an earlier report and exits with
+status 1 if any throughput dropped by more than ``--max-regression``.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fossbilling  # noqa: E402
+from fossbilling import Client  # noqa: E402
+from fossbilling.transports import InMemoryTransport  # noqa: E402
+
+from mock_server import start_server  # noqa: E402
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(name: str, operation: Callable[[], Any], iterations: int, items: int,
+            unit: str, warmup: int = 1) -> Dict[str, Any]:
+    """
+    Time ``operation`` over ``iterations`` calls, then measure its memory peak.
+
+    Args:
+        name: Benchmark name in the report
+        operation: Callable performing one operation
+        iterations: Number of timed calls
+        items: Units of work done by one call (requests, records, bytes...)
+        unit: Name of the unit of work
+        warmup: Untimed calls made first, to open connections and fill caches
+    """
+    for _ in range(warmup):
+        operation()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - op_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'name': name,
+        'iterations': iterations,
+        'seconds': elapsed,
+        'ops_per_second': iterations / elapsed,
+        'unit': unit,
+        'throughput': iterations * items / elapsed,
+        'latency_ms': dict(
+            {f'p{pct}': percentile(latencies, pct) * 1e3 for pct in PERCENTILES},
+            mean=elapsed / iterations * 1e3,
+            max=latencies[-1] * 1e3,
+        ),
+        'peak_memory_bytes': peak,
+    }
+
+
+def bench_request(client: Client, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    import requests
+
+    session = requests.Session()
+    session.headers.update(client.default_headers)
+    url = client._build_url('admin/system/info')
+
+    def raw() -> Any:
+        return session.get(url, timeout=client.timeout).json()
+
+    results = [
+        measure('request.raw_requests', raw, args.requests, 1, 'requests'),
+        measure('request.client_get', lambda: client.get('admin/system/info'),
+                args.requests, 1, 'requests'),
+    ]
+    session.close()
+    baseline, sdk = (result['latency_ms']['p50'] for result in results)
+    results[1]['overhead_us'] = (sdk - baseline) * 1e3
+
+    info = client.get('admin/system/info')
+    in_memory = Client(client.base_url, client.api_key,
+                       transport=InMemoryTransport({'admin/system/info': lambda request: info}))
+    results.append(measure('request.in_memory', lambda: in_memory.get('admin/system/info'),
+                           args.requests, 1, 'requests'))
+    return results
+
+
+def bench_list(client: Client, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    def walk(**options: Any) -> Callable[[], int]:
+        return lambda: sum(1 for _ in client.clients.iter_all(per_page=args.per_page, **options))
+
+    return [
+        measure('list.iter_all', walk(), args.repeat, args.records, 'records'),
+        measure('list.iter_all_typed', walk(typed=True), args.repeat, args.records, 'records'),
+        measure('list.iter_all_workers', walk(workers=args.workers), args.repeat, args.records,
+                'records'),
+    ]
+
+
+def bench_pdf(client: Client, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'invoice.pdf')
+        return [
+            measure('pdf.download_pdf', lambda: client.invoices.download_pdf(1, path),
+                    args.repeat * 4, args.pdf_size, 'bytes'),
+        ]
+
+
+def bench_bulk(client: Client, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    ids = range(1, min(args.batch, args.records) + 1)
+
+    def get_many() -> None:
+        result = client.invoices.get_many(ids, max_workers=args.workers)
+        if result.errors:
+            raise RuntimeError(f"get_many failed: {next(iter(result.errors.values()))}")
+
+    return [measure('bulk.get_many', get_many, args.repeat, len(ids), 'records')]
+
+
+SCENARIOS: Dict[str, Callable[[Client, argparse.Namespace], List[Dict[str, Any]]]] = {
+    'request': bench_request,
+    'list': bench_list,
+    'pdf': bench_pdf,
+    'bulk': bench_bulk,
+}
+
+
+def spawn_server(args: argparse.Namespace) -> subprocess.Popen:
+    """Start the mock server in a child process; its URL is the first line it prints."""
+    command = [sys.executable, os.path.join(ROOT, 'benchmarks', 'mock_server.py'),
+               '--port', '0', '--latency', str(args.latency), '--records', str(args.records),
+               '--padding', str(args.padding), '--pdf-size', str(args.pdf_size)]
+    if args.gzip:
+        command.append('--gzip')
+    return subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<26} {'throughput':>16} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p99 ms':>9} {'peak KiB':>10}")
+    for result in results:
+        latency = result['latency_ms']
+        throughput = f"{result['throughput']:,.0f} {result['unit']}/s"
+        print(f"{result['name']:<26} {throughput:>16} {latency['p50']:9.3f} "
+              f"{latency['p90']:9.3f} {latency['p99']:9.3f} "
+              f"{result['peak_memory_bytes'] / 1024:10.1f}")
+        if 'overhead_us' in result:
+            print(f"{'':<26} SDK overhead over bare requests: {result['overhead_us']:.0f} us/request")
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> bool:
+    """Print the change against a baseline report; return False on a regression."""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = {result['name']: result for result in json.load(fh)['results']}
+
+    ok = True
+    print(f"\ncompared with {baseline_path}")
+    for result in results:
+        before = baseline.get(result['name'])
+        if before is None:
+            continue
+        change = (result['throughput'] / before['throughput'] - 1) * 100
+        flag = ''
+        if change < -max_regression:
+            flag = '  REGRESSION'
+            ok = False
+        print(f"{result['name']:<26} throughput {change:+7.1f}%  p50 "
+              f"{before['latency_ms']['p50']:.3f} -> {result['latency_ms']['p50']:.3f} ms{flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds the server sleeps before each response')
+    parser.add_argument('--records', type=int, default=2000,
+                        help='records of each entity type on the server')
+    parser.add_argument('--padding', type=int, default=0, help='extra characters per record')
+    parser.add_argument('--pdf-size', type=int, default=1024 * 1024)
+    parser.add_argument('--gzip', action='store_true',
+                        help='have the server gzip JSON responses')
+    parser.add_argument('--requests', type=int, default=1000,
+                        help='requests timed by the request scenario')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timed operations for the list, pdf and bulk scenarios')
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--batch', type=int, default=200, help='IDs per get_many call')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--in-process', action='store_true',
+                        help='run the mock server on a thread of this process')
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON report to compare with')
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help='throughput drop, in percent, reported as a regression')
+    args = parser.parse_args()
+
+    if args.in_process:
+        server = start_server(latency=args.latency, records=args.records,
+                              padding=args.padding, pdf_size=args.pdf_size, gzip=args.gzip)
+        url = server.url
+    else:
+        process = spawn_server(args)
+        url = process.stdout.readline().rsplit(' ', 1)[-1].strip()
+
+    client = Client(url, 'benchmark', pool_maxsize=max(10, args.workers))
+    results: List[Dict[str, Any]] = []
+    try:
+        for name in args.scenarios:
+            results.extend(SCENARIOS[name](client, args))
+    finally:
+        client.session.close()
+        if args.in_process:
+            server.shutdown()
+        else:
+            process.terminate()
+            process.wait()
+
+    print_results(results)
+    if args.output:
+        report = {
+            'version': fossbilling.__version__,
+            'revision': git_revision(),
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': vars(args),
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
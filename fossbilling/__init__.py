@@ -1,14 +1,67 @@
 """
 FOSSBilling Python SDK - A Python client for the FOSSBilling API.
+
+Public classes are imported on first access, so ``import fossbilling`` stays
+cheap and the HTTP libraries are only loaded by the client that uses them.
 """
+import importlib
+from typing import Any, Dict, List
 
 __version__ = "0.1.0"
 
-from .client import Client  # noqa
 from .exceptions import (  # noqa
     FOSSBillingException,
     AuthenticationError,
     APIError,
     NotFoundError,
     ValidationError,
+    IdempotencyKeyError,
 )
+
+_LAZY: Dict[str, str] = {
+    'Client': 'client',
+    'AsyncClient': 'async_client',
+    'InvoiceTable': 'analytics',
+    'OrderTable': 'analytics',
+    'BulkResult': 'bulk',
+    'MemoryCache': 'cache',
+    'SQLiteCache': 'cache',
+    'JSONCodec': 'codecs',
+    'RequestCompression': 'compression',
+    'Hook': 'hooks',
+    'MetricsCollector': 'hooks',
+    'Mirror': 'mirror',
+    'ClientPool': 'pool',
+    'AsyncClientPool': 'pool',
+    'Change': 'sync',
+    'IncrementalSync': 'sync',
+    'SyncSpec': 'sync',
+    'SyncState': 'sync',
+    'HTTPXTransport': 'transports',
+    'InMemoryTransport': 'transports',
+    'RequestsTransport': 'transports',
+}
+
+__all__ = [
+    '__version__',
+    *_LAZY,
+    'FOSSBillingException',
+    'AuthenticationError',
+    'APIError',
+    'NotFoundError',
+    'ValidationError',
+    'IdempotencyKeyError',
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,34 @@
+"""
+Command line entry point: ``python -m fossbilling <command> ...``.
+
+Commands:
+    export  Export a listing to NDJSON, CSV or Parquet (see :mod:`fossbilling.export`)
+    mirror  Refresh a local SQLite mirror (see :mod:`fossbilling.mirror`)
+"""
+import sys
+from typing import Optional, Sequence
+
+COMMANDS = {
+    'export': 'Export a listing to NDJSON, CSV or Parquet',
+    'mirror': 'Refresh a local SQLite mirror',
+}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS:
+        print('usage: python -m fossbilling <command> [options]\n\ncommands:', file=sys.stderr)
+        for name, help_text in COMMANDS.items():
+            print(f"  {name:<8} {help_text}", file=sys.stderr)
+        sys.exit(0 if argv[:1] in (['-h'], ['--help']) else 2)
+
+    command, options = argv[0], argv[1:]
+    if command == 'export':
+        from .export import main as run
+    else:
+        from .mirror import main as run
+    run(options)
+
+
+if __name__ == '__main__':
+    main()
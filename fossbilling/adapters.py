@@ -0,0 +1,72 @@
+"""
+Transport adapters for tuning the HTTP connection pool used by
+:class:`~fossbilling.Client`.
+"""
+import socket
+from typing import Any, List, Optional, Sequence, Tuple
+
+from requests.adapters import HTTPAdapter
+
+SocketOption = Tuple[int, int, int]
+
+
+def tcp_socket_options(nodelay: bool = True, keepalive: bool = True,
+                       keepalive_idle: Optional[int] = None,
+                       keepalive_interval: Optional[int] = None,
+                       keepalive_count: Optional[int] = None) -> List[SocketOption]:
+    """
+    Build socket options for pooled connections.
+
+    Platform-specific keep-alive tuning options are skipped where the
+    operating system does not support them.
+
+    Args:
+        nodelay: Disable Nagle's algorithm (TCP_NODELAY)
+        keepalive: Enable TCP keep-alive probes (SO_KEEPALIVE)
+        keepalive_idle: Seconds a connection is idle before probes start
+        keepalive_interval: Seconds between keep-alive probes
+        keepalive_count: Failed probes before the connection is dropped
+
+    Returns:
+        A list of ``(level, option, value)`` tuples
+    """
+    options: List[SocketOption] = []
+    if nodelay:
+        options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+    if keepalive:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        tuning = (
+            ('TCP_KEEPIDLE', keepalive_idle),
+            ('TCP_KEEPINTVL', keepalive_interval),
+            ('TCP_KEEPCNT', keepalive_count),
+        )
+        for name, value in tuning:
+            if value is not None and hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+
+class PoolAdapter(HTTPAdapter):
+    """
+    An ``HTTPAdapter`` that applies custom socket options to pooled connections.
+
+    Args:
+        socket_options: ``(level, option, value)`` tuples set on every new
+            connection, e.g. from :func:`tcp_socket_options`
+        **kwargs: Passed to ``HTTPAdapter`` (pool_connections, pool_maxsize,
+            max_retries, pool_block)
+    """
+
+    def __init__(self, socket_options: Optional[Sequence[SocketOption]] = None, **kwargs):
+        self.socket_options = list(socket_options) if socket_options is not None else None
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        if self.socket_options is not None:
+            kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['socket_options'] = self.socket_options
+        return state
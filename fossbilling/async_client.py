@@ -0,0 +1,316 @@
+"""
+Asynchronous FOSSBilling API client implementation.
+
+Requires the optional ``httpx`` dependency (``pip install fossbilling[async]``).
+"""
+import asyncio
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore[assignment]
+
+from .cache import DEFAULT_TTL, CacheBackend
+from .idempotency import DEFAULT_JOURNAL_TTL, new_key
+from .hooks import Hook
+from .retry import RateLimiter, RetryPolicy
+from .streaming import DEFAULT_CHUNK_SIZE, Destination, open_destination
+from .client import BaseClient
+from .codecs import JSONCodec
+from .compression import RequestCompression, httpx_encodings
+from .coalesce import AsyncSingleFlight
+from .exceptions import APIError
+from .resources import LazyResource
+from .transports import InMemoryTransport
+
+
+class AsyncClient(BaseClient):
+    """
+    An asyncio client for the FOSSBilling API.
+
+    Exposes the same resources as :class:`~fossbilling.Client`, with every
+    resource method returning an awaitable. All requests share a single
+    keep-alive connection pool, so many requests can be in flight from one
+    event loop.
+
+    Args:
+        base_url: The base URL of your FOSSBilling installation (e.g., 'https://billing.example.com/')
+        api_key: Your FOSSBilling API key
+        timeout: Request timeout in seconds (default: 30)
+        max_connections: Maximum number of open connections in the pool (default: 100)
+        max_keepalive_connections: Maximum number of idle connections kept alive (default: 20)
+        keepalive_expiry: Seconds an idle connection is kept alive (default: 5)
+        concurrency: Maximum number of requests in flight at once
+            (default: ``max_connections``)
+        cache: Optional response cache backend for GET requests
+        cache_ttl: TTL in seconds for every GET endpoint, or a mapping of
+            endpoint prefixes to TTLs (default: 60). Only used when ``cache`` is set.
+        retry_policy: Optional policy for retrying transient failures (default: no retries)
+        rate_limiter: Optional client-side rate limiter applied to every request
+        hooks: Optional request hooks called around every HTTP attempt
+        codec: JSON codec name or instance (default: 'auto', which uses
+            orjson when installed)
+        single_flight: When several tasks make the same GET request at the
+            same time, send it once and give every caller the result
+            (default: False)
+        journal: Optional cache backend recording the results of calls made
+            with an ``idempotency_key`` (see :class:`~fossbilling.Client`)
+        journal_ttl: Seconds completed operations are remembered (default: 24 hours)
+        compression: Ask for compressed responses (default: True; see
+            :class:`~fossbilling.Client`)
+        compress_requests: Compress large request bodies (see
+            :class:`~fossbilling.Client`)
+        http2: Negotiate HTTP/2, multiplexing concurrent requests over one
+            connection per host; requires h2 (``pip install fossbilling[http2]``)
+            (default: False)
+        transport: An ``httpx`` async transport, or an
+            :class:`~fossbilling.transports.InMemoryTransport` to dispatch
+            requests to Python handlers (default: httpx's network transport)
+
+    Example:
+        async with AsyncClient(base_url, api_key, concurrency=200) as client:
+            details = await asyncio.gather(*(client.clients.get(i) for i in ids))
+    """
+
+    def __init__(self, base_url: str, api_key: str, timeout: int = 30,
+                 max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 5.0, concurrency: Optional[int] = None,
+                 cache: Optional[CacheBackend] = None,
+                 cache_ttl: Union[float, Mapping[str, float]] = DEFAULT_TTL,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 hooks: Optional[Sequence[Hook]] = None,
+                 codec: Union[str, JSONCodec] = 'auto',
+                 single_flight: bool = False,
+                 journal: Optional[CacheBackend] = None,
+                 journal_ttl: float = DEFAULT_JOURNAL_TTL,
+                 compression: bool = True,
+                 compress_requests: Union[None, str, RequestCompression] = None,
+                 http2: bool = False, transport: Any = None):
+        if httpx is None:
+            raise ImportError(
+                "AsyncClient requires httpx; install it with 'pip install fossbilling[async]'"
+            )
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ImportError(
+                    "HTTP/2 requires h2; install it with 'pip install fossbilling[http2]'"
+                ) from None
+        if isinstance(transport, InMemoryTransport):
+            transport = transport.httpx_transport()
+
+        super().__init__(base_url, api_key, timeout, cache=cache, cache_ttl=cache_ttl,
+                         retry_policy=retry_policy, rate_limiter=rate_limiter, hooks=hooks,
+                         codec=codec, single_flight=single_flight, journal=journal,
+                         journal_ttl=journal_ttl, compression=compression,
+                         compress_requests=compress_requests)
+        self._flight = AsyncSingleFlight()
+        self.concurrency = concurrency or max_connections
+        self.session = httpx.AsyncClient(
+            headers=self.default_headers,
+            timeout=timeout,
+            http2=http2,
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        # Created on first use so it binds to the running event loop.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    # Resources are created on first access.
+    clients = LazyResource('clients', 'AsyncClientResource')
+    invoices = LazyResource('invoices', 'AsyncInvoiceResource')
+    orders = LazyResource('orders', 'AsyncOrderResource')
+    services = LazyResource('services', 'AsyncServiceResource')
+    system = LazyResource('system', 'AsyncSystemResource')
+
+    def _encodings(self) -> Tuple[str, ...]:
+        return httpx_encodings()
+
+    async def __aenter__(self) -> 'AsyncClient':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying connection pool."""
+        await self.session.aclose()
+
+    async def _request(self, method: str, endpoint: str, **kwargs: Any) -> Dict[str, Any]:
+        """
+        Make a request to the FOSSBilling API.
+
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint (e.g., 'admin/client')
+            **kwargs: Additional arguments to pass to httpx.AsyncClient.request().
+                A ``json`` body is encoded with the client's codec, and an
+                ``idempotency_key`` is sent as a header and journaled;
+                other non-GET calls are sent with a generated key.
+
+        Returns:
+            dict: The parsed JSON response
+
+        Raises:
+            AuthenticationError: If authentication fails
+            APIError: If the API returns an error
+        """
+        idempotency_key = kwargs.pop('idempotency_key', None)
+        if idempotency_key is not None:
+            entry = self._journaled(idempotency_key, method, endpoint)
+            if entry is not None:
+                result: Dict[str, Any] = entry['result']
+                return result
+            self._with_idempotency_key(kwargs, idempotency_key)
+        elif method.upper() != 'GET':
+            # One key per call, sent again by every retry of the call.
+            self._with_idempotency_key(kwargs, new_key())
+
+        key, ttl = self._cache_entry(method, endpoint, kwargs.get('params'))
+        if key is not None and self.cache is not None:
+            cached: Optional[Dict[str, Any]] = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if 'json' in kwargs:
+            body = kwargs.pop('json')
+            if body is not None:
+                kwargs['content'] = self._encode_body(kwargs, body)
+
+        async def send() -> Tuple[Optional['httpx.Response'], Dict[str, Any]]:
+            if idempotency_key is not None:
+                # A call with the same key may have completed while this one waited.
+                entry = self._journaled(idempotency_key, method, endpoint)
+                if entry is not None:
+                    return None, entry['result']
+            response = await self._send(method, endpoint, **kwargs)
+            data = self._decode(response)
+            if idempotency_key is not None:
+                self._journal(idempotency_key, method, endpoint, data)
+            return response, data
+
+        response: Optional['httpx.Response']
+        data: Dict[str, Any]
+        shared = False
+        flight_key = self._flight_key(method, endpoint, kwargs.get('params'), idempotency_key)
+        try:
+            if flight_key is not None:
+                (response, data), shared = await self._flight.do(flight_key, send)
+            else:
+                response, data = await send()
+        finally:
+            self._invalidate_cache(method, endpoint)
+
+        if shared and response is not None:
+            # Every caller of a shared request decodes its own copy of the body.
+            data = self._decode(response)
+        elif key is not None and self.cache is not None:
+            self.cache.set(key, data, ttl)
+        return data
+
+    async def _send(self, method: str, endpoint: str, **kwargs: Any) -> 'httpx.Response':
+        """
+        Send a request and return the raw response.
+
+        Non-OK responses are mapped to exceptions, so the returned response
+        is always successful. Use this for endpoints that do not return JSON.
+
+        Transient failures are retried according to ``retry_policy``; pass
+        ``retry=True`` to opt a non-idempotent request in.
+        """
+        url = self._build_url(endpoint)
+        retry = kwargs.pop('retry', None)
+        stream = kwargs.pop('stream', False)
+        uncompressed_size = kwargs.pop('uncompressed_size', None)
+
+        if 'timeout' not in kwargs:
+            kwargs['timeout'] = self.timeout
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await asyncio.sleep(self.rate_limiter.reserve())
+
+            context = None
+            try:
+                async with self._semaphore:
+                    if self.hooks:
+                        context = self._hooks_before(method, endpoint, url, attempt, stream,
+                                                     uncompressed_size)
+                    if stream:
+                        request = self.session.build_request(method, url, **kwargs)
+                        response = await self.session.send(request, stream=True)
+                    else:
+                        response = await self.session.request(method, url, **kwargs)
+            except httpx.HTTPError as e:
+                if context is not None:
+                    self._hooks_error(context, e)
+                delay = self._retry_delay(method, attempt, retry)
+                if delay is None:
+                    raise APIError(f"Request failed: {str(e)}")
+            else:
+                if context is not None:
+                    self._hooks_after(context, response)
+                if response.is_success:
+                    return response
+                if stream:
+                    await response.aread()
+                    await response.aclose()
+                delay = self._retry_delay(method, attempt, retry, response)
+                if delay is None:
+                    self._handle_error_response(response)
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _download(self, endpoint: str, dest: Destination,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs: Any) -> int:
+        """
+        Stream a GET response body to a path or file-like object.
+
+        The body is written chunk by chunk and never held in memory as a whole.
+
+        Returns:
+            The number of bytes written
+        """
+        response = await self._send('GET', endpoint, stream=True, **kwargs)
+        written = 0
+        try:
+            with open_destination(dest) as fh:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    fh.write(chunk)
+                    written += len(chunk)
+        except httpx.HTTPError as e:
+            raise APIError(f"Request failed: {str(e)}")
+        finally:
+            await response.aclose()
+        return written
+
+    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make a GET request to the API."""
+        return await self._request('GET', endpoint, params=params)
+
+    async def post(self, endpoint: str, data: Optional[Dict[str, Any]] = None,
+                   retry: Optional[bool] = None,
+                   idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Make a POST request to the API. See :meth:`fossbilling.Client.post`."""
+        return await self._request('POST', endpoint, json=data, retry=retry,
+                                   idempotency_key=idempotency_key)
+
+    async def put(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make a PUT request to the API."""
+        return await self._request('PUT', endpoint, json=data)
+
+    async def delete(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make a DELETE request to the API."""
+        return await self._request('DELETE', endpoint, params=params)
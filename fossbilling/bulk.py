@@ -0,0 +1,112 @@
+"""
+Concurrent bulk operations over many FOSSBilling entities.
+
+A bulk operation calls the same resource method for every ID, with a bound on
+the number of calls in flight. Failures are collected per ID instead of
+aborting the whole run.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class BulkResult:
+    """
+    Per-item outcome of a bulk operation.
+
+    Attributes:
+        results: Mapping of ID to the return value of each successful call
+        errors: Mapping of ID to the exception raised by each failed call
+    """
+
+    def __init__(self):
+        self.results: Dict[Hashable, Any] = {}
+        self.errors: Dict[Hashable, Exception] = {}
+
+    @property
+    def succeeded(self) -> List[Hashable]:
+        """IDs whose call succeeded."""
+        return list(self.results)
+
+    @property
+    def failed(self) -> List[Hashable]:
+        """IDs whose call raised an exception."""
+        return list(self.errors)
+
+    @property
+    def ok(self) -> bool:
+        """True if every call succeeded."""
+        return not self.errors
+
+    def __len__(self) -> int:
+        return len(self.results) + len(self.errors)
+
+    def __repr__(self) -> str:
+        return f"<BulkResult succeeded={len(self.results)} failed={len(self.errors)}>"
+
+
+def run_bulk(func: Callable[..., Any], ids: Iterable[Hashable],
+             max_workers: int = DEFAULT_MAX_WORKERS, **kwargs) -> BulkResult:
+    """
+    Call ``func(id, **kwargs)`` for every ID using a bounded thread pool.
+
+    Duplicate IDs are called once. Results and errors are reported in the
+    order the IDs were given.
+
+    Args:
+        func: Callable taking an ID as its first argument
+        ids: IDs to process
+        max_workers: Maximum number of calls in flight
+        **kwargs: Extra keyword arguments passed to every call
+
+    Returns:
+        A :class:`BulkResult` with the outcome of every call
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    result = BulkResult()
+    if not unique_ids:
+        return result
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_ids))) as executor:
+        futures = [(item_id, executor.submit(func, item_id, **kwargs)) for item_id in unique_ids]
+        for item_id, future in futures:
+            try:
+                result.results[item_id] = future.result()
+            except Exception as e:
+                result.errors[item_id] = e
+
+    return result
+
+
+async def arun_bulk(func: Callable[..., Awaitable[Any]], ids: Iterable[Hashable],
+                    max_workers: int = DEFAULT_MAX_WORKERS, **kwargs) -> BulkResult:
+    """
+    Async counterpart of :func:`run_bulk`.
+
+    At most ``max_workers`` calls are awaited concurrently. A call that is
+    cancelled, or raises another ``BaseException``, is re-raised instead of
+    being reported as an error.
+    """
+    import asyncio
+
+    unique_ids = list(dict.fromkeys(ids))
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def call(item_id: Hashable) -> Any:
+        async with semaphore:
+            return await func(item_id, **kwargs)
+
+    outcomes = await asyncio.gather(*(call(item_id) for item_id in unique_ids),
+                                    return_exceptions=True)
+
+    result = BulkResult()
+    for item_id, outcome in zip(unique_ids, outcomes):
+        if isinstance(outcome, Exception):
+            result.errors[item_id] = outcome
+        elif isinstance(outcome, BaseException):
+            # A cancelled call cancels the run, as it would without gather().
+            raise outcome
+        else:
+            result.results[item_id] = outcome
+    return result
@@ -0,0 +1,232 @@
+"""
+Response caching for read-mostly FOSSBilling endpoints.
+
+A cache is attached to a client with a TTL policy that decides which GET
+endpoints are cached and for how long. Writes made through the same client
+invalidate the cached responses of the entity they touch.
+"""
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+if TYPE_CHECKING:  # pragma: no cover
+    import sqlite3
+
+DEFAULT_TTL = 60.0
+DEFAULT_MAXSIZE = 1024
+
+
+class CacheBackend:
+    """
+    Interface for response cache backends.
+
+    Backends store JSON-compatible values under string keys. Keys start with
+    the endpoint path, so a whole entity can be dropped by prefix.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for ``ttl`` seconds."""
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str) -> None:
+        """Remove every entry whose key starts with ``prefix``."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """
+    Thread-safe in-process cache with TTL expiry and LRU eviction.
+
+    Values are copied on the way in and out, so callers can freely modify the
+    dictionaries they get back.
+
+    Args:
+        maxsize: Maximum number of entries before the least recently used
+            entry is evicted (default: 1024)
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache stored in a local SQLite database.
+
+    The database file can be shared by several worker processes on the same
+    host. Entries expire after their TTL, and the least recently used entries
+    are evicted once ``maxsize`` is exceeded.
+
+    Args:
+        path: Path to the SQLite database file
+        maxsize: Maximum number of entries (default: 1024)
+    """
+
+    def __init__(self, path: str, maxsize: int = DEFAULT_MAXSIZE):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)')
+
+    def _connection(self) -> 'sqlite3.Connection':
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute(
+                'SELECT value, expires_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now + ttl, now)
+            )
+            conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.maxsize,)
+            )
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                'DELETE FROM cache WHERE substr(key, 1, ?) = ?', (len(prefix), prefix)
+            )
+
+    def clear(self) -> None:
+        with self._connection() as conn:
+            conn.execute('DELETE FROM cache')
+
+
+class CachePolicy:
+    """
+    Decide which endpoints are cached and for how long.
+
+    Args:
+        ttl: Either a single TTL in seconds applied to every GET endpoint, or
+            a mapping of endpoint prefixes to TTLs. With a mapping, the
+            longest matching prefix wins and unmatched endpoints are not
+            cached. A TTL of 0 disables caching for that prefix.
+
+    Example:
+        CachePolicy({'admin/system': 300, 'admin/client': 30})
+    """
+
+    def __init__(self, ttl: Union[float, Mapping[str, float]] = DEFAULT_TTL):
+        if isinstance(ttl, Mapping):
+            self.default: Optional[float] = None
+            self.rules: List[Tuple[str, float]] = sorted(
+                ((prefix.strip('/'), float(value)) for prefix, value in ttl.items()),
+                key=lambda rule: len(rule[0]),
+                reverse=True
+            )
+        else:
+            self.default = float(ttl)
+            self.rules = []
+
+    def ttl_for(self, endpoint: str) -> Optional[float]:
+        """Return the TTL for an endpoint, or None if it is not cached."""
+        endpoint = endpoint.strip('/')
+        for prefix, ttl in self.rules:
+            if endpoint == prefix or endpoint.startswith(prefix + '/'):
+                return ttl or None
+        return self.default or None
+
+
+def cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Build the cache key for a GET request."""
+    query = urlencode(sorted(
+        (str(name), str(value)) for name, value in (params or {}).items() if value is not None
+    ))
+    return f"{endpoint.strip('/')}?{query}"
+
+
+def invalidation_prefixes(endpoint: str) -> List[str]:
+    """
+    Return the cache key prefixes made stale by a write to ``endpoint``.
+
+    A write invalidates the collection listing of its resource, and every
+    cached response of the entity it touches. For example, a write to
+    ``admin/client/5/balance`` drops ``admin/client?...``,
+    ``admin/client/5?...`` and everything under ``admin/client/5/``.
+    """
+    segments = endpoint.strip('/').split('/')
+    root = '/'.join(segments[:2])
+    prefixes = [f"{root}?"]
+    if len(segments) > 2:
+        entity = '/'.join(segments[:3])
+        prefixes += [f"{entity}?", f"{entity}/"]
+    return prefixes
@@ -1,94 +1,242 @@
 """
 FOSSBilling API client implementation.
 """
-import json
-import requests
-from typing import Dict, Any, Optional, Union
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, Mapping, NoReturn, Optional, Sequence, Tuple, Union
 from urllib.parse import urljoin
 
+from .cache import DEFAULT_TTL, CacheBackend, CachePolicy, cache_key, invalidation_prefixes
+from .codecs import JSONCodec, get_codec
+from .compression import RequestCompression, accept_encoding, requests_encodings
+from .coalesce import SingleFlight
+from .hooks import Hook, RequestContext
+from .idempotency import (
+    DEFAULT_JOURNAL_TTL, IDEMPOTENCY_HEADER, check_entry, journal_entry, journal_key, new_key
+)
+from .retry import RateLimiter, RetryPolicy
+from .streaming import DEFAULT_CHUNK_SIZE, Destination, write_chunks
 from .exceptions import (
     AuthenticationError,
     APIError,
     NotFoundError,
     ValidationError
 )
+from .resources import LazyResource
+
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+
+    from .adapters import SocketOption
+    from .transports import Transport
+
 
-class Client:
+class BaseClient:
     """
-    A client for the FOSSBilling API.
-    
+    Configuration and error handling shared by the sync and async clients.
+
     Args:
         base_url: The base URL of your FOSSBilling installation (e.g., 'https://billing.example.com/')
         api_key: Your FOSSBilling API key
         timeout: Request timeout in seconds (default: 30)
+        cache: Optional response cache backend for GET requests
+        cache_ttl: TTL in seconds for every GET endpoint, or a mapping of
+            endpoint prefixes to TTLs to cache only selected resources
+            (default: 60). Only used when ``cache`` is set.
+        retry_policy: Optional policy for retrying transient failures
+        rate_limiter: Optional client-side rate limiter applied to every request
+        hooks: Optional request hooks called around every HTTP attempt
+        codec: JSON codec name or instance (default: 'auto')
+        single_flight: Share one HTTP call between identical concurrent GET
+            requests (default: False)
+        journal: Optional cache backend recording the results of calls made
+            with an idempotency key
+        journal_ttl: Seconds completed operations are remembered (default: 24 hours)
+        compression: Ask for compressed responses in every coding the HTTP
+            library can decode (default: True)
+        compress_requests: Compress large request bodies, with a
+            :class:`~fossbilling.compression.RequestCompression` or the name
+            of a content coding (default: no compression)
     """
-    
-    def __init__(self, base_url: str, api_key: str, timeout: int = 30):
+
+    def __init__(self, base_url: str, api_key: str, timeout: int = 30,
+                 cache: Optional[CacheBackend] = None,
+                 cache_ttl: Union[float, Mapping[str, float]] = DEFAULT_TTL,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 hooks: Optional[Sequence[Hook]] = None,
+                 codec: Union[str, JSONCodec] = 'auto',
+                 single_flight: bool = False,
+                 journal: Optional[CacheBackend] = None,
+                 journal_ttl: float = DEFAULT_JOURNAL_TTL,
+                 compression: bool = True,
+                 compress_requests: Union[None, str, RequestCompression] = None):
         if not base_url.endswith('/'):
             base_url += '/'
-            
+
         self.base_url = base_url
         self.api_key = api_key
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.cache = cache
+        self.cache_policy = CachePolicy(cache_ttl)
+        self.retry_policy = retry_policy
+        self.rate_limiter = rate_limiter
+        self.hooks: List[Hook] = list(hooks or [])
+        self.codec = get_codec(codec)
+        self.single_flight = single_flight
+        self.journal = journal
+        self.journal_ttl = journal_ttl
+        self.compression = compression
+        if isinstance(compress_requests, str):
+            compress_requests = RequestCompression(compress_requests)
+        self.compress_requests = compress_requests
+
+    @property
+    def default_headers(self) -> Dict[str, str]:
+        """Headers sent with every request."""
+        return {
             'Accept': 'application/json',
+            'Accept-Encoding': accept_encoding(self._encodings() if self.compression else ()),
             'Content-Type': 'application/json',
             'X-API-Key': self.api_key
-        })
-        
-        # Initialize resources
-        self.clients = ClientResource(self)
-        self.invoices = InvoiceResource(self)
-        self.orders = OrderResource(self)
-        self.services = ServiceResource(self)
-        self.system = SystemResource(self)
-    
-    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        }
+
+    def _encodings(self) -> Tuple[str, ...]:
+        """Content codings the HTTP library can decode, best first."""
+        return ('gzip', 'deflate')
+
+    def _encode_body(self, kwargs: Dict[str, Any], body: Any) -> bytes:
+        """Encode a JSON request body, compressing it when it is large enough."""
+        data = self.codec.dumps(body)
+        if self.compress_requests is None:
+            return data
+        compressed = self.compress_requests.apply(data)
+        if compressed is None:
+            return data
+        kwargs['headers'] = {**(kwargs.get('headers') or {}),
+                             'Content-Encoding': self.compress_requests.encoding}
+        # Popped by _send and reported to hooks.
+        kwargs['uncompressed_size'] = len(data)
+        return compressed
+
+    def add_hook(self, hook: Hook) -> None:
+        """Register a request hook, e.g. a :class:`~fossbilling.hooks.MetricsCollector`."""
+        self.hooks.append(hook)
+
+    def _hooks_before(self, method: str, endpoint: str, url: str, attempt: int,
+                      stream: bool = False,
+                      uncompressed_size: Optional[int] = None) -> RequestContext:
+        """Create the context for an attempt and run the before-request hooks."""
+        context = RequestContext(method, endpoint, url, attempt, stream=stream,
+                                 uncompressed_size=uncompressed_size)
+        for hook in self.hooks:
+            hook.before_request(context)
+        return context
+
+    def _hooks_after(self, context: RequestContext, response: Any) -> None:
+        """Run the after-response hooks."""
+        for hook in self.hooks:
+            hook.after_response(context, response)
+
+    def _hooks_error(self, context: RequestContext, error: Exception) -> None:
+        """Run the on-error hooks."""
+        for hook in self.hooks:
+            hook.on_error(context, error)
+
+    def _build_url(self, endpoint: str) -> str:
+        """Build the absolute URL for an API endpoint."""
+        return urljoin(self.base_url, f'api/{endpoint.lstrip("/")}')
+
+    def _cache_entry(self, method: str, endpoint: str,
+                     params: Optional[Dict[str, Any]]) -> Tuple[Optional[str], float]:
+        """Return the cache key and TTL for a request, or (None, 0) if it is not cached."""
+        if self.cache is None or method.upper() != 'GET':
+            return None, 0
+        ttl = self.cache_policy.ttl_for(endpoint)
+        if ttl is None:
+            return None, 0
+        return cache_key(endpoint, params), ttl
+
+    def _flight_key(self, method: str, endpoint: str, params: Optional[Dict[str, Any]],
+                    idempotency_key: Optional[str] = None) -> Optional[str]:
         """
-        Make a request to the FOSSBilling API.
-        
-        Args:
-            method: HTTP method (GET, POST, PUT, DELETE)
-            endpoint: API endpoint (e.g., 'admin/client')
-            **kwargs: Additional arguments to pass to requests.request()
-            
-        Returns:
-            dict: The parsed JSON response
-            
-        Raises:
-            AuthenticationError: If authentication fails
-            APIError: If the API returns an error
-            requests.RequestException: For network-related errors
+        Return the single-flight key for a request, or None if it is not coalesced.
+
+        Concurrent calls with the same idempotency key are always coalesced,
+        so the operation is sent once even before its result is journaled.
         """
-        url = urljoin(self.base_url, f'api/{endpoint.lstrip("/")}')
-        
-        # Add timeout if not specified
-        if 'timeout' not in kwargs:
-            kwargs['timeout'] = self.timeout
-            
+        if idempotency_key is not None:
+            return journal_key(idempotency_key)
+        if not self.single_flight or method.upper() != 'GET':
+            return None
+        return cache_key(endpoint, params)
+
+    def _decode(self, response: Any) -> Any:
+        """Decode a JSON response body with the client's codec."""
         try:
-            response = self.session.request(method, url, **kwargs)
-            
-            # Handle non-OK responses
-            if not response.ok:
-                self._handle_error_response(response)
-                
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
+            return self.codec.loads(response.content)
+        except ValueError as e:
             raise APIError(f"Request failed: {str(e)}")
-    
-    def _handle_error_response(self, response: requests.Response) -> None:
-        """Handle error responses from the API."""
+
+    def _journaled(self, key: str, method: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """Return the journal entry of a completed keyed operation, or None."""
+        if self.journal is None:
+            return None
+        entry = self.journal.get(journal_key(key))
+        return entry if check_entry(entry, key, method, endpoint) else None
+
+    def _journal(self, key: str, method: str, endpoint: str, result: Any) -> None:
+        """Record the result of a completed keyed operation."""
+        if self.journal is not None:
+            self.journal.set(journal_key(key), journal_entry(method, endpoint, result),
+                             self.journal_ttl)
+
+    @staticmethod
+    def _with_idempotency_key(kwargs: Dict[str, Any], key: str) -> None:
+        """Add the idempotency key header to a request's arguments."""
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), IDEMPOTENCY_HEADER: key}
+
+    def _invalidate_cache(self, method: str, endpoint: str) -> None:
+        """Drop cached responses made stale by a write to ``endpoint``."""
+        if self.cache is None or method.upper() == 'GET':
+            return
+        for prefix in invalidation_prefixes(endpoint):
+            self.cache.delete_prefix(prefix)
+
+    def _retry_delay(self, method: str, attempt: int, retry: Optional[bool] = None,
+                     response: Any = None) -> Optional[float]:
+        """
+        Return how long to wait before retrying a failed attempt, or None to give up.
+
+        Args:
+            method: HTTP method of the request
+            attempt: Number of retries already made
+            retry: Per-call override of the policy's retryable methods
+            response: The error response, or None for a connection error
+        """
+        policy = self.retry_policy
+        if policy is None or attempt >= policy.max_retries or not policy.allows(method, retry):
+            return None
+        if response is None:
+            return policy.backoff(attempt)
+        if response.status_code not in policy.retry_statuses:
+            return None
+        return policy.backoff(attempt, response.headers.get('Retry-After'))
+
+    def _handle_error_response(self, response: Any) -> NoReturn:
+        """
+        Handle error responses from the API.
+
+        Works with both ``requests.Response`` and ``httpx.Response`` objects.
+        """
         status_code = response.status_code
-        
+
         try:
             error_data = response.json()
             error_msg = error_data.get('error', {}).get('message', response.text)
         except ValueError:
             error_msg = response.text or f"HTTP {status_code}"
-        
+
         if status_code == 401:
             raise AuthenticationError("Invalid API key or insufficient permissions")
         elif status_code == 404:
@@ -101,19 +249,326 @@ class Client:
                 code=status_code,
                 response=response
             )
-    
+
+
+class Client(BaseClient):
+    """
+    A client for the FOSSBilling API.
+
+    A single ``Client`` may be shared by many threads once it is constructed:
+    requests are dispatched through one transport, by default a
+    ``requests.Session`` whose connection pool is thread-safe, and the cache,
+    retry policy and rate limiter are all safe for concurrent use. Do not
+    change the client's configuration (for example ``session.headers``)
+    while other threads are making requests. When sharing a client across N
+    threads, set ``pool_maxsize`` to at least N so connections are reused
+    instead of being opened and discarded.
+
+    Args:
+        base_url: The base URL of your FOSSBilling installation (e.g., 'https://billing.example.com/')
+        api_key: Your FOSSBilling API key
+        timeout: Request timeout in seconds (default: 30)
+        cache: Optional response cache backend for GET requests, such as
+            :class:`~fossbilling.cache.MemoryCache` or
+            :class:`~fossbilling.cache.SQLiteCache`
+        cache_ttl: TTL in seconds for every GET endpoint, or a mapping of
+            endpoint prefixes to TTLs to cache only selected resources
+            (default: 60). Only used when ``cache`` is set.
+        retry_policy: Optional :class:`~fossbilling.retry.RetryPolicy` for
+            retrying transient failures (default: no retries)
+        rate_limiter: Optional :class:`~fossbilling.retry.RateLimiter` applied
+            to every request; share one limiter between clients and threads
+            to cap their combined request rate
+        hooks: Optional request hooks, such as
+            :class:`~fossbilling.hooks.MetricsCollector`, called around every
+            HTTP attempt
+        codec: JSON codec used to encode request bodies and decode
+            responses: ``'auto'`` (orjson when installed, else the standard
+            library), ``'json'``, ``'orjson'`` or a
+            :class:`~fossbilling.codecs.JSONCodec` instance
+        single_flight: When several threads make the same GET request
+            (same endpoint and parameters) at the same time, send it once and
+            give every caller the result (default: False)
+        journal: Cache backend, such as a
+            :class:`~fossbilling.cache.SQLiteCache`, recording the results of
+            calls made with an ``idempotency_key``. Repeating such a call
+            returns the recorded result without sending the request again.
+        journal_ttl: Seconds completed operations are remembered (default: 24 hours)
+        compression: Ask for compressed responses: gzip and deflate, plus
+            brotli and zstd when their libraries are installed (default: True)
+        compress_requests: Compress request bodies of bulk writes and other
+            large calls: a content coding name such as ``'gzip'``, or a
+            :class:`~fossbilling.compression.RequestCompression`. Only use it
+            when the server side decodes compressed request bodies.
+        pool_connections: Number of per-host connection pools to cache (default: 10)
+        pool_maxsize: Maximum number of connections kept per host (default: 10)
+        pool_block: Block when all ``pool_maxsize`` connections are busy
+            instead of opening extra, non-pooled connections (default: False)
+        keep_alive: Reuse connections between requests (default: True)
+        socket_options: TCP socket options for new connections, e.g. from
+            :func:`fossbilling.adapters.tcp_socket_options` (default: the
+            urllib3 defaults, which enable TCP_NODELAY)
+        transport: The :class:`~fossbilling.transports.Transport` sending
+            the requests, e.g. an
+            :class:`~fossbilling.transports.HTTPXTransport` for HTTP/2 or an
+            :class:`~fossbilling.transports.InMemoryTransport` for tests
+            (default: a :class:`~fossbilling.transports.RequestsTransport`
+            built from the pool options above)
+    """
+
+    def __init__(self, base_url: str, api_key: str, timeout: int = 30,
+                 cache: Optional[CacheBackend] = None,
+                 cache_ttl: Union[float, Mapping[str, float]] = DEFAULT_TTL,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 hooks: Optional[Sequence[Hook]] = None,
+                 codec: Union[str, JSONCodec] = 'auto',
+                 single_flight: bool = False,
+                 journal: Optional[CacheBackend] = None,
+                 journal_ttl: float = DEFAULT_JOURNAL_TTL,
+                 compression: bool = True,
+                 compress_requests: Union[None, str, RequestCompression] = None,
+                 pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False, keep_alive: bool = True,
+                 socket_options: Optional[Sequence['SocketOption']] = None,
+                 transport: Optional['Transport'] = None):
+        super().__init__(base_url, api_key, timeout, cache=cache, cache_ttl=cache_ttl,
+                         retry_policy=retry_policy, rate_limiter=rate_limiter, hooks=hooks,
+                         codec=codec, single_flight=single_flight, journal=journal,
+                         journal_ttl=journal_ttl, compression=compression,
+                         compress_requests=compress_requests)
+        self._flight = SingleFlight()
+        self._transport = transport
+        self._transport_options = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'pool_block': pool_block,
+            'keep_alive': keep_alive,
+            'socket_options': socket_options,
+        }
+        self._transport_ready = False
+        self._transport_lock = threading.Lock()
+
+    # Resources are created on first access.
+    clients = LazyResource('clients', 'ClientResource')
+    invoices = LazyResource('invoices', 'InvoiceResource')
+    orders = LazyResource('orders', 'OrderResource')
+    services = LazyResource('services', 'ServiceResource')
+    system = LazyResource('system', 'SystemResource')
+
+    @property
+    def transport(self) -> 'Transport':
+        """
+        The transport sending every request.
+
+        It is set up on first use, when it receives the client's default
+        headers, so constructing a client stays cheap and the HTTP library
+        is only imported once a request is made.
+        """
+        if not self._transport_ready:
+            with self._transport_lock:
+                if not self._transport_ready:
+                    if self._transport is None:
+                        from .transports import RequestsTransport
+                        self._transport = RequestsTransport(**self._transport_options)
+                    self._transport.headers.update(self.default_headers)
+                    self._transport_ready = True
+        return self._transport
+
+    @property
+    def session(self) -> 'requests.Session':
+        """
+        The ``requests.Session`` of the default transport.
+
+        Raises:
+            AttributeError: If the client uses a transport without a session
+        """
+        return self.transport.session
+
+    @session.setter
+    def session(self, session: 'requests.Session') -> None:
+        from .transports import RequestsTransport
+
+        # The session is used as it is, like a session given to RequestsTransport.
+        self._transport = RequestsTransport(session=session)
+        self._transport_ready = True
+
+    def _encodings(self) -> Tuple[str, ...]:
+        if self._transport is not None:
+            return self._transport.encodings()
+        return requests_encodings()
+
+    def close(self) -> None:
+        """Close the transport and its connections, if it was used."""
+        if self._transport is not None:
+            self._transport.close()
+
+    def __enter__(self) -> 'Client':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """
+        Make a request to the FOSSBilling API.
+
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint (e.g., 'admin/client')
+            **kwargs: Additional arguments to pass to the transport, as for
+                requests.request().
+                A ``json`` body is encoded with the client's codec, and an
+                ``idempotency_key`` is sent as a header and journaled;
+                other non-GET calls are sent with a generated key.
+
+        Returns:
+            dict: The parsed JSON response
+
+        Raises:
+            AuthenticationError: If authentication fails
+            APIError: If the API returns an error
+        """
+        idempotency_key = kwargs.pop('idempotency_key', None)
+        if idempotency_key is not None:
+            entry = self._journaled(idempotency_key, method, endpoint)
+            if entry is not None:
+                return entry['result']
+            self._with_idempotency_key(kwargs, idempotency_key)
+        elif method.upper() != 'GET':
+            # One key per call, sent again by every retry of the call.
+            self._with_idempotency_key(kwargs, new_key())
+
+        key, ttl = self._cache_entry(method, endpoint, kwargs.get('params'))
+        if key is not None and self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if 'json' in kwargs:
+            body = kwargs.pop('json')
+            if body is not None:
+                kwargs['data'] = self._encode_body(kwargs, body)
+
+        def send() -> Tuple[Any, Any]:
+            if idempotency_key is not None:
+                # A call with the same key may have completed while this one waited.
+                entry = self._journaled(idempotency_key, method, endpoint)
+                if entry is not None:
+                    return None, entry['result']
+            response = self._send(method, endpoint, **kwargs)
+            data = self._decode(response)
+            if idempotency_key is not None:
+                self._journal(idempotency_key, method, endpoint, data)
+            return response, data
+
+        shared = False
+        flight_key = self._flight_key(method, endpoint, kwargs.get('params'), idempotency_key)
+        try:
+            if flight_key is not None:
+                (response, data), shared = self._flight.do(flight_key, send)
+            else:
+                response, data = send()
+        finally:
+            self._invalidate_cache(method, endpoint)
+
+        if shared and response is not None:
+            # Every caller of a shared request decodes its own copy of the body.
+            data = self._decode(response)
+        elif key is not None and self.cache is not None:
+            self.cache.set(key, data, ttl)
+        return data
+
+    def _send(self, method: str, endpoint: str, **kwargs) -> Any:
+        """
+        Send a request and return the raw response.
+
+        Non-OK responses are mapped to exceptions, so the returned response
+        is always successful. Use this for endpoints that do not return JSON.
+
+        Transient failures are retried according to ``retry_policy``; pass
+        ``retry=True`` to opt a non-idempotent request in.
+        """
+        url = self._build_url(endpoint)
+        retry = kwargs.pop('retry', None)
+        uncompressed_size = kwargs.pop('uncompressed_size', None)
+        transport = self.transport
+        transport_errors = transport.errors
+
+        # Add timeout if not specified
+        if 'timeout' not in kwargs:
+            kwargs['timeout'] = self.timeout
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            context = None
+            if self.hooks:
+                context = self._hooks_before(method, endpoint, url, attempt,
+                                             kwargs.get('stream', False), uncompressed_size)
+
+            try:
+                response = transport.request(method, url, **kwargs)
+            except transport_errors as e:
+                if context is not None:
+                    self._hooks_error(context, e)
+                delay = self._retry_delay(method, attempt, retry)
+                if delay is None:
+                    raise APIError(f"Request failed: {str(e)}")
+            else:
+                if context is not None:
+                    self._hooks_after(context, response)
+                if response.ok:
+                    return response
+                delay = self._retry_delay(method, attempt, retry, response)
+                if delay is None:
+                    # Handle non-OK responses
+                    self._handle_error_response(response)
+                response.close()
+
+            time.sleep(delay)
+            attempt += 1
+
+    def _download(self, endpoint: str, dest: Destination,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs) -> int:
+        """
+        Stream a GET response body to a path or file-like object.
+
+        The body is written chunk by chunk and never held in memory as a whole.
+
+        Returns:
+            The number of bytes written
+        """
+        response = self._send('GET', endpoint, stream=True, **kwargs)
+        try:
+            return write_chunks(response.iter_content(chunk_size), dest)
+        except self.transport.errors as e:
+            raise APIError(f"Request failed: {str(e)}")
+        finally:
+            response.close()
+
     def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a GET request to the API."""
         return self._request('GET', endpoint, params=params)
-    
-    def post(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Make a POST request to the API."""
-        return self._request('POST', endpoint, json=data)
-    
+
+    def post(self, endpoint: str, data: Optional[Dict[str, Any]] = None,
+             retry: Optional[bool] = None,
+             idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Make a POST request to the API.
+
+        Pass ``retry=True`` if the action is safe to retry, and an
+        ``idempotency_key`` to journal the operation (see :attr:`journal`).
+        """
+        return self._request('POST', endpoint, json=data, retry=retry,
+                             idempotency_key=idempotency_key)
+
     def put(self, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a PUT request to the API."""
         return self._request('PUT', endpoint, json=data)
-    
-    def delete(self, endpoint: str) -> Dict[str, Any]:
+
+    def delete(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a DELETE request to the API."""
-        return self._request('DELETE', endpoint)
+        return self._request('DELETE', endpoint, params=params)
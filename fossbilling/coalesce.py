@@ -0,0 +1,106 @@
+"""
+Request coalescing ("single-flight") for identical concurrent GET requests.
+
+When single-flight is enabled on a client, a GET issued while an identical
+GET (same endpoint and query parameters) is already in flight waits for that
+request instead of sending its own. Every caller then decodes the shared
+response body itself, so no two callers ever receive the same mutable
+dictionary.
+"""
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Thread-safe call coalescing keyed by a string.
+
+    The first thread to call :meth:`do` for a key runs the function; threads
+    calling :meth:`do` with the same key before it returns wait for its
+    outcome and receive the same result, or the same exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``func`` once for all concurrent callers sharing ``key``.
+
+        Returns:
+            ``(result, shared)``, where ``shared`` is True for callers that
+            waited on another caller's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def __len__(self) -> int:
+        """Number of calls currently in flight."""
+        return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """
+    Call coalescing for coroutines running on one event loop.
+
+    The shared call runs in its own task, so cancelling one waiting caller
+    never cancels the request the other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, 'asyncio.Future[Any]'] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async counterpart of :meth:`SingleFlight.do`."""
+        import asyncio
+
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: 'asyncio.Future[Any]') -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller was cancelled.
+            task.exception()
+
+    def __len__(self) -> int:
+        """Number of calls currently in flight."""
+        return len(self._calls)
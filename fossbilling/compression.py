@@ -0,0 +1,134 @@
+"""
+Compressed transfers: response decoding and request body compression.
+
+Clients advertise every content coding their HTTP library can decode:
+``gzip`` and ``deflate`` always, ``br`` when ``brotli`` (or ``brotlicffi``)
+is installed and ``zstd`` when ``zstandard`` is installed and the HTTP
+library supports it (``pip install fossbilling[compression]``).
+
+Request bodies are sent uncompressed unless the client is given a
+:class:`RequestCompression`. FOSSBilling itself does not decode compressed
+request bodies, so only enable it when a reverse proxy in front of the API
+does (for example nginx with a ``gunzip``-style request filter).
+"""
+import gzip
+import zlib
+from typing import Optional, Tuple
+
+#: Preferred order of response codings, best compression first
+PREFERENCE = ('zstd', 'br', 'gzip', 'deflate')
+
+#: Request bodies smaller than this are not worth compressing (bytes)
+DEFAULT_MIN_SIZE = 8 * 1024
+
+_LEVELS = {'gzip': 6, 'deflate': 6, 'br': 5, 'zstd': 3}
+
+
+def _ordered(encodings: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(name for name in PREFERENCE if name in encodings)
+
+
+def requests_encodings() -> Tuple[str, ...]:
+    """Return the content codings ``requests`` (urllib3) can decode here."""
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    return _ordered(tuple(name.strip() for name in ACCEPT_ENCODING.split(',')))
+
+
+def httpx_encodings() -> Tuple[str, ...]:
+    """Return the content codings ``httpx`` can decode here."""
+    try:
+        from httpx._decoders import SUPPORTED_DECODERS
+    except ImportError:  # pragma: no cover
+        return ('gzip', 'deflate')
+    return _ordered(tuple(SUPPORTED_DECODERS))
+
+
+def accept_encoding(encodings: Tuple[str, ...]) -> str:
+    """Build an ``Accept-Encoding`` header value; ``identity`` if empty."""
+    return ', '.join(encodings) if encodings else 'identity'
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compress ``data`` with a content coding.
+
+    Args:
+        data: Bytes to compress
+        encoding: ``'gzip'``, ``'deflate'``, ``'br'`` or ``'zstd'``
+        level: Compression level (default: a fast level for each coding)
+
+    Raises:
+        ValueError: If the coding is unknown
+        ImportError: If the coding needs a library that is not installed
+    """
+    if level is None:
+        level = _LEVELS.get(encoding, 0)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == 'deflate':
+        return zlib.compress(data, level)
+    if encoding == 'br':
+        try:
+            import brotli
+        except ImportError:
+            try:
+                import brotlicffi as brotli
+            except ImportError:
+                raise ImportError(
+                    "Brotli compression requires brotli; "
+                    "install it with 'pip install fossbilling[compression]'"
+                ) from None
+        return brotli.compress(data, quality=level)
+    if encoding == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "Zstandard compression requires zstandard; "
+                "install it with 'pip install fossbilling[compression]'"
+            ) from None
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(
+        f"Unknown content coding {encoding!r}; expected one of: {', '.join(PREFERENCE)}"
+    )
+
+
+class RequestCompression:
+    """
+    Compression of large JSON request bodies, e.g. for bulk writes.
+
+    Bodies of at least ``min_size`` bytes are compressed and sent with a
+    ``Content-Encoding`` header, unless compression does not make them
+    smaller.
+
+    Args:
+        encoding: Content coding to use (default: ``'gzip'``)
+        min_size: Smallest body, in bytes, worth compressing (default: 8 KiB)
+        level: Compression level (default: a fast level for the coding)
+
+    Raises:
+        ValueError: If the coding is unknown
+        ImportError: If the coding needs a library that is not installed
+
+    Example:
+        client = Client(base_url, api_key, compress_requests=RequestCompression('zstd'))
+    """
+
+    def __init__(self, encoding: str = 'gzip', min_size: int = DEFAULT_MIN_SIZE,
+                 level: Optional[int] = None):
+        self.encoding = encoding
+        self.min_size = min_size
+        self.level = level
+        # Fail at construction, not on the first large request.
+        compress(b'', encoding, level)
+
+    def apply(self, data: bytes) -> Optional[bytes]:
+        """Return the compressed body, or None to send ``data`` as it is."""
+        if len(data) < self.min_size:
+            return None
+        compressed = compress(data, self.encoding, self.level)
+        return compressed if len(compressed) < len(data) else None
+
+    def __repr__(self) -> str:
+        return f"<RequestCompression encoding={self.encoding!r} min_size={self.min_size}>"
@@ -28,3 +28,8 @@ class NotFoundError(FOSSBillingException):
 class ValidationError(FOSSBillingException):
     """Raised when input validation fails."""
     pass
+
+
+class IdempotencyKeyError(FOSSBillingException, ValueError):
+    """Raised when an idempotency key is reused for a different operation."""
+    pass
@@ -0,0 +1,317 @@
+"""
+Streaming export of resource listings to NDJSON, CSV and Parquet files.
+
+Records are read page by page from a listing and written as they arrive, so
+an export runs in constant memory whatever the size of the dataset: one or
+two pages for NDJSON and CSV, plus one row group for Parquet. Parquet needs
+`pyarrow <https://arrow.apache.org/docs/python/>`_
+(``pip install fossbilling[parquet]``).
+
+From the command line::
+
+    python -m fossbilling export invoices --format parquet --output invoices.parquet
+"""
+import csv
+import io
+import json
+import os
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .codecs import get_codec
+from .pagination import DEFAULT_PER_PAGE
+from .streaming import Destination, open_destination
+
+FORMATS = ('ndjson', 'csv', 'parquet')
+
+#: Records per Parquet row group
+DEFAULT_BATCH_SIZE = 10_000
+
+#: Exportable listings: entity name to the client's iterator method
+SOURCES: Dict[str, Callable[..., Iterable[Dict[str, Any]]]] = {
+    'clients': lambda client, **options: client.clients.iter_all(**options),
+    'orders': lambda client, **options: client.orders.iter_all(**options),
+    'invoices': lambda client, **options: client.invoices.iter_all(**options),
+    'services': lambda client, **options: client.services.iter_all(**options),
+    'logs': lambda client, **options: client.system.iter_logs(**options),
+}
+
+
+def _project(records: Iterable[Dict[str, Any]],
+             fields: Optional[Sequence[str]]) -> Iterable[Dict[str, Any]]:
+    if fields is None:
+        return records
+    return ({name: record.get(name) for name in fields} for record in records)
+
+
+def _scalar(value: Any) -> Any:
+    """Flatten nested values (such as invoice lines) to JSON text."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(',', ':'), default=str)
+    return value
+
+
+class RecordWriter:
+    """
+    Interface of the format writers.
+
+    Args:
+        fh: Binary file to write to
+        fields: Columns to write; taken from the first record when None
+    """
+
+    def __init__(self, fh: BinaryIO, fields: Optional[Sequence[str]] = None):
+        self.fh = fh
+        self.fields = list(fields) if fields is not None else None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Write one record."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Flush buffered records. Does not close the file.
+
+        :func:`write_records` calls it even when writing fails.
+        """
+
+
+class NDJSONWriter(RecordWriter):
+    """Newline-delimited JSON, one record per line, nested values kept as they are."""
+
+    def __init__(self, fh: BinaryIO, fields: Optional[Sequence[str]] = None):
+        super().__init__(fh, fields)
+        self._dumps = get_codec().dumps
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self.fh.write(self._dumps(record) + b'\n')
+
+
+class CSVWriter(RecordWriter):
+    """
+    CSV with a header row.
+
+    Nested values are written as JSON text. Without ``fields``, the columns
+    are those of the first record; keys missing from a record are left empty
+    and keys the first record did not have are dropped.
+    """
+
+    def __init__(self, fh: BinaryIO, fields: Optional[Sequence[str]] = None):
+        super().__init__(fh, fields)
+        self._text = io.TextIOWrapper(fh, encoding='utf-8', newline='')
+        self._writer: Optional[csv.DictWriter] = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._writer is None:
+            if self.fields is None:
+                self.fields = list(record)
+            self._writer = csv.DictWriter(self._text, self.fields, extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerow({name: _scalar(value) for name, value in record.items()})
+
+    def close(self) -> None:
+        try:
+            self._text.flush()
+        finally:
+            # Leave the underlying file open for the caller; a wrapper that is
+            # not detached closes it when it is garbage collected.
+            self._text.detach()
+
+
+class ParquetWriter(RecordWriter):
+    """
+    Parquet, written in row groups of ``batch_size`` records.
+
+    The schema is inferred from the first row group. Columns that are empty
+    or of mixed types there become strings, and nested values are written as
+    JSON text.
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+
+    def __init__(self, fh: BinaryIO, fields: Optional[Sequence[str]] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError(
+                "Parquet export requires pyarrow; install it with 'pip install fossbilling[parquet]'"
+            ) from None
+        super().__init__(fh, fields)
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.batch_size = batch_size
+        self._batch: List[Dict[str, Any]] = []
+        self._writer: Any = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _schema(self, columns: Dict[str, List[Any]]) -> Any:
+        pa = self._pa
+        schema_fields = []
+        for name, values in columns.items():
+            try:
+                kind = pa.array(values).type
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                kind = pa.null()
+            schema_fields.append(pa.field(name, pa.string() if pa.types.is_null(kind) else kind))
+        return pa.schema(schema_fields)
+
+    def _flush(self) -> None:
+        if not self._batch:
+            return
+        if self.fields is None:
+            self.fields = list(self._batch[0])
+        columns = {name: [_scalar(record.get(name)) for record in self._batch]
+                   for name in self.fields}
+        self._batch = []
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.fh, self._schema(columns))
+        schema = self._writer.schema
+        for name in columns:
+            if self._pa.types.is_string(schema.field(name).type):
+                columns[name] = [None if value is None else str(value) for value in columns[name]]
+        try:
+            table = self._pa.Table.from_pydict(columns, schema=schema)
+        except (self._pa.ArrowInvalid, self._pa.ArrowTypeError) as e:
+            raise ValueError(
+                f"Records do not match the Parquet schema inferred from the first "
+                f"{self.batch_size} records ({e}); select consistent columns with 'fields'"
+            ) from e
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        self._flush()
+        if self._writer is None and self.fields is not None:
+            # No records: still write a valid, empty file with the requested columns.
+            schema = self._pa.schema([(name, self._pa.string()) for name in self.fields])
+            self._writer = self._pq.ParquetWriter(self.fh, schema)
+        if self._writer is not None:
+            self._writer.close()
+
+
+WRITERS = {
+    'ndjson': NDJSONWriter,
+    'csv': CSVWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def write_records(records: Iterable[Dict[str, Any]], dest: Destination, format: str = 'ndjson',
+                  fields: Optional[Sequence[str]] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Stream records to a file in one of :data:`FORMATS`.
+
+    Args:
+        records: Record dictionaries, consumed lazily
+        dest: A file path, or a writable binary file-like object. Paths are
+            written atomically, so a failed export leaves no partial file.
+        format: ``'ndjson'``, ``'csv'`` or ``'parquet'``
+        fields: Columns to write, in order (default: every field)
+        batch_size: Records per Parquet row group
+
+    Returns:
+        The number of records written
+    """
+    if format not in WRITERS:
+        raise ValueError(f"Unknown export format {format!r}; expected one of: {', '.join(FORMATS)}")
+    count = 0
+    with open_destination(dest) as fh:
+        if format == 'parquet':
+            writer: RecordWriter = ParquetWriter(fh, fields, batch_size=batch_size)
+        else:
+            writer = WRITERS[format](fh, fields)
+        try:
+            for record in _project(records, fields):
+                writer.write(record)
+                count += 1
+        finally:
+            writer.close()
+    return count
+
+
+def export(client: Any, entity: str, dest: Destination, format: str = 'ndjson',
+           fields: Optional[Sequence[str]] = None, per_page: int = DEFAULT_PER_PAGE,
+           max_items: Optional[int] = None, workers: Optional[int] = None,
+           batch_size: int = DEFAULT_BATCH_SIZE, **params: Any) -> int:
+    """
+    Export a resource listing to a file without holding it in memory.
+
+    Args:
+        client: A :class:`~fossbilling.Client`
+        entity: One of ``'clients'``, ``'orders'``, ``'invoices'``,
+            ``'services'`` or ``'logs'``
+        dest: A file path or a writable binary file-like object
+        format: ``'ndjson'``, ``'csv'`` or ``'parquet'``
+        fields: Columns to write, in order (default: every field)
+        per_page: Records fetched per request
+        max_items: Stop after this many records (default: no limit)
+        workers: Fetch pages concurrently with this many threads
+        batch_size: Records per Parquet row group
+        **params: Filters passed to the listing, e.g. ``status='unpaid'``
+
+    Returns:
+        The number of records written
+
+    Example:
+        export(client, 'invoices', 'unpaid.csv', format='csv',
+               fields=['id', 'client_id', 'total', 'due_at'], status='unpaid')
+    """
+    try:
+        source = SOURCES[entity]
+    except KeyError:
+        raise ValueError(
+            f"Unknown entity {entity!r}; expected one of: {', '.join(SOURCES)}"
+        ) from None
+    records = source(client, per_page=per_page, max_items=max_items, workers=workers, **params)
+    return write_records(records, dest, format=format, fields=fields, batch_size=batch_size)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Export a listing from the command line."""
+    import argparse
+    import sys
+
+    from .client import Client
+
+    parser = argparse.ArgumentParser(prog='python -m fossbilling export',
+                                     description='Export a FOSSBilling listing to a file.')
+    parser.add_argument('entity', choices=list(SOURCES))
+    parser.add_argument('--format', choices=FORMATS, default='ndjson')
+    parser.add_argument('--output', '-o', default='-',
+                        help='Output file; - writes NDJSON or CSV to standard output (default)')
+    parser.add_argument('--fields', type=lambda value: value.split(','),
+                        help='Comma-separated columns to export (default: all)')
+    parser.add_argument('--filter', action='append', default=[], metavar='NAME=VALUE',
+                        help='Listing filter, e.g. status=unpaid; repeat for several')
+    parser.add_argument('--url', default=os.environ.get('FOSSBILLING_URL'),
+                        help='FOSSBilling base URL (default: $FOSSBILLING_URL)')
+    parser.add_argument('--api-key', default=os.environ.get('FOSSBILLING_API_KEY'),
+                        help='API key (default: $FOSSBILLING_API_KEY)')
+    parser.add_argument('--per-page', type=int, default=DEFAULT_PER_PAGE)
+    parser.add_argument('--max-items', type=int)
+    parser.add_argument('--workers', type=int, help='Fetch pages concurrently')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Records per Parquet row group')
+    args = parser.parse_args(argv)
+    if not args.url or not args.api_key:
+        parser.error('--url and --api-key (or FOSSBILLING_URL and FOSSBILLING_API_KEY) are required')
+    if args.output == '-' and args.format == 'parquet':
+        parser.error('Parquet output needs --output')
+    try:
+        params = dict(item.split('=', 1) for item in args.filter)
+    except ValueError:
+        parser.error('--filter expects NAME=VALUE')
+
+    dest = sys.stdout.buffer if args.output == '-' else args.output
+    with Client(args.url, args.api_key) as client:
+        count = export(client, args.entity, dest, format=args.format, fields=args.fields,
+                       per_page=args.per_page, max_items=args.max_items, workers=args.workers,
+                       batch_size=args.batch_size, **params)
+    if args.output != '-':
+        print(f"{args.entity}: {count} records written to {args.output}", file=sys.stderr)
@@ -0,0 +1,294 @@
+"""
+Request instrumentation hooks and a built-in metrics collector.
+
+Hooks are called around every HTTP attempt made by a client, including
+retries. When no hooks are registered, the request path skips all of this.
+"""
+import math
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0
+)
+
+_ID_SEGMENT = re.compile(r'(?<=/)\d+(?=/|$)')
+
+
+def endpoint_label(endpoint: str) -> str:
+    """
+    Normalize an endpoint for use as a metric label.
+
+    Numeric path segments are replaced with ``{id}`` so that, for example,
+    every ``admin/client/<id>`` request is grouped under one label.
+    """
+    return _ID_SEGMENT.sub('{id}', endpoint.strip('/'))
+
+
+class RequestContext:
+    """
+    Describes a single HTTP attempt, passed to every hook callback.
+
+    Attributes:
+        method: HTTP method
+        endpoint: API endpoint (e.g., 'admin/client/5')
+        url: Absolute request URL
+        attempt: Number of retries made before this attempt
+        stream: Whether the response body is streamed
+        started_at: ``time.perf_counter()`` value when the attempt started
+        uncompressed_size: Size of the request body before compression, or
+            None if it was not compressed
+        extra: Free-form storage for hooks to pass state between callbacks
+    """
+
+    __slots__ = ('method', 'endpoint', 'url', 'attempt', 'stream', 'started_at',
+                 'uncompressed_size', 'extra')
+
+    def __init__(self, method: str, endpoint: str, url: str, attempt: int = 0,
+                 stream: bool = False, uncompressed_size: Optional[int] = None):
+        self.method = method.upper()
+        self.endpoint = endpoint
+        self.url = url
+        self.attempt = attempt
+        self.stream = stream
+        self.uncompressed_size = uncompressed_size
+        self.started_at = time.perf_counter()
+        self.extra: Dict[str, Any] = {}
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the attempt started."""
+        return time.perf_counter() - self.started_at
+
+
+class Hook:
+    """
+    Base class for request hooks. Override any of the callbacks.
+
+    Callbacks run on the thread (or event loop) making the request, so they
+    should be fast. Exceptions raised by a hook propagate to the caller.
+    """
+
+    def before_request(self, context: RequestContext) -> None:
+        """Called before a request is sent."""
+
+    def after_response(self, context: RequestContext, response: Any) -> None:
+        """Called when a response is received, whatever its status code."""
+
+    def on_error(self, context: RequestContext, error: Exception) -> None:
+        """Called when a request fails without a response (e.g. connection errors)."""
+
+
+def _content_length(headers: Any) -> Optional[int]:
+    value = headers.get('Content-Length') if headers is not None else None
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _bytes_on_wire(response: Any) -> Optional[int]:
+    """Body bytes read from the connection, before content decoding."""
+    downloaded = getattr(response, 'num_bytes_downloaded', None)  # httpx
+    if downloaded is not None:
+        return downloaded
+    tell = getattr(getattr(response, 'raw', None), 'tell', None)  # requests (urllib3)
+    if callable(tell):
+        try:
+            return tell()
+        except (OSError, ValueError):
+            return None
+    return None
+
+
+def response_sizes(context: RequestContext, response: Any) -> Tuple[int, int]:
+    """
+    Return ``(bytes_sent, bytes_received)`` for a response, as transferred.
+
+    Body sizes come from the Content-Length headers, so compressed bodies
+    count their compressed size. Without the header, a buffered response is
+    measured by the bytes read from the connection. Streamed bodies are never
+    read here.
+    """
+    request = getattr(response, 'request', None)
+    sent = _content_length(getattr(request, 'headers', None)) or 0
+    received = _content_length(response.headers)
+    if received is None:
+        if context.stream:
+            received = 0
+        else:
+            received = _bytes_on_wire(response)
+            if received is None:
+                received = len(response.content or b'')
+    return sent, received
+
+
+class _EndpointStats:
+    __slots__ = ('count', 'errors', 'latency_sum', 'buckets', 'bytes_sent', 'bytes_received',
+                 'bytes_sent_uncompressed', 'bytes_received_uncompressed')
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (bucket_count + 1)  # last bucket is +Inf
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.bytes_sent_uncompressed = 0
+        self.bytes_received_uncompressed = 0
+
+
+class MetricsCollector(Hook):
+    """
+    Collect per-endpoint request metrics.
+
+    Records call counts, error counts (connection errors and responses with
+    status >= 400), a latency histogram and bytes transferred, grouped by
+    method and :func:`endpoint_label`. Bytes are counted both as transferred
+    and uncompressed, which shows the bandwidth saved by compression. Safe to
+    share across threads and clients.
+
+    Args:
+        buckets: Upper bounds of the latency histogram buckets, in seconds
+
+    Example:
+        metrics = MetricsCollector()
+        client = Client(base_url, api_key, hooks=[metrics])
+        ...
+        print(metrics.to_prometheus())
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._stats: Dict[Tuple[str, str], _EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, context: RequestContext, error: bool, sent: int = 0,
+                received: int = 0, sent_uncompressed: int = 0,
+                received_uncompressed: int = 0) -> None:
+        elapsed = context.elapsed
+        key = (context.method, endpoint_label(context.endpoint))
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if elapsed <= bound), len(self.buckets)
+        )
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _EndpointStats(len(self.buckets))
+            stats.count += 1
+            stats.errors += error
+            stats.latency_sum += elapsed
+            stats.buckets[index] += 1
+            stats.bytes_sent += sent
+            stats.bytes_received += received
+            stats.bytes_sent_uncompressed += sent_uncompressed
+            stats.bytes_received_uncompressed += received_uncompressed
+
+    def after_response(self, context: RequestContext, response: Any) -> None:
+        sent, received = response_sizes(context, response)
+        # Streamed bodies are not decoded here and count their transferred size.
+        sent_uncompressed = (context.uncompressed_size if context.uncompressed_size is not None
+                             else sent)
+        received_uncompressed = received if context.stream else len(response.content or b'')
+        self._record(context, response.status_code >= 400, sent, received,
+                     sent_uncompressed, received_uncompressed)
+
+    def on_error(self, context: RequestContext, error: Exception) -> None:
+        self._record(context, True)
+
+    def reset(self) -> None:
+        """Discard all recorded metrics."""
+        with self._lock:
+            self._stats.clear()
+
+    def _quantile(self, stats: _EndpointStats, q: float) -> float:
+        """Estimate a latency quantile by interpolating within histogram buckets."""
+        if not stats.count:
+            return 0.0
+        rank = q * stats.count
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets + (math.inf,), stats.buckets):
+            if count and cumulative + count >= rank:
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return lower
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the metrics as a dictionary keyed by ``"METHOD endpoint"``.
+
+        Each entry has ``count``, ``errors``, ``bytes_sent``,
+        ``bytes_received`` (as transferred), ``bytes_sent_uncompressed``,
+        ``bytes_received_uncompressed``, ``bytes_saved`` (by compression, in
+        both directions) and ``latency`` (``avg``, ``p50``, ``p95``, ``p99``
+        and ``sum``, in seconds).
+        """
+        with self._lock:
+            result = {}
+            for (method, endpoint), stats in sorted(self._stats.items()):
+                result[f"{method} {endpoint}"] = {
+                    'count': stats.count,
+                    'errors': stats.errors,
+                    'bytes_sent': stats.bytes_sent,
+                    'bytes_received': stats.bytes_received,
+                    'bytes_sent_uncompressed': stats.bytes_sent_uncompressed,
+                    'bytes_received_uncompressed': stats.bytes_received_uncompressed,
+                    'bytes_saved': (stats.bytes_sent_uncompressed + stats.bytes_received_uncompressed
+                                    - stats.bytes_sent - stats.bytes_received),
+                    'latency': {
+                        'avg': stats.latency_sum / stats.count if stats.count else 0.0,
+                        'p50': self._quantile(stats, 0.50),
+                        'p95': self._quantile(stats, 0.95),
+                        'p99': self._quantile(stats, 0.99),
+                        'sum': stats.latency_sum,
+                    },
+                }
+        return result
+
+    def to_prometheus(self, prefix: str = 'fossbilling') -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def counter(name: str, help_text: str, attribute: str) -> None:
+            header(name, 'counter', help_text)
+            for (method, endpoint), stats in items:
+                value = getattr(stats, attribute)
+                lines.append(f'{prefix}_{name}{{method="{method}",endpoint="{endpoint}"}} {value}')
+
+        with self._lock:
+            items = sorted(self._stats.items())
+
+            counter('requests_total', 'Total API requests.', 'count')
+            counter('request_errors_total',
+                    'API requests that failed or returned an error status.', 'errors')
+
+            header('request_duration_seconds', 'histogram', 'API request latency.')
+            metric = f'{prefix}_request_duration_seconds'
+            for (method, endpoint), stats in items:
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), stats.buckets):
+                    cumulative += count
+                    le = '+Inf' if math.isinf(bound) else repr(bound)
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{labels}}} {stats.latency_sum}')
+                lines.append(f'{metric}_count{{{labels}}} {stats.count}')
+
+            counter('request_bytes_total', 'Request body bytes sent.', 'bytes_sent')
+            counter('response_bytes_total', 'Response body bytes received.', 'bytes_received')
+            counter('request_uncompressed_bytes_total',
+                    'Request body bytes before compression.', 'bytes_sent_uncompressed')
+            counter('response_uncompressed_bytes_total',
+                    'Response body bytes after decompression.', 'bytes_received_uncompressed')
+
+        return '\n'.join(lines) + '\n'
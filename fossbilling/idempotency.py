@@ -0,0 +1,75 @@
+"""
+Idempotency keys and a journal of completed operations.
+
+Mutating calls such as ``orders.renew()`` or ``invoices.mark_as_paid()``
+accept an ``idempotency_key``. The key is sent in an ``Idempotency-Key``
+header on every attempt, so a server or gateway that honours the header can
+deduplicate the request. When the client has a journal, the result of every
+keyed call that completes is recorded under its key; calling again with the
+same key returns the recorded result without sending anything, and
+concurrent calls with the same key share one request.
+
+Other mutating calls are sent with a key generated for the call, so every
+retry of the call carries the same key; such keys are not journaled.
+
+Use :func:`operation_key` to derive the key from what identifies the logical
+operation (for example the order ID and the billing period), so a retry of a
+job, even from another process, produces the same key.
+"""
+import hashlib
+from typing import Any, Dict, Optional
+
+from .exceptions import IdempotencyKeyError
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+#: How long completed operations are remembered (24 hours)
+DEFAULT_JOURNAL_TTL = 24 * 60 * 60.0
+
+_PREFIX = 'idempotency:'
+
+
+def new_key() -> str:
+    """Return a new random idempotency key, as sent with calls made without one."""
+    import uuid
+    return uuid.uuid4().hex
+
+
+def operation_key(*parts: Any) -> str:
+    """
+    Derive a stable idempotency key from the parts identifying an operation.
+
+    Example:
+        key = operation_key('renew-order', order_id, '2024-10')
+        client.orders.renew(order_id, idempotency_key=key)
+    """
+    text = '\x1f'.join(str(part) for part in parts)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+
+def journal_entry(method: str, endpoint: str, result: Any) -> Dict[str, Any]:
+    """Build the journal record of a completed operation."""
+    return {'operation': f"{method.upper()} {endpoint.strip('/')}", 'result': result}
+
+
+def journal_key(key: str) -> str:
+    """Return the journal (cache backend) key for an idempotency key."""
+    return f"{_PREFIX}{key}"
+
+
+def check_entry(entry: Optional[Dict[str, Any]], key: str, method: str, endpoint: str) -> bool:
+    """
+    Return True if ``entry`` records the completion of this operation.
+
+    Raises:
+        IdempotencyKeyError: If the key was already used for a different operation
+    """
+    if entry is None:
+        return False
+    operation = f"{method.upper()} {endpoint.strip('/')}"
+    if entry.get('operation') != operation:
+        raise IdempotencyKeyError(
+            f"Idempotency key {key!r} was already used for {entry.get('operation')!r}, "
+            f"not {operation!r}"
+        )
+    return True
@@ -0,0 +1,424 @@
+"""
+Local SQLite mirror of FOSSBilling data.
+
+:class:`Mirror` loads clients, orders, services and invoices into an indexed
+SQLite database, so read-heavy tooling can run lookups locally instead of
+calling the list endpoints every time. Refreshes are incremental: they reuse
+:class:`~fossbilling.sync.IncrementalSync` and only write changed records.
+
+The mirror can also be refreshed from the command line::
+
+    FOSSBILLING_API_KEY=... python -m fossbilling mirror mirror.db --url https://billing.example.com
+"""
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, Union
+
+from .models import (
+    ClientModel, InvoiceModel, Model, OrderModel, ServiceModel, parse_datetime, parse_decimal,
+    parse_int,
+)
+from .pagination import DEFAULT_PER_PAGE
+from .sync import DELETED, IncrementalSync, SyncSpec, SyncState
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None or value == '' else str(value)
+
+
+def _timestamp(value: Any) -> Optional[str]:
+    parsed = parse_datetime(value)
+    return parsed.strftime(DATETIME_FORMAT) if parsed is not None else None
+
+
+def _real(value: Any) -> Optional[float]:
+    parsed = parse_decimal(value)
+    return float(parsed) if parsed is not None else None
+
+
+_COLUMN_TYPES: Dict[Callable[[Any], Any], str] = {
+    _text: 'TEXT', _timestamp: 'TEXT', _real: 'REAL', parse_int: 'INTEGER',
+}
+
+
+class _Table:
+    """Schema of one mirrored entity: indexed columns extracted from each record."""
+
+    def __init__(self, name: str, model: Type[Model],
+                 columns: Dict[str, Callable[[Any], Any]], indexes: Sequence[Tuple[str, ...]]):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.indexes = indexes
+
+    def create(self, conn: sqlite3.Connection) -> None:
+        columns = ''.join(f', {column} {_COLUMN_TYPES[convert]}'
+                          for column, convert in self.columns.items())
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {self.name} ('
+                     f'id INTEGER PRIMARY KEY{columns}, hash TEXT, data TEXT NOT NULL)')
+        for index in self.indexes:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {self.name}_{"_".join(index)} '
+                         f'ON {self.name} ({", ".join(index)})')
+
+    def row(self, record: Dict[str, Any], digest: Optional[str]) -> Tuple[Any, ...]:
+        values = [convert(record.get(column)) for column, convert in self.columns.items()]
+        return (parse_int(record.get('id')), *values, digest,
+                json.dumps(record, separators=(',', ':')))
+
+    def upsert_sql(self) -> str:
+        names = ['id', *self.columns, 'hash', 'data']
+        return (f'INSERT OR REPLACE INTO {self.name} ({", ".join(names)}) '
+                f'VALUES ({", ".join("?" * len(names))})')
+
+
+TABLES: Dict[str, _Table] = {table.name: table for table in (
+    _Table('clients', ClientModel, {
+        'email': _text, 'status': _text, 'type': _text, 'group_id': parse_int,
+        'country': _text, 'currency': _text, 'balance': _real,
+        'created_at': _timestamp, 'updated_at': _timestamp,
+    }, [('status',), ('email',)]),
+    _Table('orders', OrderModel, {
+        'client_id': parse_int, 'product_id': parse_int, 'status': _text, 'period': _text,
+        'total': _real, 'currency': _text, 'expires_at': _timestamp,
+        'created_at': _timestamp, 'updated_at': _timestamp,
+    }, [('client_id', 'status'), ('status', 'expires_at')]),
+    _Table('services', ServiceModel, {
+        'order_id': parse_int, 'client_id': parse_int, 'product_id': parse_int,
+        'type': _text, 'status': _text, 'expires_at': _timestamp,
+        'created_at': _timestamp, 'updated_at': _timestamp,
+    }, [('client_id', 'status'), ('status', 'expires_at'), ('order_id',)]),
+    _Table('invoices', InvoiceModel, {
+        'client_id': parse_int, 'status': _text, 'currency': _text, 'total': _real,
+        'due_at': _timestamp, 'paid_at': _timestamp,
+        'created_at': _timestamp, 'updated_at': _timestamp,
+    }, [('client_id', 'status'), ('status', 'due_at')]),
+)}
+
+_OPERATORS = {
+    'eq': '=', 'ne': '!=', 'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>=', 'like': 'LIKE',
+}
+
+
+def _sql_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, datetime.date):
+        return value.strftime('%Y-%m-%d')
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+class _MirrorState(SyncState):
+    """Sync state kept in the mirror database: marks in a table, hashes per row."""
+
+    def __init__(self, mirror: 'Mirror'):
+        self.mirror = mirror
+        super().__init__()
+        self.load()
+
+    def load(self) -> None:
+        conn = self.mirror._connection()
+        marks = dict(conn.execute('SELECT entity, mark FROM sync_marks'))
+        self.entities = {
+            name: {
+                'mark': marks.get(name),
+                'hashes': {str(row_id): digest for row_id, digest in
+                           conn.execute(f'SELECT id, hash FROM {name}')},
+            }
+            for name in TABLES
+        }
+
+    def save(self) -> None:
+        conn = self.mirror._connection()
+        conn.executemany(
+            'INSERT OR REPLACE INTO sync_marks (entity, mark) VALUES (?, ?)',
+            [(name, state['mark']) for name, state in self.entities.items()]
+        )
+        conn.commit()
+
+
+class Mirror:
+    """
+    Indexed local copy of clients, orders, services and invoices.
+
+    Records are stored whole (as JSON) next to indexed columns for the
+    fields support tooling usually filters on: IDs, statuses, currencies,
+    totals and dates. Query results are record dictionaries, or models with
+    ``typed=True``, exactly as the resources return them.
+
+    Connections are opened per thread, so a mirror can be queried from
+    several threads while another one refreshes it.
+
+    Args:
+        path: Path to the SQLite database file (created if missing)
+        client: :class:`~fossbilling.Client` used by :meth:`refresh`
+
+    Example:
+        mirror = Mirror('billing.db', client)
+        mirror.refresh()
+        suspended = mirror.find('services', client_id=42, status='suspended')
+        overdue = mirror.overdue_invoices(days=30)
+    """
+
+    def __init__(self, path: Union[str, 'os.PathLike[str]'], client: Any = None):
+        self.path = os.fspath(path)
+        self.client = client
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS sync_marks (entity TEXT PRIMARY KEY, mark TEXT)')
+            for table in TABLES.values():
+                table.create(conn)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def refresh(self, entities: Optional[Iterable[Union[str, SyncSpec]]] = None,
+                full: bool = False, per_page: int = DEFAULT_PER_PAGE) -> Dict[str, Dict[str, Any]]:
+        """
+        Bring the mirror up to date with the billing server.
+
+        Only records that changed since the last refresh are written. Each
+        entity is committed in one transaction once its listing is done.
+
+        Args:
+            entities: Entity names or :class:`~fossbilling.sync.SyncSpec`
+                instances to refresh (default: all four)
+            full: Read every listing completely, which also removes records
+                deleted on the server
+            per_page: Page size used for the listings
+
+        Returns:
+            Per-entity counters (fetched, created, updated, deleted)
+        """
+        if self.client is None:
+            raise ValueError("Mirror.refresh() requires a client")
+        specs = [spec if isinstance(spec, SyncSpec) else SyncSpec(spec)
+                 for spec in (entities if entities is not None else TABLES)]
+        unknown = [spec.name for spec in specs if spec.name not in TABLES]
+        if unknown:
+            raise ValueError(f"Cannot mirror {', '.join(unknown)}; expected: {', '.join(TABLES)}")
+
+        conn = self._connection()
+        state = _MirrorState(self)
+        sync = IncrementalSync(self.client, specs, state=state, per_page=per_page)
+        try:
+            for change in sync.run(full=full):
+                table = TABLES[change.entity]
+                if change.kind == DELETED:
+                    conn.execute(f'DELETE FROM {table.name} WHERE id = ?', (change.id,))
+                else:
+                    digest = state.entity(change.entity)['hashes'].get(str(change.id))
+                    conn.execute(table.upsert_sql(), table.row(change.record, digest))
+        except BaseException:
+            conn.rollback()
+            raise
+        return sync.last_run
+
+    def _table(self, entity: str) -> _Table:
+        try:
+            return TABLES[entity]
+        except KeyError:
+            raise ValueError(f"Unknown entity {entity!r}; expected: {', '.join(TABLES)}") from None
+
+    def _where(self, table: _Table, filters: Dict[str, Any], alias: str) -> Tuple[str, List[Any]]:
+        """Build a WHERE clause from ``column`` / ``column__op`` keyword filters."""
+        clauses = []
+        params: List[Any] = []
+        for key, value in filters.items():
+            column, _, op = key.partition('__')
+            if column != 'id' and column not in table.columns:
+                raise ValueError(f"Cannot filter {table.name} on {column!r}; indexed columns: "
+                                 f"id, {', '.join(table.columns)}")
+            op = op or 'eq'
+            if op == 'in':
+                values = [_sql_value(item) for item in value]
+                clauses.append(f'{alias}.{column} IN ({", ".join("?" * len(values))})'
+                               if values else '0')
+                params.extend(values)
+            elif op == 'isnull':
+                clauses.append(f'{alias}.{column} IS {"" if value else "NOT "}NULL')
+            elif op in _OPERATORS:
+                if value is None and op in ('eq', 'ne'):
+                    clauses.append(f'{alias}.{column} IS {"NOT " if op == "ne" else ""}NULL')
+                else:
+                    clauses.append(f'{alias}.{column} {_OPERATORS[op]} ?')
+                    params.append(_sql_value(value))
+            else:
+                raise ValueError(f"Unknown filter operator {op!r} in {key!r}")
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _record(self, table: _Table, data: str, typed: bool) -> Any:
+        record = json.loads(data)
+        return table.model(record) if typed else record
+
+    def find(self, entity: str, order_by: Optional[str] = None, limit: Optional[int] = None,
+             typed: bool = False, with_client: bool = False, **filters) -> List[Any]:
+        """
+        Query mirrored records with filters on the indexed columns.
+
+        Filters are keyword arguments named after a column, optionally with
+        an operator suffix: ``__ne``, ``__lt``, ``__lte``, ``__gt``,
+        ``__gte``, ``__in``, ``__like`` or ``__isnull``. Dates may be given
+        as ``datetime`` objects.
+
+        Args:
+            entity: ``'clients'``, ``'orders'``, ``'services'`` or ``'invoices'``
+            order_by: Column to sort by; prefix with ``-`` for descending
+            limit: Maximum number of records
+            typed: Return models instead of dictionaries
+            with_client: Attach the owning client record under the
+                ``'client'`` key (orders, services and invoices only)
+            **filters: Column filters, e.g. ``status='unpaid', due_at__lt=cutoff``
+
+        Returns:
+            Matching records
+        """
+        table = self._table(entity)
+        where, params = self._where(table, filters, 't')
+        if with_client and 'client_id' not in table.columns:
+            raise ValueError(f"{entity} records have no client to join")
+
+        columns = 't.data, c.data' if with_client else 't.data'
+        join = ' LEFT JOIN clients c ON c.id = t.client_id' if with_client else ''
+        query = f'SELECT {columns} FROM {table.name} t{join}{where}'
+        if order_by:
+            column = order_by.lstrip('-')
+            if column != 'id' and column not in table.columns:
+                raise ValueError(f"Cannot order {entity} by {column!r}")
+            query += f' ORDER BY t.{column} {"DESC" if order_by.startswith("-") else "ASC"}'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(int(limit))
+
+        results = []
+        for row in self._connection().execute(query, params):
+            record = self._record(table, row[0], False)
+            if with_client:
+                record['client'] = json.loads(row[1]) if row[1] is not None else None
+            results.append(table.model(record) if typed else record)
+        return results
+
+    def get(self, entity: str, record_id: int, typed: bool = False) -> Optional[Any]:
+        """Return one mirrored record by ID, or None if it is not mirrored."""
+        table = self._table(entity)
+        row = self._connection().execute(
+            f'SELECT data FROM {table.name} WHERE id = ?', (record_id,)
+        ).fetchone()
+        return self._record(table, row[0], typed) if row is not None else None
+
+    def count(self, entity: str, **filters) -> int:
+        """Count mirrored records matching the filters, as for :meth:`find`."""
+        table = self._table(entity)
+        where, params = self._where(table, filters, 't')
+        return self._connection().execute(
+            f'SELECT COUNT(*) FROM {table.name} t{where}', params
+        ).fetchone()[0]
+
+    def overdue_invoices(self, days: int = 0, client_id: Optional[int] = None,
+                         typed: bool = False) -> List[Any]:
+        """
+        Return unpaid invoices that have been due for more than ``days`` days,
+        oldest first.
+        """
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=days)
+        filters: Dict[str, Any] = {'status': 'unpaid', 'due_at__lt': cutoff}
+        if client_id is not None:
+            filters['client_id'] = client_id
+        return self.find('invoices', order_by='due_at', typed=typed, **filters)
+
+    def client_overview(self, client_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Return a client with its orders, services and invoices, or None if
+        the client is not mirrored.
+        """
+        client = self.get('clients', client_id)
+        if client is None:
+            return None
+        return {
+            'client': client,
+            'orders': self.find('orders', client_id=client_id, order_by='-id'),
+            'services': self.find('services', client_id=client_id, order_by='-id'),
+            'invoices': self.find('invoices', client_id=client_id, order_by='-id'),
+        }
+
+    def sql(self, query: str, params: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """
+        Run a read-only SQL query against the mirror and return rows as
+        dictionaries.
+
+        Tables are ``clients``, ``orders``, ``services`` and ``invoices``,
+        each with an ``id``, its indexed columns and the full record as JSON
+        in ``data`` (usable with SQLite's ``json_extract``).
+
+        Raises:
+            sqlite3.OperationalError: If the query tries to change the database
+        """
+        conn = self._connection()
+        conn.execute('PRAGMA query_only=ON')
+        try:
+            cursor = conn.execute(query, [_sql_value(param) for param in params])
+            names = [column[0] for column in cursor.description or ()]
+            return [dict(zip(names, row)) for row in cursor]
+        finally:
+            conn.execute('PRAGMA query_only=OFF')
+
+    def __enter__(self) -> 'Mirror':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Refresh a mirror database from the command line."""
+    import argparse
+
+    from .client import Client
+
+    parser = argparse.ArgumentParser(prog='python -m fossbilling mirror',
+                                     description='Refresh a local SQLite mirror of FOSSBilling data.')
+    parser.add_argument('database', help='Path to the mirror database')
+    parser.add_argument('--url', default=os.environ.get('FOSSBILLING_URL'),
+                        help='FOSSBilling base URL (default: $FOSSBILLING_URL)')
+    parser.add_argument('--api-key', default=os.environ.get('FOSSBILLING_API_KEY'),
+                        help='API key (default: $FOSSBILLING_API_KEY)')
+    parser.add_argument('--entity', action='append', choices=list(TABLES),
+                        help='Entity to refresh; repeat for several (default: all)')
+    parser.add_argument('--full', action='store_true',
+                        help='Read every listing completely and drop deleted records')
+    parser.add_argument('--per-page', type=int, default=DEFAULT_PER_PAGE)
+    args = parser.parse_args(argv)
+    if not args.url or not args.api_key:
+        parser.error('--url and --api-key (or FOSSBILLING_URL and FOSSBILLING_API_KEY) are required')
+
+    with Mirror(args.database, Client(args.url, args.api_key)) as mirror:
+        stats = mirror.refresh(args.entity, full=args.full, per_page=args.per_page)
+    for entity, counts in stats.items():
+        print(f"{entity}: {counts['fetched']} fetched, {counts['created']} created, "
+              f"{counts['updated']} updated, {counts['deleted']} deleted")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Pagination helpers for FOSSBilling list endpoints.
+
+List endpoints return one page at a time as a dictionary with a ``list`` field
+and paging metadata (``page``, ``per_page``, ``pages``, ``total``). The helpers
+here walk every page and yield individual records, so callers never hold more
+than a couple of pages in memory.
+"""
+import math
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, List, Optional
+)
+
+DEFAULT_PER_PAGE = 100
+
+PageFetcher = Callable[[int], Dict[str, Any]]
+AsyncPageFetcher = Callable[[int], Awaitable[Dict[str, Any]]]
+
+
+def _has_next_page(response: Dict[str, Any], page: int, per_page: int) -> bool:
+    """Decide whether another page follows ``page``."""
+    items = response.get('list') or []
+    if not items:
+        return False
+    pages = response.get('pages')
+    if pages is not None:
+        return page < int(pages)
+    # Without paging metadata, a full page means there may be more.
+    return len(items) >= per_page
+
+
+def iter_records(fetch_page: PageFetcher, per_page: int = DEFAULT_PER_PAGE,
+                 max_items: Optional[int] = None, prefetch: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every record from a paginated list endpoint.
+
+    While the caller consumes page N, page N+1 is already being fetched on a
+    background thread, so network latency overlaps with processing. At most
+    two pages are held in memory at any time.
+
+    Args:
+        fetch_page: Callable taking a 1-based page number and returning the
+            raw list response for that page
+        per_page: Number of records requested per page
+        max_items: Stop after yielding this many records (default: no limit)
+        prefetch: Fetch the next page in the background (default: True)
+
+    Yields:
+        Record dictionaries, in the order the API returns them
+    """
+    if max_items is not None and max_items <= 0:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    pending = executor.submit(fetch_page, 1) if executor else None
+    page = 1
+    count = 0
+
+    try:
+        while True:
+            response = pending.result() if pending else fetch_page(page)
+            pending = None
+            items: List[Dict[str, Any]] = response.get('list') or []
+
+            remaining = None if max_items is None else max_items - count
+            has_next = _has_next_page(response, page, per_page) and (
+                remaining is None or len(items) < remaining
+            )
+            if has_next and executor:
+                pending = executor.submit(fetch_page, page + 1)
+
+            batch = items if remaining is None else items[:remaining]
+            yield from batch
+            count += len(batch)
+            # Drop the references so the page can be freed while the next one loads.
+            del items, batch, response
+
+            if not has_next:
+                return
+            page += 1
+    finally:
+        if pending:
+            pending.cancel()
+        if executor:
+            executor.shutdown(wait=False)
+
+
+def iter_records_parallel(fetch_page: PageFetcher, per_page: int = DEFAULT_PER_PAGE,
+                          max_items: Optional[int] = None, workers: int = 4,
+                          ordered: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every record from a paginated list endpoint, fetching pages concurrently.
+
+    The first page is fetched to learn the total page count; the remaining
+    pages are then fetched by a bounded pool of ``workers`` threads. At most
+    ``workers`` pages are in flight or buffered at any time, so memory stays
+    bounded. When the endpoint does not report a page count, this falls back
+    to :func:`iter_records`.
+
+    The threads call ``fetch_page`` concurrently; with a
+    :class:`~fossbilling.Client` they share its session and connection pool,
+    so keep ``workers`` within the pool size.
+
+    Args:
+        fetch_page: Callable taking a 1-based page number and returning the
+            raw list response for that page
+        per_page: Number of records requested per page
+        max_items: Stop after yielding this many records (default: no limit)
+        workers: Maximum number of pages fetched concurrently
+        ordered: Yield records in page order (default: True). When False,
+            pages are yielded as soon as they arrive.
+
+    Yields:
+        Record dictionaries
+    """
+    if max_items is not None and max_items <= 0:
+        return
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    first = fetch_page(1)
+    if first.get('pages') is None:
+        cached = {1: first}
+        del first
+
+        def fetch_cached(page: int) -> Dict[str, Any]:
+            return cached.pop(page) if page in cached else fetch_page(page)
+
+        yield from iter_records(fetch_cached, per_page=per_page, max_items=max_items)
+        return
+
+    last_page = int(first['pages'])
+    if max_items is not None:
+        last_page = min(last_page, math.ceil(max_items / per_page))
+
+    count = 0
+    for item in (first.get('list') or [])[:max_items]:
+        yield item
+        count += 1
+    del first
+
+    next_pages = iter(range(2, last_page + 1))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    in_flight: Deque[Future] = deque()
+
+    def submit_next() -> bool:
+        page = next(next_pages, None)
+        if page is None:
+            return False
+        in_flight.append(executor.submit(fetch_page, page))
+        return True
+
+    try:
+        for _ in range(workers):
+            if not submit_next():
+                break
+
+        while in_flight:
+            if ordered:
+                future = in_flight.popleft()
+                response = future.result()
+            else:
+                done, _ = wait(set(in_flight), return_when=FIRST_COMPLETED)
+                future = done.pop()
+                in_flight.remove(future)
+                response = future.result()
+            submit_next()
+
+            for item in response.get('list') or []:
+                if max_items is not None and count >= max_items:
+                    return
+                yield item
+                count += 1
+            del response
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+async def aiter_records(fetch_page: AsyncPageFetcher, per_page: int = DEFAULT_PER_PAGE,
+                        max_items: Optional[int] = None,
+                        prefetch: bool = True) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async counterpart of :func:`iter_records`.
+
+    The next page is fetched in a background task while the current page is
+    being consumed.
+    """
+    import asyncio
+
+    if max_items is not None and max_items <= 0:
+        return
+
+    pending = asyncio.ensure_future(fetch_page(1)) if prefetch else None
+    page = 1
+    count = 0
+
+    try:
+        while True:
+            response = await pending if pending else await fetch_page(page)
+            pending = None
+            items: List[Dict[str, Any]] = response.get('list') or []
+
+            remaining = None if max_items is None else max_items - count
+            has_next = _has_next_page(response, page, per_page) and (
+                remaining is None or len(items) < remaining
+            )
+            if has_next and prefetch:
+                pending = asyncio.ensure_future(fetch_page(page + 1))
+
+            batch = items if remaining is None else items[:remaining]
+            for item in batch:
+                yield item
+            count += len(batch)
+            del items, batch, response
+
+            if not has_next:
+                return
+            page += 1
+    finally:
+        if pending:
+            pending.cancel()
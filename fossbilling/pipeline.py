@@ -0,0 +1,323 @@
+"""
+Resumable, bounded-concurrency pipelines for large batches of writes.
+
+A pipeline feeds items from any iterable (a list, a generator, a
+``csv.DictReader``...) through a function with at most ``max_workers`` calls
+running and ``max_pending`` items buffered, so the input is consumed only as
+fast as the API accepts it.
+
+With a checkpoint file, every item is journaled before and after its call.
+A run that crashes halfway can then be restarted with the same input: items
+that completed are skipped, and items whose outcome is unknown (the process
+died while the request was in flight) are reported instead of being sent
+again, so nothing is created twice.
+"""
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union,
+)
+
+from .bulk import DEFAULT_MAX_WORKERS, BulkResult
+from .exceptions import APIError, FOSSBillingException
+from .sync import record_hash
+
+STARTED = 'started'
+DONE = 'done'
+FAILED = 'failed'
+
+KeyFunc = Callable[[int, Any], str]
+
+
+def default_key(index: int, item: Any) -> str:
+    """
+    Identify an item by its position in the input and a hash of its content.
+
+    Resuming with the same input in the same order maps every item to its
+    journal entry; pass a ``key`` function based on an external reference
+    when the input order may change between runs.
+    """
+    content = item if isinstance(item, dict) else {'item': item}
+    return f"{index}:{record_hash(content)}"
+
+
+def is_definitive(error: BaseException) -> bool:
+    """
+    Return True if a failed call certainly had no effect on the server.
+
+    Client-side errors and 4xx responses are definitive. Connection errors,
+    timeouts and 5xx responses are not: the server may have processed the
+    request before the failure.
+    """
+    if not isinstance(error, FOSSBillingException):
+        return True
+    if isinstance(error, APIError):
+        return error.code is not None and error.code < 500
+    return True
+
+
+class Checkpoint:
+    """
+    Append-only journal of pipeline progress, one JSON object per line.
+
+    Args:
+        path: Journal file; created if missing, appended to otherwise
+        durable: ``fsync`` every entry, so progress also survives a power
+            loss and not only a process crash (default: False)
+    """
+
+    def __init__(self, path: Union[str, 'os.PathLike[str]'], durable: bool = False):
+        self.path = os.fspath(path)
+        self.durable = durable
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            self._load()
+        self._fh = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        with open(self.path, encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write.
+                    continue
+                self.entries[entry['key']] = entry
+
+    def status(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the last journal entry for ``key``, or None if it never started."""
+        return self.entries.get(key)
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self.entries[entry['key']] = entry
+        self._fh.write(json.dumps(entry, separators=(',', ':'), default=str) + '\n')
+        self._fh.flush()
+        if self.durable:
+            os.fsync(self._fh.fileno())
+
+    def started(self, key: str) -> None:
+        """Record that the call for ``key`` is about to be sent."""
+        self._write({'key': key, 'status': STARTED})
+
+    def done(self, key: str, result: Any) -> None:
+        """Record a successful call and its result."""
+        self._write({'key': key, 'status': DONE, 'result': result})
+
+    def failed(self, key: str, error: BaseException) -> None:
+        """Record a failed call, and whether it may have taken effect."""
+        self._write({'key': key, 'status': FAILED, 'error': f"{type(error).__name__}: {error}",
+                     'definitive': is_definitive(error)})
+
+    def close(self) -> None:
+        """Close the journal file."""
+        self._fh.close()
+
+    def __enter__(self) -> 'Checkpoint':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class PipelineResult(BulkResult):
+    """
+    Outcome of a pipeline run, keyed by item key.
+
+    Attributes:
+        results: Mapping of key to the result of each call made in this run
+        errors: Mapping of key to the exception raised by each failed call
+        skipped: Mapping of key to the journaled result of each item that
+            completed in an earlier run
+        in_doubt: Keys of items whose earlier call may or may not have taken
+            effect; they were not sent again
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.skipped: Dict[str, Any] = {}
+        self.in_doubt: List[str] = []
+
+    @property
+    def ok(self) -> bool:
+        """True if every item succeeded, now or in an earlier run."""
+        return not self.errors and not self.in_doubt
+
+    def __repr__(self) -> str:
+        return (f"<PipelineResult succeeded={len(self.results)} failed={len(self.errors)} "
+                f"skipped={len(self.skipped)} in_doubt={len(self.in_doubt)}>")
+
+
+class _Planner:
+    """Decides which items still need a call, recording the rest in the result."""
+
+    def __init__(self, key: KeyFunc, checkpoint: Optional[Checkpoint], retry_in_doubt: bool,
+                 result: PipelineResult):
+        self.key = key
+        self.checkpoint = checkpoint
+        self.retry_in_doubt = retry_in_doubt
+        self.result = result
+        self.seen: Set[str] = set()
+
+    def check(self, index: int, item: Any) -> Optional[str]:
+        """Return the item's key if it needs a call, or None to skip it."""
+        item_key = self.key(index, item)
+        if item_key in self.seen:
+            return None
+        self.seen.add(item_key)
+        entry = self.checkpoint.status(item_key) if self.checkpoint is not None else None
+        if entry is not None:
+            if entry['status'] == DONE:
+                self.result.skipped[item_key] = entry.get('result')
+                return None
+            definitive = entry['status'] == FAILED and entry.get('definitive')
+            if not definitive and not self.retry_in_doubt:
+                self.result.in_doubt.append(item_key)
+                return None
+        return item_key
+
+
+def _record(checkpoint: Optional[Checkpoint], result: PipelineResult, item_key: str,
+            outcome: Any, error: Optional[BaseException]) -> None:
+    if error is None:
+        result.results[item_key] = outcome
+        if checkpoint is not None:
+            checkpoint.done(item_key, outcome)
+    else:
+        result.errors[item_key] = error
+        if checkpoint is not None:
+            checkpoint.failed(item_key, error)
+
+
+def _open_checkpoint(checkpoint: Optional[Union[Checkpoint, str, 'os.PathLike[str]']],
+                     durable: bool) -> Tuple[Optional[Checkpoint], bool]:
+    """Return the checkpoint and whether the pipeline opened (and must close) it."""
+    if checkpoint is None or isinstance(checkpoint, Checkpoint):
+        return checkpoint, False
+    return Checkpoint(checkpoint, durable=durable), True
+
+
+def run_pipeline(func: Callable[[Any], Any], items: Iterable[Any],
+                 key: KeyFunc = default_key,
+                 checkpoint: Optional[Union[Checkpoint, str, 'os.PathLike[str]']] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS, max_pending: Optional[int] = None,
+                 retry_in_doubt: bool = False, durable: bool = False) -> PipelineResult:
+    """
+    Call ``func(item)`` for every item with bounded concurrency and an
+    optional resumable checkpoint.
+
+    Items are read from ``items`` only when there is room for them, so
+    arbitrarily large streams run in constant memory (apart from the result).
+    Items with the same key are called once.
+
+    Args:
+        func: Callable applied to each item; its return value is journaled,
+            so it should be JSON-compatible
+        items: Iterable of items, consumed lazily
+        key: ``key(index, item)`` returning a stable, unique string per item
+            (default: :func:`default_key`)
+        checkpoint: A :class:`Checkpoint` or a path to its journal file
+        max_workers: Maximum number of calls in flight
+        max_pending: Maximum number of items submitted but not yet finished
+            (default: twice ``max_workers``)
+        retry_in_doubt: Send items whose earlier outcome is unknown again.
+            Only enable this when repeating a call is harmless.
+        durable: ``fsync`` the checkpoint after every entry
+
+    Returns:
+        A :class:`PipelineResult`
+    """
+    max_pending = max(max_pending or 2 * max_workers, max_workers)
+    journal, owned = _open_checkpoint(checkpoint, durable)
+    result = PipelineResult()
+    planner = _Planner(key, journal, retry_in_doubt, result)
+    pending: Dict[Future, str] = {}
+
+    def collect(futures: Iterable[Future]) -> None:
+        for future in futures:
+            item_key = pending.pop(future)
+            # A cancelled item was never sent, so it is safe to run on resume.
+            error = CancelledError() if future.cancelled() else future.exception()
+            _record(journal, result, item_key, None if error else future.result(), error)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                for index, item in enumerate(items):
+                    item_key = planner.check(index, item)
+                    if item_key is None:
+                        continue
+                    if len(pending) >= max_pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    if journal is not None:
+                        journal.started(item_key)
+                    pending[executor.submit(func, item)] = item_key
+                collect(wait(pending).done)
+            except BaseException:
+                # Let calls already sent finish and be journaled, but start no more.
+                for future in pending:
+                    future.cancel()
+                collect(wait(pending).done)
+                raise
+    finally:
+        if owned:
+            journal.close()
+    return result
+
+
+async def arun_pipeline(func: Callable[[Any], Awaitable[Any]],
+                        items: Union[Iterable[Any], AsyncIterable[Any]],
+                        key: KeyFunc = default_key,
+                        checkpoint: Optional[Union[Checkpoint, str, 'os.PathLike[str]']] = None,
+                        max_workers: int = DEFAULT_MAX_WORKERS,
+                        retry_in_doubt: bool = False, durable: bool = False) -> PipelineResult:
+    """
+    Async counterpart of :func:`run_pipeline`.
+
+    ``items`` may also be an async iterable. At most ``max_workers`` calls
+    are awaited concurrently, and no more items are read until one finishes.
+    """
+    import asyncio
+
+    journal, owned = _open_checkpoint(checkpoint, durable)
+    result = PipelineResult()
+    planner = _Planner(key, journal, retry_in_doubt, result)
+    pending: Dict['asyncio.Future[Any]', str] = {}
+
+    def collect(tasks: Iterable['asyncio.Future[Any]']) -> None:
+        for task in tasks:
+            item_key = pending.pop(task)
+            # A cancelled task may already have sent its request.
+            error = APIError("Request cancelled") if task.cancelled() else task.exception()
+            _record(journal, result, item_key, None if error else task.result(), error)
+
+    async def submit(index: int, item: Any) -> None:
+        item_key = planner.check(index, item)
+        if item_key is None:
+            return
+        if len(pending) >= max_workers:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            collect(done)
+        if journal is not None:
+            journal.started(item_key)
+        pending[asyncio.ensure_future(func(item))] = item_key
+
+    try:
+        try:
+            if hasattr(items, '__aiter__'):
+                index = 0
+                async for item in items:  # type: ignore[union-attr]
+                    await submit(index, item)
+                    index += 1
+            else:
+                for index, item in enumerate(items):  # type: ignore[arg-type]
+                    await submit(index, item)
+        finally:
+            # Calls already sent are always awaited and journaled.
+            if pending:
+                collect((await asyncio.wait(pending))[0])
+    finally:
+        if owned:
+            journal.close()
+    return result
@@ -0,0 +1,362 @@
+"""
+Fan-out over many FOSSBilling installations.
+
+A client pool holds one configured client per installation, under a name
+(a brand, a region...), and runs the same call on every installation
+concurrently. The total time tracks the slowest installation rather than the
+sum of all of them, a slow or failing installation never stops the others,
+and results can be consumed as they arrive.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Union,
+)
+
+from .bulk import BulkResult
+
+#: A call to make on every client: a callable taking the client as its first
+#: argument, or the dotted name of a client method such as ``'system.stats'``
+Call = Union[str, Callable[..., Any]]
+
+
+def _invoke(client: Any, call: Call, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    if callable(call):
+        return call(client, *args, **kwargs)
+    target = client
+    for part in call.split('.'):
+        target = getattr(target, part)
+    return target(*args, **kwargs)
+
+
+def _timeout_error(name: str, timeout: Optional[float]) -> TimeoutError:
+    return TimeoutError(f"Instance {name!r} did not respond within {timeout} seconds")
+
+
+class InstanceResult:
+    """
+    Outcome of a call on one installation.
+
+    Attributes:
+        name: Name of the installation in the pool
+        result: Return value of the call, or None if it failed
+        error: Exception raised by the call (a ``TimeoutError`` if it did not
+            finish in time), or None if it succeeded
+        elapsed: Seconds the call took, or waited for before it timed out
+    """
+
+    __slots__ = ('name', 'result', 'error', 'elapsed')
+
+    def __init__(self, name: str, result: Any = None, error: Optional[Exception] = None,
+                 elapsed: float = 0.0):
+        self.name = name
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """True if the call succeeded."""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        outcome = 'ok' if self.error is None else type(self.error).__name__
+        return f"<InstanceResult {self.name!r} {outcome} elapsed={self.elapsed:.3f}s>"
+
+
+class PoolResult(BulkResult):
+    """
+    Outcome of a call on every installation of a pool, keyed by name.
+
+    Attributes:
+        results: Mapping of name to the return value of each successful call
+        errors: Mapping of name to the exception raised by each failed call
+        elapsed: Mapping of name to the seconds each call took
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.elapsed: Dict[str, float] = {}
+
+    @property
+    def timed_out(self) -> List[str]:
+        """Names of the installations that did not respond in time."""
+        return [name for name, error in self.errors.items() if isinstance(error, TimeoutError)]
+
+    def add(self, outcome: InstanceResult) -> None:
+        """Record the outcome of one installation."""
+        if outcome.error is None:
+            self.results[outcome.name] = outcome.result
+        else:
+            self.errors[outcome.name] = outcome.error
+        self.elapsed[outcome.name] = outcome.elapsed
+
+    def __repr__(self) -> str:
+        return (f"<PoolResult succeeded={len(self.results)} failed={len(self.errors)} "
+                f"timed_out={len(self.timed_out)}>")
+
+
+class _BasePool:
+    """Registry of named clients shared by the sync and async pools."""
+
+    def __init__(self, clients: Optional[Mapping[str, Any]] = None,
+                 timeout: Optional[float] = None):
+        self.clients: Dict[str, Any] = dict(clients or {})
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, instances: Mapping[str, Mapping[str, Any]],
+                    timeout: Optional[float] = None, **client_options: Any) -> Any:
+        """
+        Build a pool from per-installation client settings.
+
+        Args:
+            instances: Mapping of name to keyword arguments of the client,
+                at least ``base_url`` and ``api_key``
+            timeout: Default per-installation timeout of the pool's calls
+            **client_options: Settings shared by every client, overridden by
+                the per-installation ones
+
+        Example:
+            pool = ClientPool.from_config({
+                'eu': {'base_url': 'https://billing.example.eu/', 'api_key': eu_key},
+                'us': {'base_url': 'https://billing.example.com/', 'api_key': us_key},
+            }, timeout=10, retry_policy=RetryPolicy())
+        """
+        clients = {name: cls._new_client(**{**client_options, **options})
+                   for name, options in instances.items()}
+        return cls(clients, timeout=timeout)
+
+    @staticmethod
+    def _new_client(**options: Any) -> Any:
+        raise NotImplementedError
+
+    def add(self, name: str, client: Any) -> None:
+        """Add a client, replacing any client with the same name."""
+        self.clients[name] = client
+
+    def remove(self, name: str) -> Any:
+        """Remove a client from the pool and return it."""
+        return self.clients.pop(name)
+
+    def _select(self, names: Optional[Iterable[str]]) -> Dict[str, Any]:
+        if names is None:
+            return dict(self.clients)
+        return {name: self.clients[name] for name in names}
+
+    def __getitem__(self, name: str) -> Any:
+        return self.clients[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.clients
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.clients)
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} instances={len(self.clients)}>"
+
+
+class ClientPool(_BasePool):
+    """
+    Many :class:`~fossbilling.Client` instances, one per installation.
+
+    Calls run on a thread per installation (up to ``max_workers``), so every
+    installation is queried at the same time.
+
+    Args:
+        clients: Mapping of name to client
+        timeout: Default seconds to wait for each installation, counted from
+            the start of a call (default: no limit beyond each client's own
+            request timeout)
+        max_workers: Maximum number of installations queried at once
+            (default: all of them). Queued installations use up their
+            timeout while they wait.
+
+    Example:
+        pool = ClientPool({'eu': eu_client, 'us': us_client}, timeout=10)
+        for outcome in pool.stream('invoices.list', status='unpaid'):
+            if outcome.ok:
+                print(outcome.name, len(outcome.result))
+            else:
+                print(outcome.name, 'failed:', outcome.error)
+    """
+
+    def __init__(self, clients: Optional[Mapping[str, Any]] = None,
+                 timeout: Optional[float] = None, max_workers: Optional[int] = None):
+        super().__init__(clients, timeout)
+        self.max_workers = max_workers
+
+    @staticmethod
+    def _new_client(**options: Any) -> Any:
+        from .client import Client
+        return Client(**options)
+
+    @staticmethod
+    def _run(name: str, client: Any, call: Call, args: tuple,
+             kwargs: Dict[str, Any]) -> InstanceResult:
+        started = time.perf_counter()
+        try:
+            result = _invoke(client, call, args, kwargs)
+        except Exception as e:
+            return InstanceResult(name, error=e, elapsed=time.perf_counter() - started)
+        return InstanceResult(name, result, elapsed=time.perf_counter() - started)
+
+    def stream(self, call: Call, *args: Any, timeout: Optional[float] = None,
+               names: Optional[Iterable[str]] = None, **kwargs: Any) -> Iterator[InstanceResult]:
+        """
+        Run a call on every installation and yield outcomes as they arrive.
+
+        Installations that have not answered when the timeout expires are
+        yielded last, with a ``TimeoutError``. Their requests are abandoned,
+        not interrupted: they end when the client's own request timeout
+        does.
+
+        Args:
+            call: A callable taking the client as its first argument, or the
+                dotted name of a client method, e.g. ``'system.stats'``
+            *args: Positional arguments passed to the call
+            timeout: Seconds to wait for each installation (default: the
+                pool's ``timeout``)
+            names: Only query these installations (default: all)
+            **kwargs: Keyword arguments passed to the call
+
+        Yields:
+            An :class:`InstanceResult` per installation
+        """
+        selected = self._select(names)
+        if not selected:
+            return
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        deadline = None if timeout is None else started + timeout
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers or len(selected),
+                                                      len(selected)))
+        pending: Dict[Future, str] = {}
+        try:
+            for name, client in selected.items():
+                pending[executor.submit(self._run, name, client, call, args, kwargs)] = name
+            while pending:
+                remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    del pending[future]
+                    yield future.result()
+            for name in list(pending.values()):
+                yield InstanceResult(name, error=_timeout_error(name, timeout),
+                                     elapsed=time.perf_counter() - started)
+        finally:
+            for future in pending:
+                future.cancel()
+            # Never wait for abandoned calls.
+            executor.shutdown(wait=False)
+
+    def call(self, call: Call, *args: Any, timeout: Optional[float] = None,
+             names: Optional[Iterable[str]] = None, **kwargs: Any) -> PoolResult:
+        """
+        Run a call on every installation and wait for all of them.
+
+        Takes the same arguments as :meth:`stream`.
+
+        Returns:
+            A :class:`PoolResult`, in the pool's order
+        """
+        if names is not None:
+            names = list(names)
+        outcomes = {outcome.name: outcome
+                    for outcome in self.stream(call, *args, timeout=timeout, names=names,
+                                               **kwargs)}
+        result = PoolResult()
+        for name in self._select(names):
+            result.add(outcomes[name])
+        return result
+
+    def close(self) -> None:
+        """Close the HTTP sessions of every client."""
+        for client in self.clients.values():
+            client.close()
+
+    def __enter__(self) -> 'ClientPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class AsyncClientPool(_BasePool):
+    """
+    Many :class:`~fossbilling.AsyncClient` instances, one per installation.
+
+    Async counterpart of :class:`ClientPool`. Calls still running when the
+    timeout expires are cancelled.
+
+    Args:
+        clients: Mapping of name to async client
+        timeout: Default seconds to wait for each installation (default: no
+            limit beyond each client's own request timeout)
+    """
+
+    @staticmethod
+    def _new_client(**options: Any) -> Any:
+        from .async_client import AsyncClient
+        return AsyncClient(**options)
+
+    @staticmethod
+    async def _run(name: str, client: Any, call: Call, args: tuple, kwargs: Dict[str, Any],
+                   timeout: Optional[float]) -> InstanceResult:
+        import asyncio
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(_invoke(client, call, args, kwargs), timeout)
+        except asyncio.TimeoutError:
+            return InstanceResult(name, error=_timeout_error(name, timeout),
+                                  elapsed=time.perf_counter() - started)
+        except Exception as e:
+            return InstanceResult(name, error=e, elapsed=time.perf_counter() - started)
+        return InstanceResult(name, result, elapsed=time.perf_counter() - started)
+
+    async def stream(self, call: Call, *args: Any, timeout: Optional[float] = None,
+                     names: Optional[Iterable[str]] = None,
+                     **kwargs: Any) -> AsyncIterator[InstanceResult]:
+        """Async counterpart of :meth:`ClientPool.stream`; ``call`` must return an awaitable."""
+        import asyncio
+
+        timeout = self.timeout if timeout is None else timeout
+        tasks = [asyncio.ensure_future(self._run(name, client, call, args, kwargs, timeout))
+                 for name, client in self._select(names).items()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, call: Call, *args: Any, timeout: Optional[float] = None,
+                   names: Optional[Iterable[str]] = None, **kwargs: Any) -> PoolResult:
+        """Async counterpart of :meth:`ClientPool.call`."""
+        if names is not None:
+            names = list(names)
+        outcomes = {}
+        async for outcome in self.stream(call, *args, timeout=timeout, names=names, **kwargs):
+            outcomes[outcome.name] = outcome
+        result = PoolResult()
+        for name in self._select(names):
+            result.add(outcomes[name])
+        return result
+
+    async def aclose(self) -> None:
+        """Close the HTTP sessions of every client."""
+        for client in self.clients.values():
+            await client.aclose()
+
+    async def __aenter__(self) -> 'AsyncClientPool':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
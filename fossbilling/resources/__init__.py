@@ -1,19 +1,70 @@
 """
 FOSSBilling API resources.
+
+Resource modules are imported on first use, so importing the package (or
+constructing a client) does not load every resource and its dependencies.
 """
+import importlib
+from typing import Any, Dict, List
+
+_MODULES: Dict[str, str] = {
+    'BaseResource': 'base',
+    'ClientResource': 'clients',
+    'InvoiceResource': 'invoices',
+    'OrderResource': 'orders',
+    'ServiceResource': 'services',
+    'SystemResource': 'system',
+    'AsyncBaseResource': 'base',
+    'AsyncClientResource': 'clients',
+    'AsyncInvoiceResource': 'invoices',
+    'AsyncOrderResource': 'orders',
+    'AsyncServiceResource': 'services',
+    'AsyncSystemResource': 'system',
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str) -> Any:
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+class LazyResource:
+    """
+    Client attribute that creates its resource on first access.
+
+    The resource module is imported and the resource instantiated the first
+    time the attribute is read; the instance is then stored on the client,
+    so later reads are plain attribute lookups.
+
+    Args:
+        module: Name of the module in this package defining the resource
+        class_name: Name of the resource class
+    """
+
+    def __init__(self, module: str, class_name: str):
+        self.module = module
+        self.class_name = class_name
+        self.name = module
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
 
-from .base import BaseResource
-from .clients import ClientResource
-from .invoices import InvoiceResource
-from .orders import OrderResource
-from .services import ServiceResource
-from .system import SystemResource
-
-__all__ = [
-    'BaseResource',
-    'ClientResource',
-    'InvoiceResource',
-    'OrderResource',
-    'ServiceResource',
-    'SystemResource',
-]
+    def __get__(self, client: Any, owner: type) -> Any:
+        if client is None:
+            return self
+        resource_class = getattr(importlib.import_module(f'.{self.module}', __name__),
+                                 self.class_name)
+        # Stored in the instance dictionary, which takes precedence over this
+        # non-data descriptor from now on. setdefault keeps concurrent first
+        # accesses from different threads agreeing on one instance.
+        return client.__dict__.setdefault(self.name, resource_class(client))
@@ -1,28 +1,242 @@
 """
 Base resource class for FOSSBilling API resources.
 """
-from typing import Any, Dict, Optional, Union
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Type, Union
+)
 
-class BaseResource:
-    """Base class for all FOSSBilling API resources."""
+from ..bulk import DEFAULT_MAX_WORKERS, BulkResult, arun_bulk, run_bulk
+from ..models import Model
+from ..pagination import DEFAULT_PER_PAGE, aiter_records, iter_records, iter_records_parallel
+
+class _ResourceMixin:
+    """State and helpers shared by the sync and async resource base classes."""
+    
+    #: Model class returned by ``get``/``list``/``iter_all`` when ``typed=True``
+    _model: Optional[Type[Model]] = None
     
     def __init__(self, client):
         """Initialize with a client instance."""
         self._client = client
         self._endpoint = ''
     
+    def _typed(self, data: Dict[str, Any], typed: bool) -> Any:
+        """Wrap a record in the resource's model if ``typed`` is set."""
+        return self._model(data) if typed and self._model is not None else data
+    
+    def _typed_list(self, records: List[Dict[str, Any]], typed: bool) -> List[Any]:
+        """Wrap a list of records in the resource's model if ``typed`` is set."""
+        if typed and self._model is not None:
+            return [self._model(record) for record in records]
+        return records
+
+
+class BaseResource(_ResourceMixin):
+    """Base class for all FOSSBilling API resources."""
+    
     def _get(self, path: str = '', params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a GET request to the resource endpoint."""
         return self._client.get(f"{self._endpoint}/{path}".strip('/'), params=params)
     
-    def _post(self, path: str = '', data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _post(self, path: str = '', data: Optional[Dict[str, Any]] = None,
+              retry: Optional[bool] = None,
+              idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """Make a POST request to the resource endpoint."""
-        return self._client.post(f"{self._endpoint}/{path}".strip('/'), data=data)
+        return self._client.post(f"{self._endpoint}/{path}".strip('/'), data=data, retry=retry,
+                                 idempotency_key=idempotency_key)
     
     def _put(self, path: str = '', data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a PUT request to the resource endpoint."""
         return self._client.put(f"{self._endpoint}/{path}".strip('/'), data=data)
     
-    def _delete(self, path: str = '') -> Dict[str, Any]:
+    def _delete(self, path: str = '', params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a DELETE request to the resource endpoint."""
-        return self._client.delete(f"{self._endpoint}/{path}".strip('/'))
+        return self._client.delete(f"{self._endpoint}/{path}".strip('/'), params=params)
+    
+    def _iter_all(self, path: str = '', params: Optional[Dict[str, Any]] = None,
+                  per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                  prefetch: bool = True, workers: Optional[int] = None,
+                  ordered: bool = True, typed: bool = False) -> Iterator[Any]:
+        """
+        Iterate over every record of a paginated list endpoint.
+        
+        With ``workers`` greater than one, pages after the first are fetched
+        concurrently by a bounded thread pool.
+        """
+        params = dict(params or {})
+        
+        def fetch_page(page: int) -> Dict[str, Any]:
+            return self._get(path, params={**params, 'page': page, 'per_page': per_page})
+        
+        if workers and workers > 1:
+            records = iter_records_parallel(fetch_page, per_page=per_page, max_items=max_items,
+                                            workers=workers, ordered=ordered)
+        else:
+            records = iter_records(fetch_page, per_page=per_page, max_items=max_items,
+                                   prefetch=prefetch)
+        if typed and self._model is not None:
+            return map(self._model, records)
+        return records
+    
+    def _bulk(self, method: Callable[..., Any], ids: Iterable[int],
+              max_workers: int = DEFAULT_MAX_WORKERS, **kwargs) -> BulkResult:
+        """Call a resource method for many IDs concurrently, collecting per-ID errors."""
+        return run_bulk(method, ids, max_workers=max_workers, **kwargs)
+    
+    def _get_many(self, ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                  typed: bool = False, via_list: bool = False,
+                  per_page: int = DEFAULT_PER_PAGE,
+                  params: Optional[Dict[str, Any]] = None) -> BulkResult:
+        """
+        Fetch many records by ID concurrently with the resource's ``get``.
+        
+        With ``via_list`` and listing filters in ``params``, the filtered
+        listing is read instead when it has fewer pages than there are IDs;
+        IDs it does not contain are then fetched one by one. The listing
+        cannot be filtered by ID, so without filters it is not read.
+        """
+        unique_ids: List[Hashable] = list(dict.fromkeys(ids))
+        found: Dict[Hashable, Any] = {}
+        if via_list and unique_ids and params:
+            found = self._find_in_list(unique_ids, max_workers, per_page, params)
+        
+        remaining = [item_id for item_id in unique_ids if item_id not in found]
+        fetched = self._bulk(self.get, remaining, max_workers=max_workers, typed=typed)
+        return _merge_found(unique_ids, found, fetched, lambda record: self._typed(record, typed))
+    
+    def _find_in_list(self, ids: List[Hashable], workers: int, per_page: int,
+                      params: Optional[Dict[str, Any]]) -> Dict[Hashable, Any]:
+        """Collect the records with the given IDs from the listing, if that is cheaper."""
+        params = dict(params or {})
+        
+        def fetch_page(page: int) -> Dict[str, Any]:
+            if page == 1:
+                return first
+            return self._get('', params={**params, 'page': page, 'per_page': per_page})
+        
+        first = self._get('', params={**params, 'page': 1, 'per_page': per_page})
+        pages = first.get('pages')
+        if pages is None or int(pages) >= len(ids):
+            return {}
+        
+        wanted = {str(item_id): item_id for item_id in ids}
+        found: Dict[Hashable, Any] = {}
+        records = iter_records_parallel(fetch_page, per_page=per_page, workers=workers,
+                                        ordered=False)
+        try:
+            for record in records:
+                item_id = wanted.get(str(record.get('id')))
+                if item_id is not None:
+                    found[item_id] = record
+                    if len(found) == len(wanted):
+                        break
+        finally:
+            records.close()
+        return found
+
+
+class AsyncBaseResource(_ResourceMixin):
+    """Base class for resources bound to an :class:`~fossbilling.AsyncClient`."""
+    
+    async def _get(self, path: str = '', params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make a GET request to the resource endpoint."""
+        return await self._client.get(f"{self._endpoint}/{path}".strip('/'), params=params)
+    
+    async def _post(self, path: str = '', data: Optional[Dict[str, Any]] = None,
+                    retry: Optional[bool] = None,
+                    idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Make a POST request to the resource endpoint."""
+        return await self._client.post(f"{self._endpoint}/{path}".strip('/'), data=data,
+                                       retry=retry, idempotency_key=idempotency_key)
+    
+    async def _put(self, path: str = '', data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make a PUT request to the resource endpoint."""
+        return await self._client.put(f"{self._endpoint}/{path}".strip('/'), data=data)
+    
+    async def _delete(self, path: str = '', params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make a DELETE request to the resource endpoint."""
+        return await self._client.delete(f"{self._endpoint}/{path}".strip('/'), params=params)
+    
+    def _iter_all(self, path: str = '', params: Optional[Dict[str, Any]] = None,
+                  per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                  prefetch: bool = True, typed: bool = False) -> AsyncIterator[Any]:
+        """Asynchronously iterate over every record of a paginated list endpoint."""
+        params = dict(params or {})
+        
+        async def fetch_page(page: int) -> Dict[str, Any]:
+            return await self._get(path, params={**params, 'page': page, 'per_page': per_page})
+        
+        records = aiter_records(fetch_page, per_page=per_page, max_items=max_items,
+                                prefetch=prefetch)
+        if typed and self._model is not None:
+            return self._amap_model(records)
+        return records
+    
+    async def _amap_model(self, records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Model]:
+        """Wrap every record of an async iterator in the resource's model."""
+        async for record in records:
+            yield self._model(record)
+    
+    async def _bulk(self, method: Callable[..., Any], ids: Iterable[int],
+                    max_workers: int = DEFAULT_MAX_WORKERS, **kwargs) -> BulkResult:
+        """Await a resource method for many IDs concurrently, collecting per-ID errors."""
+        return await arun_bulk(method, ids, max_workers=max_workers, **kwargs)
+    
+    async def _get_many(self, ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                        typed: bool = False, via_list: bool = False,
+                        per_page: int = DEFAULT_PER_PAGE,
+                        params: Optional[Dict[str, Any]] = None) -> BulkResult:
+        """Await many records by ID concurrently. See :meth:`BaseResource._get_many`."""
+        unique_ids: List[Hashable] = list(dict.fromkeys(ids))
+        found: Dict[Hashable, Any] = {}
+        if via_list and unique_ids and params:
+            found = await self._find_in_list(unique_ids, max_workers, per_page, params)
+        
+        remaining = [item_id for item_id in unique_ids if item_id not in found]
+        fetched = await self._bulk(self.get, remaining, max_workers=max_workers, typed=typed)
+        return _merge_found(unique_ids, found, fetched, lambda record: self._typed(record, typed))
+    
+    async def _find_in_list(self, ids: List[Hashable], workers: int, per_page: int,
+                            params: Optional[Dict[str, Any]]) -> Dict[Hashable, Any]:
+        """Collect the records with the given IDs from the listing, if that is cheaper."""
+        params = dict(params or {})
+        
+        async def fetch_page(page: int) -> Dict[str, Any]:
+            if page == 1:
+                return first
+            return await self._get('', params={**params, 'page': page, 'per_page': per_page})
+        
+        first = await self._get('', params={**params, 'page': 1, 'per_page': per_page})
+        pages = first.get('pages')
+        if pages is None or int(pages) >= len(ids):
+            return {}
+        
+        wanted = {str(item_id): item_id for item_id in ids}
+        found: Dict[Hashable, Any] = {}
+        records = aiter_records(fetch_page, per_page=per_page)
+        try:
+            async for record in records:
+                item_id = wanted.get(str(record.get('id')))
+                if item_id is not None:
+                    found[item_id] = record
+                    if len(found) == len(wanted):
+                        break
+        finally:
+            await records.aclose()
+        return found
+
+
+def _merge_found(ids: List[Hashable], found: Dict[Hashable, Any], fetched: BulkResult,
+                 wrap: Callable[[Any], Any]) -> BulkResult:
+    """Combine listing matches and individually fetched records, in ID order."""
+    if not found:
+        return fetched
+    result = BulkResult()
+    for item_id in ids:
+        if item_id in found:
+            result.results[item_id] = wrap(found[item_id])
+        elif item_id in fetched.errors:
+            result.errors[item_id] = fetched.errors[item_id]
+        else:
+            result.results[item_id] = fetched.results[item_id]
+    return result
@@ -1,40 +1,104 @@
 """
 Client resource for the FOSSBilling API.
 """
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
 
-from .base import BaseResource
+from ..bulk import DEFAULT_MAX_WORKERS, BulkResult
+from ..models import ClientModel
+from ..pagination import DEFAULT_PER_PAGE
+from .base import AsyncBaseResource, BaseResource
 
 class ClientResource(BaseResource):
     """Interact with client-related endpoints."""
     
+    _model = ClientModel
+    
     def __init__(self, client):
         super().__init__(client)
         self._endpoint = 'admin/client'
     
-    def list(self, **params) -> List[Dict[str, Any]]:
+    def list(self, typed: bool = False, **params) -> List[Any]:
         """
         List all clients.
         
         Args:
+            typed: Return :class:`~fossbilling.models.ClientModel` instances
+                instead of dictionaries
             **params: Additional query parameters (e.g., per_page, page, search, etc.)
             
         Returns:
             List of client dictionaries
         """
-        return self._get('', params=params).get('list', [])
+        return self._typed_list(self._get('', params=params).get('list', []), typed)
     
-    def get(self, client_id: int) -> Dict[str, Any]:
+    def iter_all(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                 workers: Optional[int] = None, ordered: bool = True,
+                 typed: bool = False, **params) -> Iterator[Any]:
+        """
+        Iterate over all clients, fetching pages as needed.
+        
+        The next page is fetched in the background while the current one is
+        consumed, and only one or two pages are held in memory at a time.
+        
+        Args:
+            per_page: Number of clients to fetch per request
+            max_items: Stop after this many clients (default: no limit)
+            workers: Fetch pages concurrently with this many threads once the
+                first page reports the page count (default: sequential)
+            ordered: With ``workers``, yield in page order (default: True)
+                or as pages arrive
+            typed: Yield :class:`~fossbilling.models.ClientModel` instances
+                instead of dictionaries
+            **params: Additional query parameters, as for :meth:`list`
+            
+        Yields:
+            Client dictionaries
+        """
+        return self._iter_all('', params=params, per_page=per_page, max_items=max_items,
+                              workers=workers, ordered=ordered, typed=typed)
+    
+    def get(self, client_id: int, typed: bool = False) -> Any:
         """
         Get a client by ID.
         
         Args:
             client_id: The ID of the client to retrieve
+            typed: Return a :class:`~fossbilling.models.ClientModel` instead of a dictionary
             
         Returns:
-            Client details as a dictionary
+            Client details as a dictionary, or a model if ``typed`` is set
         """
-        return self._get(str(client_id))
+        return self._typed(self._get(str(client_id)), typed)
+    
+    def get_many(self, client_ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                 typed: bool = False, via_list: bool = False,
+                 per_page: int = DEFAULT_PER_PAGE, **params) -> BulkResult:
+        """
+        Get many clients by ID concurrently.
+        
+        Duplicate IDs are fetched once, with at most ``max_workers`` requests
+        in flight. A failed ID does not stop the others.
+        
+        Args:
+            client_ids: IDs of the clients to retrieve
+            max_workers: Maximum number of requests in flight
+            typed: Return :class:`~fossbilling.models.ClientModel` instances
+                instead of dictionaries
+            via_list: Read the client listing, narrowed by ``params``, instead
+                when it has fewer pages than there are IDs (checking costs one
+                listing request). Ignored without ``params``, as the listing
+                cannot be filtered by ID. Listing records may carry fewer
+                details than :meth:`get`.
+            per_page: Page size used with ``via_list``
+            **params: Listing filters used with ``via_list``, to narrow the
+                listing down to the wanted clients
+            
+        Returns:
+            A :class:`~fossbilling.bulk.BulkResult` mapping each ID to its
+            client, or to the error raised while fetching it
+        """
+        return self._get_many(client_ids, max_workers=max_workers, typed=typed,
+                              via_list=via_list, per_page=per_page, params=params)
     
     def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -93,7 +157,8 @@ class ClientResource(BaseResource):
         return self._get(f"{client_id}/balance")
     
     def update_balance(self, client_id: int, amount: float, 
-                      description: str = '') -> Dict[str, Any]:
+                      description: str = '',
+                      idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Update client's balance.
         
@@ -101,6 +166,9 @@ class ClientResource(BaseResource):
             client_id: The ID of the client
             amount: Amount to add (positive) or subtract (negative)
             description: Description for the transaction
+            idempotency_key: Key identifying this operation. Repeating the
+                call with the same key returns the journaled result instead of
+                sending it again (see :mod:`fossbilling.idempotency`).
             
         Returns:
             Updated balance information
@@ -109,4 +177,68 @@ class ClientResource(BaseResource):
             'amount': amount,
             'description': description or 'Balance update'
         }
-        return self._post(f"{client_id}/balance", data=data)
+        return self._post(f"{client_id}/balance", data=data, idempotency_key=idempotency_key)
+
+
+class AsyncClientResource(AsyncBaseResource):
+    """Interact with client-related endpoints from an :class:`~fossbilling.AsyncClient`."""
+    
+    _model = ClientModel
+    
+    def __init__(self, client):
+        super().__init__(client)
+        self._endpoint = 'admin/client'
+    
+    async def list(self, typed: bool = False, **params) -> List[Any]:
+        """List all clients. See :meth:`ClientResource.list`."""
+        return self._typed_list((await self._get('', params=params)).get('list', []), typed)
+    
+    def iter_all(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                 typed: bool = False, **params) -> AsyncIterator[Any]:
+        """Asynchronously iterate over all clients. See :meth:`ClientResource.iter_all`."""
+        return self._iter_all('', params=params, per_page=per_page, max_items=max_items,
+                              typed=typed)
+    
+    async def get(self, client_id: int, typed: bool = False) -> Any:
+        """Get a client by ID. See :meth:`ClientResource.get`."""
+        return self._typed(await self._get(str(client_id)), typed)
+    
+    async def get_many(self, client_ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                       typed: bool = False, via_list: bool = False,
+                       per_page: int = DEFAULT_PER_PAGE, **params) -> BulkResult:
+        """Get many clients by ID concurrently. See :meth:`ClientResource.get_many`."""
+        return await self._get_many(client_ids, max_workers=max_workers, typed=typed,
+                                    via_list=via_list, per_page=per_page, params=params)
+    
+    async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new client. See :meth:`ClientResource.create`."""
+        required = ['email', 'first_name', 'last_name', 'password']
+        if not all(field in data for field in required):
+            raise ValueError(f"Missing required fields: {required}")
+            
+        return await self._post('', data=data)
+    
+    async def update(self, client_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update a client. See :meth:`ClientResource.update`."""
+        return await self._put(str(client_id), data=data)
+    
+    async def delete(self, client_id: int, delete_orders: bool = False) -> bool:
+        """Delete a client. See :meth:`ClientResource.delete`."""
+        params = {'delete_orders': int(delete_orders)}
+        await self._delete(f"{client_id}", params=params)
+        return True
+    
+    async def get_balance(self, client_id: int) -> Dict[str, Any]:
+        """Get client's balance. See :meth:`ClientResource.get_balance`."""
+        return await self._get(f"{client_id}/balance")
+    
+    async def update_balance(self, client_id: int, amount: float,
+                             description: str = '',
+                             idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Update client's balance. See :meth:`ClientResource.update_balance`."""
+        data = {
+            'amount': amount,
+            'description': description or 'Balance update'
+        }
+        return await self._post(f"{client_id}/balance", data=data,
+                                idempotency_key=idempotency_key)
@@ -1,48 +1,130 @@
 """
 Invoice resource for the FOSSBilling API.
 """
-from typing import Any, Dict, List, Optional
+import os
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Union
+)
+
+from ..bulk import DEFAULT_MAX_WORKERS, BulkResult
+from ..models import InvoiceModel
+from ..pagination import DEFAULT_PER_PAGE
+from ..pipeline import Checkpoint, KeyFunc, PipelineResult, arun_pipeline, default_key, run_pipeline
+from ..streaming import DEFAULT_CHUNK_SIZE, Destination
+from .base import AsyncBaseResource, BaseResource
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+
+
+def _payment_key(index: int, payment: Dict[str, Any]) -> str:
+    """Payments are keyed by invoice, since an invoice is only marked paid once."""
+    return str(payment['invoice_id'])
 
-from .base import BaseResource
 
 class InvoiceResource(BaseResource):
     """Interact with invoice-related endpoints."""
     
+    _model = InvoiceModel
+    
     def __init__(self, client):
         super().__init__(client)
         self._endpoint = 'admin/invoice'
     
-    def list(self, **params) -> List[Dict[str, Any]]:
+    def list(self, typed: bool = False, **params) -> List[Any]:
         """
         List all invoices.
         
         Args:
+            typed: Return :class:`~fossbilling.models.InvoiceModel` instances
+                instead of dictionaries
             **params: Additional query parameters (e.g., per_page, page, client_id, status, etc.)
             
         Returns:
             List of invoice dictionaries
         """
-        return self._get('', params=params).get('list', [])
+        return self._typed_list(self._get('', params=params).get('list', []), typed)
+    
+    def iter_all(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                 workers: Optional[int] = None, ordered: bool = True,
+                 typed: bool = False, **params) -> Iterator[Any]:
+        """
+        Iterate over all invoices, fetching pages as needed.
+        
+        The next page is fetched in the background while the current one is
+        consumed, and only one or two pages are held in memory at a time.
+        
+        Args:
+            per_page: Number of invoices to fetch per request
+            max_items: Stop after this many invoices (default: no limit)
+            workers: Fetch pages concurrently with this many threads once the
+                first page reports the page count (default: sequential)
+            ordered: With ``workers``, yield in page order (default: True)
+                or as pages arrive
+            typed: Yield :class:`~fossbilling.models.InvoiceModel` instances
+                instead of dictionaries
+            **params: Additional query parameters, as for :meth:`list`
+            
+        Yields:
+            Invoice dictionaries
+        """
+        return self._iter_all('', params=params, per_page=per_page, max_items=max_items,
+                              workers=workers, ordered=ordered, typed=typed)
     
-    def get(self, invoice_id: int) -> Dict[str, Any]:
+    def get(self, invoice_id: int, typed: bool = False) -> Any:
         """
         Get an invoice by ID.
         
         Args:
             invoice_id: The ID of the invoice to retrieve
+            typed: Return a :class:`~fossbilling.models.InvoiceModel` instead of a dictionary
             
         Returns:
-            Invoice details as a dictionary
+            Invoice details as a dictionary, or a model if ``typed`` is set
         """
-        return self._get(str(invoice_id))
+        return self._typed(self._get(str(invoice_id)), typed)
     
-    def create(self, client_id: int, items: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+    def get_many(self, invoice_ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                 typed: bool = False, via_list: bool = False,
+                 per_page: int = DEFAULT_PER_PAGE, **params) -> BulkResult:
+        """
+        Get many invoices by ID concurrently.
+        
+        Duplicate IDs are fetched once, with at most ``max_workers`` requests
+        in flight. A failed ID does not stop the others.
+        
+        Args:
+            invoice_ids: IDs of the invoices to retrieve
+            max_workers: Maximum number of requests in flight
+            typed: Return :class:`~fossbilling.models.InvoiceModel` instances
+                instead of dictionaries
+            via_list: Read the invoice listing, narrowed by ``params``, instead
+                when it has fewer pages than there are IDs (checking costs one
+                listing request). Ignored without ``params``, as the listing
+                cannot be filtered by ID. Listing records may carry fewer
+                details than :meth:`get`.
+            per_page: Page size used with ``via_list``
+            **params: Listing filters used with ``via_list``, to narrow the
+                listing down to the wanted invoices
+            
+        Returns:
+            A :class:`~fossbilling.bulk.BulkResult` mapping each ID to its
+            invoice, or to the error raised while fetching it
+        """
+        return self._get_many(invoice_ids, max_workers=max_workers, typed=typed,
+                              via_list=via_list, per_page=per_page, params=params)
+    
+    def create(self, client_id: int, items: List[Dict[str, Any]],
+               idempotency_key: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """
         Create a new invoice.
         
         Args:
             client_id: The ID of the client
             items: List of invoice items, each with 'title', 'price', 'quantity', etc.
+            idempotency_key: Key identifying this operation. Repeating the
+                call with the same key returns the journaled result instead of
+                sending it again (see :mod:`fossbilling.idempotency`).
             **kwargs: Additional invoice data (due_date, tax, discount, etc.)
             
         Returns:
@@ -53,7 +135,7 @@ class InvoiceResource(BaseResource):
             'items': items,
             **kwargs
         }
-        return self._post('', data=data)
+        return self._post('', data=data, idempotency_key=idempotency_key)
     
     def update(self, invoice_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -81,18 +163,25 @@ class InvoiceResource(BaseResource):
         self._delete(str(invoice_id))
         return True
     
-    def mark_as_paid(self, invoice_id: int, **kwargs) -> Dict[str, Any]:
+    def mark_as_paid(self, invoice_id: int, retry: bool = False,
+                     idempotency_key: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """
         Mark an invoice as paid.
         
         Args:
             invoice_id: The ID of the invoice
+            retry: Retry transient failures according to the client's retry
+                policy. Only enable this if marking the invoice twice is harmless.
+            idempotency_key: Key identifying this operation. Repeating the
+                call with the same key returns the journaled result instead of
+                sending it again (see :mod:`fossbilling.idempotency`).
             **kwargs: Additional payment data (txn_id, amount, etc.)
             
         Returns:
             Updated invoice details
         """
-        return self._post(f"{invoice_id}/mark_as_paid", data=kwargs)
+        return self._post(f"{invoice_id}/mark_as_paid", data=kwargs, retry=retry or None,
+                          idempotency_key=idempotency_key)
     
     def generate_pdf(self, invoice_id: int) -> bytes:
         """
@@ -104,13 +193,115 @@ class InvoiceResource(BaseResource):
         Returns:
             PDF content as bytes
         """
-        response = self._client._request(
+        response = self._client._send(
             'GET', 
             f"{self._endpoint}/{invoice_id}/pdf",
             headers={'Accept': 'application/pdf'}
         )
         return response.content
     
+    def download_pdf(self, invoice_id: int, dest: Destination,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Stream an invoice PDF to a file without buffering it in memory.
+        
+        Args:
+            invoice_id: The ID of the invoice
+            dest: A file path, or a writable binary file-like object. Paths
+                are written atomically, so a failed download leaves no
+                partial file behind.
+            chunk_size: Number of bytes read per chunk
+            
+        Returns:
+            The number of bytes written
+        """
+        return self._client._download(
+            f"{self._endpoint}/{invoice_id}/pdf",
+            dest,
+            chunk_size=chunk_size,
+            headers={'Accept': 'application/pdf'}
+        )
+    
+    def download_pdfs(self, invoice_ids: Iterable[int], directory: str,
+                      filename: str = 'invoice-{id}.pdf',
+                      max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Download many invoice PDFs concurrently into a directory.
+        
+        Args:
+            invoice_ids: The IDs of the invoices
+            directory: Directory to write the PDFs to; created if missing
+            filename: File name template, formatted with the invoice ``id``
+            max_workers: Maximum number of downloads in flight
+            
+        Returns:
+            BulkResult mapping each invoice ID to the path written, or to the
+            error that prevented the download
+        """
+        os.makedirs(directory, exist_ok=True)
+        
+        def download(invoice_id: int) -> str:
+            path = os.path.join(directory, filename.format(id=invoice_id))
+            self.download_pdf(invoice_id, path)
+            return path
+        
+        return self._bulk(download, invoice_ids, max_workers=max_workers)
+    
+    def create_many(self, specs: Iterable[Dict[str, Any]],
+                    checkpoint: Optional[Union[Checkpoint, str]] = None,
+                    max_workers: int = DEFAULT_MAX_WORKERS, key: KeyFunc = default_key,
+                    retry_in_doubt: bool = False) -> PipelineResult:
+        """
+        Create many invoices concurrently, with a resumable checkpoint.
+        
+        Specs are read lazily, so a generator over a large CSV file is fine.
+        When a checkpoint is given, rerunning after a crash with the same
+        input skips the invoices already created; invoices whose creation
+        was in flight during the crash are reported in
+        :attr:`~fossbilling.pipeline.PipelineResult.in_doubt` rather than
+        being created again.
+        
+        Args:
+            specs: Invoice specs, each a dictionary with ``client_id``,
+                ``items`` and any other argument of :meth:`create`
+            checkpoint: Path of the checkpoint journal, or a
+                :class:`~fossbilling.pipeline.Checkpoint`
+            max_workers: Maximum number of requests in flight
+            key: ``key(index, spec)`` returning a stable, unique key per spec
+                (default: position in the input plus a content hash)
+            retry_in_doubt: Create in-doubt invoices again
+            
+        Returns:
+            A :class:`~fossbilling.pipeline.PipelineResult` keyed by spec key
+        """
+        return run_pipeline(lambda spec: self.create(**spec), specs, key=key,
+                            checkpoint=checkpoint, max_workers=max_workers,
+                            retry_in_doubt=retry_in_doubt)
+    
+    def mark_many_as_paid(self, payments: Iterable[Dict[str, Any]],
+                          checkpoint: Optional[Union[Checkpoint, str]] = None,
+                          max_workers: int = DEFAULT_MAX_WORKERS,
+                          retry_in_doubt: bool = False) -> PipelineResult:
+        """
+        Mark many invoices as paid concurrently, with a resumable checkpoint.
+        
+        Args:
+            payments: Payment records, each a dictionary with ``invoice_id``
+                and any payment data accepted by :meth:`mark_as_paid`
+                (``txn_id``, ``amount``, ...)
+            checkpoint: Path of the checkpoint journal, or a
+                :class:`~fossbilling.pipeline.Checkpoint`
+            max_workers: Maximum number of requests in flight
+            retry_in_doubt: Send payments whose earlier outcome is unknown
+                again. Only enable this if marking an invoice twice is harmless.
+            
+        Returns:
+            A :class:`~fossbilling.pipeline.PipelineResult` keyed by invoice ID
+        """
+        return run_pipeline(lambda payment: self.mark_as_paid(**payment), payments,
+                            key=_payment_key, checkpoint=checkpoint,
+                            max_workers=max_workers, retry_in_doubt=retry_in_doubt)
+    
     def send_reminder(self, invoice_id: int) -> bool:
         """
         Send payment reminder for an invoice.
@@ -123,3 +314,118 @@ class InvoiceResource(BaseResource):
         """
         self._post(f"{invoice_id}/send_reminder")
         return True
+
+
+class AsyncInvoiceResource(AsyncBaseResource):
+    """Interact with invoice-related endpoints from an :class:`~fossbilling.AsyncClient`."""
+    
+    _model = InvoiceModel
+    
+    def __init__(self, client):
+        super().__init__(client)
+        self._endpoint = 'admin/invoice'
+    
+    async def list(self, typed: bool = False, **params: Any) -> List[Any]:
+        """List all invoices. See :meth:`InvoiceResource.list`."""
+        return self._typed_list((await self._get('', params=params)).get('list', []), typed)
+    
+    def iter_all(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                 typed: bool = False, **params: Any) -> AsyncIterator[Any]:
+        """Asynchronously iterate over all invoices. See :meth:`InvoiceResource.iter_all`."""
+        return self._iter_all('', params=params, per_page=per_page, max_items=max_items,
+                              typed=typed)
+    
+    async def get(self, invoice_id: int, typed: bool = False) -> Any:
+        """Get an invoice by ID. See :meth:`InvoiceResource.get`."""
+        return self._typed(await self._get(str(invoice_id)), typed)
+    
+    async def get_many(self, invoice_ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                       typed: bool = False, via_list: bool = False,
+                       per_page: int = DEFAULT_PER_PAGE, **params: Any) -> BulkResult:
+        """Get many invoices by ID concurrently. See :meth:`InvoiceResource.get_many`."""
+        return await self._get_many(invoice_ids, max_workers=max_workers, typed=typed,
+                                    via_list=via_list, per_page=per_page, params=params)
+    
+    async def create(self, client_id: int, items: List[Dict[str, Any]],
+                     idempotency_key: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        """Create a new invoice. See :meth:`InvoiceResource.create`."""
+        data = {
+            'client_id': client_id,
+            'items': items,
+            **kwargs
+        }
+        return await self._post('', data=data, idempotency_key=idempotency_key)
+    
+    async def update(self, invoice_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update an invoice. See :meth:`InvoiceResource.update`."""
+        return await self._put(str(invoice_id), data=data)
+    
+    async def delete(self, invoice_id: int) -> bool:
+        """Delete an invoice. See :meth:`InvoiceResource.delete`."""
+        await self._delete(str(invoice_id))
+        return True
+    
+    async def mark_as_paid(self, invoice_id: int, retry: bool = False,
+                           idempotency_key: Optional[str] = None, **kwargs: Any) -> Dict[str, Any]:
+        """Mark an invoice as paid. See :meth:`InvoiceResource.mark_as_paid`."""
+        return await self._post(f"{invoice_id}/mark_as_paid", data=kwargs, retry=retry or None,
+                                idempotency_key=idempotency_key)
+    
+    async def generate_pdf(self, invoice_id: int) -> bytes:
+        """Generate PDF for an invoice. See :meth:`InvoiceResource.generate_pdf`."""
+        response: 'httpx.Response' = await self._client._send(
+            'GET',
+            f"{self._endpoint}/{invoice_id}/pdf",
+            headers={'Accept': 'application/pdf'}
+        )
+        return response.content
+    
+    async def download_pdf(self, invoice_id: int, dest: Destination,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Stream an invoice PDF to a file. See :meth:`InvoiceResource.download_pdf`."""
+        written: int = await self._client._download(
+            f"{self._endpoint}/{invoice_id}/pdf",
+            dest,
+            chunk_size=chunk_size,
+            headers={'Accept': 'application/pdf'}
+        )
+        return written
+    
+    async def download_pdfs(self, invoice_ids: Iterable[int], directory: str,
+                            filename: str = 'invoice-{id}.pdf',
+                            max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Download many invoice PDFs concurrently. See :meth:`InvoiceResource.download_pdfs`."""
+        os.makedirs(directory, exist_ok=True)
+        
+        async def download(invoice_id: int) -> str:
+            path = os.path.join(directory, filename.format(id=invoice_id))
+            await self.download_pdf(invoice_id, path)
+            return path
+        
+        return await self._bulk(download, invoice_ids, max_workers=max_workers)
+    
+    async def create_many(self,
+                          specs: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+                          checkpoint: Optional[Union[Checkpoint, str]] = None,
+                          max_workers: int = DEFAULT_MAX_WORKERS, key: KeyFunc = default_key,
+                          retry_in_doubt: bool = False) -> PipelineResult:
+        """Create many invoices concurrently. See :meth:`InvoiceResource.create_many`."""
+        return await arun_pipeline(lambda spec: self.create(**spec), specs, key=key,
+                                   checkpoint=checkpoint, max_workers=max_workers,
+                                   retry_in_doubt=retry_in_doubt)
+    
+    async def mark_many_as_paid(self,
+                                payments: Union[Iterable[Dict[str, Any]],
+                                                AsyncIterable[Dict[str, Any]]],
+                                checkpoint: Optional[Union[Checkpoint, str]] = None,
+                                max_workers: int = DEFAULT_MAX_WORKERS,
+                                retry_in_doubt: bool = False) -> PipelineResult:
+        """Mark many invoices as paid concurrently. See :meth:`InvoiceResource.mark_many_as_paid`."""
+        return await arun_pipeline(lambda payment: self.mark_as_paid(**payment), payments,
+                                   key=_payment_key, checkpoint=checkpoint,
+                                   max_workers=max_workers, retry_in_doubt=retry_in_doubt)
+    
+    async def send_reminder(self, invoice_id: int) -> bool:
+        """Send payment reminder for an invoice. See :meth:`InvoiceResource.send_reminder`."""
+        await self._post(f"{invoice_id}/send_reminder")
+        return True
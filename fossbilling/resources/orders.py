@@ -1,48 +1,116 @@
 """
 Order resource for the FOSSBilling API.
 """
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
 
-from .base import BaseResource
+from ..bulk import DEFAULT_MAX_WORKERS, BulkResult
+from ..models import OrderModel
+from ..pagination import DEFAULT_PER_PAGE
+from .base import AsyncBaseResource, BaseResource
 
 class OrderResource(BaseResource):
     """Interact with order-related endpoints."""
     
+    _model = OrderModel
+    
     def __init__(self, client):
         super().__init__(client)
         self._endpoint = 'admin/order'
     
-    def list(self, **params) -> List[Dict[str, Any]]:
+    def list(self, typed: bool = False, **params) -> List[Any]:
         """
         List all orders.
         
         Args:
+            typed: Return :class:`~fossbilling.models.OrderModel` instances
+                instead of dictionaries
             **params: Additional query parameters (e.g., per_page, page, client_id, status, etc.)
             
         Returns:
             List of order dictionaries
         """
-        return self._get('', params=params).get('list', [])
+        return self._typed_list(self._get('', params=params).get('list', []), typed)
     
-    def get(self, order_id: int) -> Dict[str, Any]:
+    def iter_all(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                 workers: Optional[int] = None, ordered: bool = True,
+                 typed: bool = False, **params) -> Iterator[Any]:
+        """
+        Iterate over all orders, fetching pages as needed.
+        
+        The next page is fetched in the background while the current one is
+        consumed, and only one or two pages are held in memory at a time.
+        
+        Args:
+            per_page: Number of orders to fetch per request
+            max_items: Stop after this many orders (default: no limit)
+            workers: Fetch pages concurrently with this many threads once the
+                first page reports the page count (default: sequential)
+            ordered: With ``workers``, yield in page order (default: True)
+                or as pages arrive
+            typed: Yield :class:`~fossbilling.models.OrderModel` instances
+                instead of dictionaries
+            **params: Additional query parameters, as for :meth:`list`
+            
+        Yields:
+            Order dictionaries
+        """
+        return self._iter_all('', params=params, per_page=per_page, max_items=max_items,
+                              workers=workers, ordered=ordered, typed=typed)
+    
+    def get(self, order_id: int, typed: bool = False) -> Any:
         """
         Get an order by ID.
         
         Args:
             order_id: The ID of the order to retrieve
+            typed: Return a :class:`~fossbilling.models.OrderModel` instead of a dictionary
             
         Returns:
-            Order details as a dictionary
+            Order details as a dictionary, or a model if ``typed`` is set
         """
-        return self._get(str(order_id))
+        return self._typed(self._get(str(order_id)), typed)
     
-    def create(self, client_id: int, product_id: int, **kwargs) -> Dict[str, Any]:
+    def get_many(self, order_ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                 typed: bool = False, via_list: bool = False,
+                 per_page: int = DEFAULT_PER_PAGE, **params) -> BulkResult:
+        """
+        Get many orders by ID concurrently.
+        
+        Duplicate IDs are fetched once, with at most ``max_workers`` requests
+        in flight. A failed ID does not stop the others.
+        
+        Args:
+            order_ids: IDs of the orders to retrieve
+            max_workers: Maximum number of requests in flight
+            typed: Return :class:`~fossbilling.models.OrderModel` instances
+                instead of dictionaries
+            via_list: Read the order listing, narrowed by ``params``, instead
+                when it has fewer pages than there are IDs (checking costs one
+                listing request). Ignored without ``params``, as the listing
+                cannot be filtered by ID. Listing records may carry fewer
+                details than :meth:`get`.
+            per_page: Page size used with ``via_list``
+            **params: Listing filters used with ``via_list``, to narrow the
+                listing down to the wanted orders
+            
+        Returns:
+            A :class:`~fossbilling.bulk.BulkResult` mapping each ID to its
+            order, or to the error raised while fetching it
+        """
+        return self._get_many(order_ids, max_workers=max_workers, typed=typed,
+                              via_list=via_list, per_page=per_page, params=params)
+    
+    def create(self, client_id: int, product_id: int, idempotency_key: Optional[str] = None,
+               **kwargs) -> Dict[str, Any]:
         """
         Create a new order.
         
         Args:
             client_id: The ID of the client
             product_id: The ID of the product to order
+            idempotency_key: Key identifying this operation. Repeating the
+                call with the same key returns the journaled result instead of
+                sending it again (see :mod:`fossbilling.idempotency`).
             **kwargs: Additional order data (period, quantity, config options, etc.)
             
         Returns:
@@ -53,7 +121,7 @@ class OrderResource(BaseResource):
             'product_id': product_id,
             **kwargs
         }
-        return self._post('', data=data)
+        return self._post('', data=data, idempotency_key=idempotency_key)
     
     def update(self, order_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -95,17 +163,20 @@ class OrderResource(BaseResource):
         """
         return self._post(f"{order_id}/activate")
     
-    def renew(self, order_id: int) -> Dict[str, Any]:
+    def renew(self, order_id: int, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Renew an active order.
         
         Args:
             order_id: The ID of the order to renew
+            idempotency_key: Key identifying this operation. Repeating the
+                call with the same key returns the journaled result instead of
+                sending it again (see :mod:`fossbilling.idempotency`).
             
         Returns:
             Updated order details
         """
-        return self._post(f"{order_id}/renew")
+        return self._post(f"{order_id}/renew", idempotency_key=idempotency_key)
     
     def suspend(self, order_id: int, reason: str = '') -> Dict[str, Any]:
         """
@@ -144,3 +215,171 @@ class OrderResource(BaseResource):
             Updated order details
         """
         return self._post(f"{order_id}/cancel", data={'reason': reason})
+    
+    def bulk_activate(self, order_ids: Iterable[int],
+                      max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Activate many orders concurrently.
+        
+        Args:
+            order_ids: The IDs of the orders to activate
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            BulkResult with the updated order details or the error for each ID
+        """
+        return self._bulk(self.activate, order_ids, max_workers=max_workers)
+    
+    def bulk_renew(self, order_ids: Iterable[int],
+                   max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Renew many orders concurrently.
+        
+        Args:
+            order_ids: The IDs of the orders to renew
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            BulkResult with the updated order details or the error for each ID
+        """
+        return self._bulk(self.renew, order_ids, max_workers=max_workers)
+    
+    def bulk_suspend(self, order_ids: Iterable[int], reason: str = '',
+                     max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Suspend many orders concurrently.
+        
+        Args:
+            order_ids: The IDs of the orders to suspend
+            reason: Reason for suspension, applied to every order
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            BulkResult with the updated order details or the error for each ID
+        """
+        return self._bulk(self.suspend, order_ids, max_workers=max_workers, reason=reason)
+    
+    def bulk_unsuspend(self, order_ids: Iterable[int],
+                       max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Unsuspend many orders concurrently.
+        
+        Args:
+            order_ids: The IDs of the orders to unsuspend
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            BulkResult with the updated order details or the error for each ID
+        """
+        return self._bulk(self.unsuspend, order_ids, max_workers=max_workers)
+    
+    def bulk_cancel(self, order_ids: Iterable[int], reason: str = '',
+                    max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Cancel many orders concurrently.
+        
+        Args:
+            order_ids: The IDs of the orders to cancel
+            reason: Reason for cancellation, applied to every order
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            BulkResult with the updated order details or the error for each ID
+        """
+        return self._bulk(self.cancel, order_ids, max_workers=max_workers, reason=reason)
+
+
+class AsyncOrderResource(AsyncBaseResource):
+    """Interact with order-related endpoints from an :class:`~fossbilling.AsyncClient`."""
+    
+    _model = OrderModel
+    
+    def __init__(self, client):
+        super().__init__(client)
+        self._endpoint = 'admin/order'
+    
+    async def list(self, typed: bool = False, **params) -> List[Any]:
+        """List all orders. See :meth:`OrderResource.list`."""
+        return self._typed_list((await self._get('', params=params)).get('list', []), typed)
+    
+    def iter_all(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                 typed: bool = False, **params) -> AsyncIterator[Any]:
+        """Asynchronously iterate over all orders. See :meth:`OrderResource.iter_all`."""
+        return self._iter_all('', params=params, per_page=per_page, max_items=max_items,
+                              typed=typed)
+    
+    async def get(self, order_id: int, typed: bool = False) -> Any:
+        """Get an order by ID. See :meth:`OrderResource.get`."""
+        return self._typed(await self._get(str(order_id)), typed)
+    
+    async def get_many(self, order_ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                       typed: bool = False, via_list: bool = False,
+                       per_page: int = DEFAULT_PER_PAGE, **params) -> BulkResult:
+        """Get many orders by ID concurrently. See :meth:`OrderResource.get_many`."""
+        return await self._get_many(order_ids, max_workers=max_workers, typed=typed,
+                                    via_list=via_list, per_page=per_page, params=params)
+    
+    async def create(self, client_id: int, product_id: int, idempotency_key: Optional[str] = None,
+                     **kwargs) -> Dict[str, Any]:
+        """Create a new order. See :meth:`OrderResource.create`."""
+        data = {
+            'client_id': client_id,
+            'product_id': product_id,
+            **kwargs
+        }
+        return await self._post('', data=data, idempotency_key=idempotency_key)
+    
+    async def update(self, order_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update an order. See :meth:`OrderResource.update`."""
+        return await self._put(str(order_id), data=data)
+    
+    async def delete(self, order_id: int, delete_addons: bool = False) -> bool:
+        """Delete an order. See :meth:`OrderResource.delete`."""
+        params = {'delete_addons': int(delete_addons)}
+        await self._delete(f"{order_id}", params=params)
+        return True
+    
+    async def activate(self, order_id: int) -> Dict[str, Any]:
+        """Activate a pending order. See :meth:`OrderResource.activate`."""
+        return await self._post(f"{order_id}/activate")
+    
+    async def renew(self, order_id: int, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Renew an active order. See :meth:`OrderResource.renew`."""
+        return await self._post(f"{order_id}/renew", idempotency_key=idempotency_key)
+    
+    async def suspend(self, order_id: int, reason: str = '') -> Dict[str, Any]:
+        """Suspend an active order. See :meth:`OrderResource.suspend`."""
+        return await self._post(f"{order_id}/suspend", data={'reason': reason})
+    
+    async def unsuspend(self, order_id: int) -> Dict[str, Any]:
+        """Unsuspend a suspended order. See :meth:`OrderResource.unsuspend`."""
+        return await self._post(f"{order_id}/unsuspend")
+    
+    async def cancel(self, order_id: int, reason: str = '') -> Dict[str, Any]:
+        """Cancel an order. See :meth:`OrderResource.cancel`."""
+        return await self._post(f"{order_id}/cancel", data={'reason': reason})
+    
+    async def bulk_activate(self, order_ids: Iterable[int],
+                            max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Activate many orders concurrently. See :meth:`OrderResource.bulk_activate`."""
+        return await self._bulk(self.activate, order_ids, max_workers=max_workers)
+    
+    async def bulk_renew(self, order_ids: Iterable[int],
+                         max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Renew many orders concurrently. See :meth:`OrderResource.bulk_renew`."""
+        return await self._bulk(self.renew, order_ids, max_workers=max_workers)
+    
+    async def bulk_suspend(self, order_ids: Iterable[int], reason: str = '',
+                           max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Suspend many orders concurrently. See :meth:`OrderResource.bulk_suspend`."""
+        return await self._bulk(self.suspend, order_ids, max_workers=max_workers, reason=reason)
+    
+    async def bulk_unsuspend(self, order_ids: Iterable[int],
+                             max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Unsuspend many orders concurrently. See :meth:`OrderResource.bulk_unsuspend`."""
+        return await self._bulk(self.unsuspend, order_ids, max_workers=max_workers)
+    
+    async def bulk_cancel(self, order_ids: Iterable[int], reason: str = '',
+                          max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Cancel many orders concurrently. See :meth:`OrderResource.bulk_cancel`."""
+        return await self._bulk(self.cancel, order_ids, max_workers=max_workers, reason=reason)
@@ -1,40 +1,104 @@
 """
 Service resource for the FOSSBilling API.
 """
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
 
-from .base import BaseResource
+from ..bulk import DEFAULT_MAX_WORKERS, BulkResult
+from ..models import ServiceModel
+from ..pagination import DEFAULT_PER_PAGE
+from .base import AsyncBaseResource, BaseResource
 
 class ServiceResource(BaseResource):
     """Interact with service-related endpoints."""
     
+    _model = ServiceModel
+    
     def __init__(self, client):
         super().__init__(client)
         self._endpoint = 'admin/service'
     
-    def list(self, **params) -> List[Dict[str, Any]]:
+    def list(self, typed: bool = False, **params) -> List[Any]:
         """
         List all services.
         
         Args:
+            typed: Return :class:`~fossbilling.models.ServiceModel` instances
+                instead of dictionaries
             **params: Additional query parameters (e.g., per_page, page, client_id, etc.)
             
         Returns:
             List of service dictionaries
         """
-        return self._get('', params=params).get('list', [])
+        return self._typed_list(self._get('', params=params).get('list', []), typed)
     
-    def get(self, service_id: int) -> Dict[str, Any]:
+    def iter_all(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                 workers: Optional[int] = None, ordered: bool = True,
+                 typed: bool = False, **params) -> Iterator[Any]:
+        """
+        Iterate over all services, fetching pages as needed.
+        
+        The next page is fetched in the background while the current one is
+        consumed, and only one or two pages are held in memory at a time.
+        
+        Args:
+            per_page: Number of services to fetch per request
+            max_items: Stop after this many services (default: no limit)
+            workers: Fetch pages concurrently with this many threads once the
+                first page reports the page count (default: sequential)
+            ordered: With ``workers``, yield in page order (default: True)
+                or as pages arrive
+            typed: Yield :class:`~fossbilling.models.ServiceModel` instances
+                instead of dictionaries
+            **params: Additional query parameters, as for :meth:`list`
+            
+        Yields:
+            Service dictionaries
+        """
+        return self._iter_all('', params=params, per_page=per_page, max_items=max_items,
+                              workers=workers, ordered=ordered, typed=typed)
+    
+    def get(self, service_id: int, typed: bool = False) -> Any:
         """
         Get a service by ID.
         
         Args:
             service_id: The ID of the service to retrieve
+            typed: Return a :class:`~fossbilling.models.ServiceModel` instead of a dictionary
             
         Returns:
-            Service details as a dictionary
+            Service details as a dictionary, or a model if ``typed`` is set
         """
-        return self._get(str(service_id))
+        return self._typed(self._get(str(service_id)), typed)
+    
+    def get_many(self, service_ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                 typed: bool = False, via_list: bool = False,
+                 per_page: int = DEFAULT_PER_PAGE, **params) -> BulkResult:
+        """
+        Get many services by ID concurrently.
+        
+        Duplicate IDs are fetched once, with at most ``max_workers`` requests
+        in flight. A failed ID does not stop the others.
+        
+        Args:
+            service_ids: IDs of the services to retrieve
+            max_workers: Maximum number of requests in flight
+            typed: Return :class:`~fossbilling.models.ServiceModel` instances
+                instead of dictionaries
+            via_list: Read the service listing, narrowed by ``params``, instead
+                when it has fewer pages than there are IDs (checking costs one
+                listing request). Ignored without ``params``, as the listing
+                cannot be filtered by ID. Listing records may carry fewer
+                details than :meth:`get`.
+            per_page: Page size used with ``via_list``
+            **params: Listing filters used with ``via_list``, to narrow the
+                listing down to the wanted services
+            
+        Returns:
+            A :class:`~fossbilling.bulk.BulkResult` mapping each ID to its
+            service, or to the error raised while fetching it
+        """
+        return self._get_many(service_ids, max_workers=max_workers, typed=typed,
+                              via_list=via_list, per_page=per_page, params=params)
     
     def update(self, service_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -62,18 +126,22 @@ class ServiceResource(BaseResource):
         self._delete(str(service_id))
         return True
     
-    def renew(self, service_id: int, **kwargs) -> Dict[str, Any]:
+    def renew(self, service_id: int, idempotency_key: Optional[str] = None,
+              **kwargs) -> Dict[str, Any]:
         """
         Renew a service.
         
         Args:
             service_id: The ID of the service to renew
+            idempotency_key: Key identifying this operation. Repeating the
+                call with the same key returns the journaled result instead of
+                sending it again (see :mod:`fossbilling.idempotency`).
             **kwargs: Additional renewal options (e.g., period)
             
         Returns:
             Updated service details
         """
-        return self._post(f"{service_id}/renew", data=kwargs)
+        return self._post(f"{service_id}/renew", data=kwargs, idempotency_key=idempotency_key)
     
     def suspend(self, service_id: int, reason: str = '') -> Dict[str, Any]:
         """
@@ -112,3 +180,140 @@ class ServiceResource(BaseResource):
             Updated service details
         """
         return self._post(f"{service_id}/cancel", data={'reason': reason})
+    
+    def bulk_renew(self, service_ids: Iterable[int],
+                   max_workers: int = DEFAULT_MAX_WORKERS, **kwargs) -> BulkResult:
+        """
+        Renew many services concurrently.
+        
+        Args:
+            service_ids: The IDs of the services to renew
+            max_workers: Maximum number of requests in flight
+            **kwargs: Renewal options (e.g., period), applied to every service
+            
+        Returns:
+            BulkResult with the updated service details or the error for each ID
+        """
+        return self._bulk(self.renew, service_ids, max_workers=max_workers, **kwargs)
+    
+    def bulk_suspend(self, service_ids: Iterable[int], reason: str = '',
+                     max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Suspend many services concurrently.
+        
+        Args:
+            service_ids: The IDs of the services to suspend
+            reason: Reason for suspension, applied to every service
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            BulkResult with the updated service details or the error for each ID
+        """
+        return self._bulk(self.suspend, service_ids, max_workers=max_workers, reason=reason)
+    
+    def bulk_unsuspend(self, service_ids: Iterable[int],
+                       max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Unsuspend many services concurrently.
+        
+        Args:
+            service_ids: The IDs of the services to unsuspend
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            BulkResult with the updated service details or the error for each ID
+        """
+        return self._bulk(self.unsuspend, service_ids, max_workers=max_workers)
+    
+    def bulk_cancel(self, service_ids: Iterable[int], reason: str = '',
+                    max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """
+        Cancel many services concurrently.
+        
+        Args:
+            service_ids: The IDs of the services to cancel
+            reason: Reason for cancellation, applied to every service
+            max_workers: Maximum number of requests in flight
+            
+        Returns:
+            BulkResult with the updated service details or the error for each ID
+        """
+        return self._bulk(self.cancel, service_ids, max_workers=max_workers, reason=reason)
+
+
+class AsyncServiceResource(AsyncBaseResource):
+    """Interact with service-related endpoints from an :class:`~fossbilling.AsyncClient`."""
+    
+    _model = ServiceModel
+    
+    def __init__(self, client):
+        super().__init__(client)
+        self._endpoint = 'admin/service'
+    
+    async def list(self, typed: bool = False, **params) -> List[Any]:
+        """List all services. See :meth:`ServiceResource.list`."""
+        return self._typed_list((await self._get('', params=params)).get('list', []), typed)
+    
+    def iter_all(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                 typed: bool = False, **params) -> AsyncIterator[Any]:
+        """Asynchronously iterate over all services. See :meth:`ServiceResource.iter_all`."""
+        return self._iter_all('', params=params, per_page=per_page, max_items=max_items,
+                              typed=typed)
+    
+    async def get(self, service_id: int, typed: bool = False) -> Any:
+        """Get a service by ID. See :meth:`ServiceResource.get`."""
+        return self._typed(await self._get(str(service_id)), typed)
+    
+    async def get_many(self, service_ids: Iterable[int], max_workers: int = DEFAULT_MAX_WORKERS,
+                       typed: bool = False, via_list: bool = False,
+                       per_page: int = DEFAULT_PER_PAGE, **params) -> BulkResult:
+        """Get many services by ID concurrently. See :meth:`ServiceResource.get_many`."""
+        return await self._get_many(service_ids, max_workers=max_workers, typed=typed,
+                                    via_list=via_list, per_page=per_page, params=params)
+    
+    async def update(self, service_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update a service. See :meth:`ServiceResource.update`."""
+        return await self._put(str(service_id), data=data)
+    
+    async def delete(self, service_id: int) -> bool:
+        """Delete a service. See :meth:`ServiceResource.delete`."""
+        await self._delete(str(service_id))
+        return True
+    
+    async def renew(self, service_id: int, idempotency_key: Optional[str] = None,
+                    **kwargs) -> Dict[str, Any]:
+        """Renew a service. See :meth:`ServiceResource.renew`."""
+        return await self._post(f"{service_id}/renew", data=kwargs,
+                                idempotency_key=idempotency_key)
+    
+    async def suspend(self, service_id: int, reason: str = '') -> Dict[str, Any]:
+        """Suspend a service. See :meth:`ServiceResource.suspend`."""
+        return await self._post(f"{service_id}/suspend", data={'reason': reason})
+    
+    async def unsuspend(self, service_id: int) -> Dict[str, Any]:
+        """Unsuspend a suspended service. See :meth:`ServiceResource.unsuspend`."""
+        return await self._post(f"{service_id}/unsuspend")
+    
+    async def cancel(self, service_id: int, reason: str = '') -> Dict[str, Any]:
+        """Cancel a service. See :meth:`ServiceResource.cancel`."""
+        return await self._post(f"{service_id}/cancel", data={'reason': reason})
+    
+    async def bulk_renew(self, service_ids: Iterable[int],
+                         max_workers: int = DEFAULT_MAX_WORKERS, **kwargs) -> BulkResult:
+        """Renew many services concurrently. See :meth:`ServiceResource.bulk_renew`."""
+        return await self._bulk(self.renew, service_ids, max_workers=max_workers, **kwargs)
+    
+    async def bulk_suspend(self, service_ids: Iterable[int], reason: str = '',
+                           max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Suspend many services concurrently. See :meth:`ServiceResource.bulk_suspend`."""
+        return await self._bulk(self.suspend, service_ids, max_workers=max_workers, reason=reason)
+    
+    async def bulk_unsuspend(self, service_ids: Iterable[int],
+                             max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Unsuspend many services concurrently. See :meth:`ServiceResource.bulk_unsuspend`."""
+        return await self._bulk(self.unsuspend, service_ids, max_workers=max_workers)
+    
+    async def bulk_cancel(self, service_ids: Iterable[int], reason: str = '',
+                          max_workers: int = DEFAULT_MAX_WORKERS) -> BulkResult:
+        """Cancel many services concurrently. See :meth:`ServiceResource.bulk_cancel`."""
+        return await self._bulk(self.cancel, service_ids, max_workers=max_workers, reason=reason)
@@ -1,9 +1,15 @@
 """
 System resource for the FOSSBilling API.
 """
-from typing import Any, Dict, List, Optional
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional
 
-from .base import BaseResource
+from ..pagination import DEFAULT_PER_PAGE
+from ..tail import DEFAULT_DEDUPE_WINDOW, AdaptiveInterval, LogCursor
+from .base import AsyncBaseResource, BaseResource
+
+if TYPE_CHECKING:
+    import threading
 
 class SystemResource(BaseResource):
     """Interact with system-related endpoints."""
@@ -72,6 +78,85 @@ class SystemResource(BaseResource):
         """
         return self._get('logs', params=params).get('list', [])
     
+    def iter_logs(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                  workers: Optional[int] = None, ordered: bool = True,
+                  **params) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over all system log entries, fetching pages as needed.
+        
+        The next page is fetched in the background while the current one is
+        consumed, and only one or two pages are held in memory at a time.
+        
+        Args:
+            per_page: Number of entries to fetch per request
+            max_items: Stop after this many entries (default: no limit)
+            workers: Fetch pages concurrently with this many threads once the
+                first page reports the page count (default: sequential)
+            ordered: With ``workers``, yield in page order (default: True)
+                or as pages arrive
+            **params: Additional query parameters (e.g., type, search)
+            
+        Yields:
+            Log entry dictionaries
+        """
+        return self._iter_all('logs', params=params, per_page=per_page, max_items=max_items,
+                              workers=workers, ordered=ordered)
+    
+    def follow_logs(self, interval: float = 1.0, max_interval: float = 30.0, backlog: int = 0,
+                    per_page: int = DEFAULT_PER_PAGE, mark: str = 'id', newest_first: bool = True,
+                    dedupe_window: int = DEFAULT_DEDUPE_WINDOW,
+                    stop: Optional['threading.Event'] = None,
+                    **params) -> Iterator[Dict[str, Any]]:
+        """
+        Follow the system log like ``tail -f``, yielding entries as they are added.
+        
+        Each poll fetches only the pages holding entries newer than the last
+        one seen, and entries already reported (within the last
+        ``dedupe_window``) are never yielded twice. The delay between polls
+        starts at ``interval``, doubles after every poll that finds nothing, up
+        to ``max_interval``, and returns to ``interval`` as soon as new
+        entries appear.
+        
+        Args:
+            interval: Seconds between polls while entries keep arriving
+            max_interval: Longest delay between polls while the log is quiet
+            backlog: Number of existing entries to yield first (at most
+                ``per_page``; default: 0, only new entries)
+            per_page: Number of entries to fetch per request
+            mark: Field that grows with every new entry: ``'id'`` (default)
+                or a timestamp such as ``'created_at'``
+            newest_first: Whether the server lists the newest entries first
+                (default: True, as FOSSBilling does)
+            dedupe_window: Number of recent entries remembered to drop
+                duplicates
+            stop: Event that ends the generator when set, also interrupting
+                the wait between polls (default: follow until the generator
+                is closed)
+            **params: Server-side filters (e.g., type, search)
+            
+        Yields:
+            New log entry dictionaries, oldest first
+        
+        Example:
+            for entry in client.system.follow_logs(type='error', backlog=10):
+                print(entry['created_at'], entry['message'])
+        """
+        cursor = LogCursor(backlog=backlog, mark=mark, newest_first=newest_first,
+                           dedupe_window=dedupe_window)
+        delay = AdaptiveInterval(interval, max_interval)
+        while stop is None or not stop.is_set():
+            page: Optional[int] = cursor.first_page(per_page)
+            while page is not None:
+                page = cursor.feed(self._get('logs', params={**params, 'page': page,
+                                                             'per_page': per_page}))
+            entries = cursor.take()
+            yield from entries
+            wait = delay.next(bool(entries))
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return
+    
     def clear_cache(self) -> bool:
         """
         Clear system cache.
@@ -81,3 +166,70 @@ class SystemResource(BaseResource):
         """
         self._post('cache/clear')
         return True
+
+
+class AsyncSystemResource(AsyncBaseResource):
+    """Interact with system-related endpoints from an :class:`~fossbilling.AsyncClient`."""
+    
+    def __init__(self, client):
+        super().__init__(client)
+        self._endpoint = 'admin/system'
+    
+    async def info(self) -> Dict[str, Any]:
+        """Get system information. See :meth:`SystemResource.info`."""
+        return await self._get('info')
+    
+    async def stats(self) -> Dict[str, Any]:
+        """Get system statistics. See :meth:`SystemResource.stats`."""
+        return await self._get('stats')
+    
+    async def health_check(self) -> Dict[str, Any]:
+        """Perform a health check. See :meth:`SystemResource.health_check`."""
+        return await self._get('health')
+    
+    async def get_config(self) -> Dict[str, Any]:
+        """Get system configuration. See :meth:`SystemResource.get_config`."""
+        return await self._get('config')
+    
+    async def update_config(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update system configuration. See :meth:`SystemResource.update_config`."""
+        return await self._post('config', data=data)
+    
+    async def get_logs(self, **params) -> List[Dict[str, Any]]:
+        """Get system logs. See :meth:`SystemResource.get_logs`."""
+        return (await self._get('logs', params=params)).get('list', [])
+    
+    def iter_logs(self, per_page: int = DEFAULT_PER_PAGE, max_items: Optional[int] = None,
+                  **params) -> AsyncIterator[Dict[str, Any]]:
+        """Asynchronously iterate over all system log entries. See :meth:`SystemResource.iter_logs`."""
+        return self._iter_all('logs', params=params, per_page=per_page, max_items=max_items)
+    
+    async def follow_logs(self, interval: float = 1.0, max_interval: float = 30.0,
+                          backlog: int = 0, per_page: int = DEFAULT_PER_PAGE, mark: str = 'id',
+                          newest_first: bool = True,
+                          dedupe_window: int = DEFAULT_DEDUPE_WINDOW,
+                          **params) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchronously follow the system log. See :meth:`SystemResource.follow_logs`.
+
+        Cancel the task or close the generator to stop.
+        """
+        import asyncio
+        
+        cursor = LogCursor(backlog=backlog, mark=mark, newest_first=newest_first,
+                           dedupe_window=dedupe_window)
+        delay = AdaptiveInterval(interval, max_interval)
+        while True:
+            page: Optional[int] = cursor.first_page(per_page)
+            while page is not None:
+                page = cursor.feed(await self._get('logs', params={**params, 'page': page,
+                                                                   'per_page': per_page}))
+            entries = cursor.take()
+            for entry in entries:
+                yield entry
+            await asyncio.sleep(delay.next(bool(entries)))
+    
+    async def clear_cache(self) -> bool:
+        """Clear system cache. See :meth:`SystemResource.clear_cache`."""
+        await self._post('cache/clear')
+        return True
@@ -0,0 +1,155 @@
+"""
+Retry and rate limiting for FOSSBilling API requests.
+"""
+import random
+import threading
+import time
+from typing import Collection, Optional
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a ``Retry-After`` header value.
+
+    Args:
+        value: Either a number of seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    # HTTP dates are rare here; keep the email package off the import path.
+    import email.utils
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """
+    Retry transient failures with exponential backoff and jitter.
+
+    Connection errors and responses with a status in ``retry_statuses`` are
+    retried for methods in ``retry_methods``, which by default include PUT
+    and DELETE as well as the read-only methods. Other methods, such as POST
+    actions, are only retried when the call opts in explicitly.
+
+    Args:
+        max_retries: Maximum number of retries after the first attempt (default: 3)
+        backoff_factor: Base delay in seconds; attempt ``n`` waits up to
+            ``backoff_factor * 2 ** n`` (default: 0.5)
+        max_backoff: Upper bound for a single backoff delay (default: 30)
+        jitter: Randomize delays ("full jitter") to spread out retries from
+            many workers (default: True)
+        retry_statuses: HTTP status codes that are retried (default: 429, 502, 503, 504)
+        retry_methods: HTTP methods retried by default (default: GET, HEAD,
+            OPTIONS, PUT and DELETE)
+        respect_retry_after: Wait for the duration given by a ``Retry-After``
+            header when present; a request the server asks to delay for
+            longer than ``max_backoff`` is not retried (default: True)
+    """
+
+    def __init__(self, max_retries: int = 3, backoff_factor: float = 0.5,
+                 max_backoff: float = 30.0, jitter: bool = True,
+                 retry_statuses: Collection[int] = RETRY_STATUSES,
+                 retry_methods: Collection[str] = IDEMPOTENT_METHODS,
+                 respect_retry_after: bool = True):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset(method.upper() for method in retry_methods)
+        self.respect_retry_after = respect_retry_after
+
+    def allows(self, method: str, retry: Optional[bool] = None) -> bool:
+        """
+        Return whether requests with ``method`` may be retried.
+
+        Args:
+            method: HTTP method
+            retry: Per-call override; True opts a non-idempotent call in,
+                False opts any call out
+        """
+        if retry is not None:
+            return retry
+        return method.upper() in self.retry_methods
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Return the delay in seconds before retry number ``attempt`` (0-based).
+
+        Args:
+            attempt: Number of retries already made
+            retry_after: ``Retry-After`` header of the failed response, if any
+
+        Returns:
+            The delay, or None if ``retry_after`` asks for a longer wait than
+            ``max_backoff``, in which case the request should not be retried
+        """
+        if self.respect_retry_after:
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                return delay if delay <= self.max_backoff else None
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class RateLimiter:
+    """
+    Client-side token bucket rate limiter, safe to share across threads.
+
+    Each request takes one token; tokens refill at ``rate`` per second up to
+    ``burst``. Share one limiter between clients to cap their combined rate.
+
+    Args:
+        rate: Sustained requests per second
+        burst: Maximum number of requests that may be sent back-to-back
+            (default: ``rate``, at least 1)
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token and return how many seconds to wait before using it.
+
+        The token is reserved immediately, so concurrent callers queue up
+        behind each other instead of all waking at once.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
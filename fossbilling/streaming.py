@@ -0,0 +1,79 @@
+"""
+Helpers for streaming response bodies to files without buffering them in memory.
+"""
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, Tuple, Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+Destination = Union[str, 'os.PathLike[str]', BinaryIO]
+
+
+def _create_temp(directory: str) -> Tuple[int, str]:
+    """
+    Create an empty temporary file in ``directory`` and return its descriptor and path.
+
+    Unlike :func:`tempfile.mkstemp`, which always uses mode 0600, the file
+    gets mode ``0o666 & ~umask`` like any file created with ``open()``, and
+    keeps it once it replaces the destination. The kernel applies the umask,
+    so it never has to be changed to be read, which would race with other
+    threads creating files.
+    """
+    import secrets
+
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        tmp_path = os.path.join(directory, f'.{secrets.token_hex(8)}.part')
+        try:
+            return os.open(tmp_path, flags, 0o666), tmp_path
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def open_destination(dest: Destination) -> Iterator[BinaryIO]:
+    """
+    Open a download destination for writing.
+
+    File-like objects are written to as-is and left open. For paths, data is
+    written to a temporary file in the same directory, which replaces the
+    target only once the download completes, so a failed download never
+    leaves a truncated file behind. The file gets the default permissions
+    of new files (``0o666`` less the umask).
+
+    Args:
+        dest: A filesystem path or a writable binary file-like object
+    """
+    if hasattr(dest, 'write'):
+        yield dest  # type: ignore[misc]
+        return
+
+    path = os.fspath(dest)
+    fd, tmp_path = _create_temp(os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            yield fh
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_chunks(chunks: Iterable[bytes], dest: Destination) -> int:
+    """
+    Write an iterable of byte chunks to a path or file-like object.
+
+    Returns:
+        The number of bytes written
+    """
+    written = 0
+    with open_destination(dest) as fh:
+        for chunk in chunks:
+            if chunk:
+                fh.write(chunk)
+                written += len(chunk)
+    return written
@@ -0,0 +1,166 @@
+"""
+Following the system log: fetch only the entries added since the last poll.
+
+A :class:`LogCursor` remembers the newest entry seen (by ID, or by another
+field such as ``created_at``) and decides, page by page, when a poll has
+reached entries it already reported, so every poll downloads only the delta.
+A bounded window of recently seen entries drops duplicates caused by pages
+shifting while new entries arrive. :class:`AdaptiveInterval` polls quickly
+while the log is busy and backs off while it is quiet.
+
+Use it through :meth:`SystemResource.follow_logs
+<fossbilling.resources.system.SystemResource.follow_logs>`.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .models import parse_datetime, parse_int
+from .sync import record_hash
+
+#: Number of recently reported entries remembered for de-duplication
+DEFAULT_DEDUPE_WINDOW = 1000
+
+
+class AdaptiveInterval:
+    """
+    Polling interval that backs off while polls come back empty.
+
+    Args:
+        interval: Delay after a poll that found entries, in seconds
+        max_interval: Upper bound of the delay while the log is quiet
+        factor: Multiplier applied to the delay after each empty poll
+    """
+
+    def __init__(self, interval: float = 1.0, max_interval: float = 30.0, factor: float = 2.0):
+        if interval <= 0 or max_interval < interval:
+            raise ValueError("interval must be positive and at most max_interval")
+        self.interval = interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.current = interval
+
+    def next(self, found: bool) -> float:
+        """Return the delay before the next poll, given whether this one found entries."""
+        if found:
+            self.current = self.interval
+        else:
+            self.current = min(self.current * self.factor, self.max_interval)
+        return self.current
+
+
+class LogCursor:
+    """
+    Position in a log listing between polls.
+
+    A poll starts at :meth:`first_page`; every fetched page is passed to
+    :meth:`feed`, which returns the next page to fetch or None when the poll
+    has reached known entries; :meth:`take` then returns the new entries.
+
+    Args:
+        backlog: Number of existing entries reported by the first poll
+            (at most one page; default: 0, only entries added later)
+        mark: Field that grows with every new entry (default: ``'id'``;
+            ``'created_at'`` also works)
+        newest_first: Whether the listing returns the newest entries first,
+            as FOSSBilling does (default: True)
+        dedupe_window: Number of recently reported entries remembered to
+            drop duplicates
+    """
+
+    def __init__(self, backlog: int = 0, mark: str = 'id', newest_first: bool = True,
+                 dedupe_window: int = DEFAULT_DEDUPE_WINDOW):
+        self.backlog = backlog
+        self.mark = mark
+        self.newest_first = newest_first
+        self.dedupe_window = dedupe_window
+        #: Mark of the newest entry reported so far; None before the first poll
+        self.position: Any = None
+        #: Entries before the first unseen one, for oldest-first listings
+        self.offset = 0
+        self._started = False
+        self._seen: 'OrderedDict[Any, None]' = OrderedDict()
+        self._new: List[Dict[str, Any]] = []
+        self._new_keys: set = set()
+
+    def _mark_value(self, entry: Dict[str, Any]) -> Any:
+        value = entry.get(self.mark)
+        if self.mark == 'id':
+            return parse_int(value)
+        return parse_datetime(value)
+
+    @staticmethod
+    def _key(entry: Dict[str, Any]) -> Any:
+        entry_id = entry.get('id')
+        return entry_id if entry_id is not None else record_hash(entry)
+
+    def _is_new(self, entry: Dict[str, Any]) -> bool:
+        key = self._key(entry)
+        if key in self._seen or key in self._new_keys:
+            return False
+        value = self._mark_value(entry)
+        # Entries sharing the newest mark (e.g. the same timestamp) are told
+        # apart by the de-duplication window.
+        return self.position is None or value is None or value >= self.position
+
+    def first_page(self, per_page: int) -> int:
+        """Return the page a poll starts at."""
+        if self.newest_first or not self._started:
+            return 1
+        return self.offset // per_page + 1
+
+    def feed(self, response: Dict[str, Any]) -> Optional[int]:
+        """
+        Process one page of the listing.
+
+        Returns:
+            The next page to fetch in this poll, or None when the poll is done
+        """
+        entries = response.get('list') or []
+        page = parse_int(response.get('page')) or 1
+        pages = parse_int(response.get('pages')) or 1
+
+        if not self._started:
+            if not self.newest_first and page < pages:
+                return pages  # the newest entries are on the last page
+            self._start(entries, response)
+            return None
+
+        reached_known = False
+        for entry in entries:
+            if self._is_new(entry):
+                self._new.append(entry)
+                self._new_keys.add(self._key(entry))
+            elif self.newest_first:
+                reached_known = True
+        if not self.newest_first:
+            self.offset = parse_int(response.get('total')) or self.offset + len(entries)
+        if reached_known or not entries or page >= pages:
+            return None
+        return page + 1
+
+    def _start(self, entries: List[Dict[str, Any]], response: Dict[str, Any]) -> None:
+        """Take position at the newest entries on the first poll."""
+        self._started = True
+        self._remember(entries[::-1] if self.newest_first else entries)
+        if self.backlog > 0:
+            # Kept in listing order, like the entries of later polls.
+            self._new = entries[:self.backlog] if self.newest_first else entries[-self.backlog:]
+        if not self.newest_first:
+            self.offset = parse_int(response.get('total')) or len(entries)
+
+    def _remember(self, entries: List[Dict[str, Any]]) -> None:
+        for entry in entries:
+            value = self._mark_value(entry)
+            if value is not None and (self.position is None or value > self.position):
+                self.position = value
+            self._seen[self._key(entry)] = None
+        while len(self._seen) > self.dedupe_window:
+            self._seen.popitem(last=False)
+
+    def take(self) -> List[Dict[str, Any]]:
+        """Return the new entries of the poll, oldest first, and mark them seen."""
+        new = self._new[::-1] if self.newest_first else self._new
+        self._new = []
+        self._new_keys = set()
+        self._remember(new)
+        return new
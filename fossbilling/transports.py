@@ -0,0 +1,529 @@
+"""
+Transports: the layer that sends the HTTP requests of a :class:`~fossbilling.Client`.
+
+The client prepares every request (URL, headers, encoded body) and handles
+retries, hooks, caching and errors; a transport only sends the request and
+returns the response. Three transports are provided:
+
+- :class:`RequestsTransport`, the default: a ``requests.Session`` with a
+  tuned connection pool
+- :class:`HTTPXTransport`: ``httpx`` with HTTP/2, so concurrent requests
+  from many threads share one multiplexed connection per host
+  (``pip install fossbilling[http2]``)
+- :class:`InMemoryTransport`: dispatches requests to Python handlers,
+  without a network, for tests and for measuring the SDK's own overhead
+
+Responses only need the parts of ``requests.Response`` the client uses:
+``status_code``, ``ok``, ``headers``, ``content``, ``text``, ``json()``,
+``iter_content()`` and ``close()``, as provided by :class:`Response`.
+"""
+import gzip
+import threading
+import zlib
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Mapping, MutableMapping, Optional,
+    Sequence, Tuple, Type,
+)
+from urllib.parse import urlsplit
+
+from .codecs import JSONCodec, get_codec
+from .compression import httpx_encodings, requests_encodings
+from .exceptions import FOSSBillingException
+
+if TYPE_CHECKING:  # pragma: no cover
+    import requests
+
+    from .adapters import SocketOption
+
+
+class TransportError(FOSSBillingException):
+    """A request could not be sent or its response could not be read."""
+
+
+class Headers(MutableMapping[str, str]):
+    """HTTP headers, looked up case-insensitively and kept in their original case."""
+
+    __slots__ = ('_items',)
+
+    def __init__(self, headers: Optional[Mapping[str, str]] = None, **kwargs: str):
+        # lower-case name -> (name, value)
+        self._items: Dict[str, Tuple[str, str]] = {}
+        self.update(headers or {}, **kwargs)
+
+    def __getitem__(self, name: str) -> str:
+        return self._items[name.lower()][1]
+
+    def __setitem__(self, name: str, value: str) -> None:
+        self._items[name.lower()] = (name, value)
+
+    def __delitem__(self, name: str) -> None:
+        del self._items[name.lower()]
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, _ in self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class Transport:
+    """
+    Interface of the transports.
+
+    Attributes:
+        headers: Headers sent with every request; the client adds its
+            default headers (API key, content negotiation) on first use
+        errors: Exception types the transport raises for connection
+            failures; the client retries them and reports them as
+            :class:`~fossbilling.exceptions.APIError`
+    """
+
+    errors: Tuple[Type[BaseException], ...] = (TransportError,)
+
+    def __init__(self):
+        self._headers = Headers()
+
+    @property
+    def headers(self) -> MutableMapping[str, str]:
+        return self._headers
+
+    def encodings(self) -> Tuple[str, ...]:
+        """Content codings the transport can decode, best first."""
+        return ()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """
+        Send a request and return its response.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            **kwargs: ``params``, ``data`` (encoded body bytes), ``headers``,
+                ``timeout`` and ``stream``, as for ``requests.request()``
+
+        Returns:
+            A response with the interface of :class:`Response`
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release connections and other resources."""
+
+
+class Response:
+    """
+    A response built by a transport, with the interface of ``requests.Response``.
+
+    Args:
+        status_code: HTTP status code
+        headers: Response headers, looked up case-insensitively
+        content: Body bytes; ignored when ``chunks`` is given
+        request: The request the response answers
+        chunks: Callable returning an iterator over the body in chunks of
+            the given size, for streamed responses
+        on_close: Called by :meth:`close`
+    """
+
+    def __init__(self, status_code: int = 200, headers: Optional[Mapping[str, str]] = None,
+                 content: bytes = b'', request: Any = None,
+                 chunks: Optional[Callable[[int], Iterator[bytes]]] = None,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.status_code = status_code
+        self.headers = Headers(headers)
+        self.request = request
+        self._content = None if chunks is not None else content
+        self._chunks = chunks
+        self._on_close = on_close
+
+    @property
+    def ok(self) -> bool:
+        """True for status codes below 400."""
+        return self.status_code < 400
+
+    @property
+    def content(self) -> bytes:
+        """The whole body; reads a streamed body to the end."""
+        if self._content is None:
+            self._content = b''.join(self._chunks(64 * 1024))
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        """Decode the body as JSON; raises ``ValueError`` if it is not."""
+        return get_codec().loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        """Iterate over the body in chunks of up to ``chunk_size`` bytes."""
+        if self._content is None:
+            return self._chunks(chunk_size)
+        content = self._content
+        return (content[i:i + chunk_size] for i in range(0, len(content), chunk_size))
+
+    def close(self) -> None:
+        if self._on_close is not None:
+            self._on_close()
+
+    def __repr__(self) -> str:
+        return f"<Response [{self.status_code}]>"
+
+
+class RequestsTransport(Transport):
+    """
+    Requests sent through a ``requests.Session`` with a tuned connection pool.
+
+    The session is created on first use, so ``requests`` is only imported
+    once a request is made. Requests are passed to ``Session.request()`` as
+    they are, and its exceptions are reported as they are to hooks.
+
+    Args:
+        pool_connections: Number of per-host connection pools to cache (default: 10)
+        pool_maxsize: Maximum number of connections kept per host (default: 10)
+        pool_block: Block when all ``pool_maxsize`` connections are busy
+            instead of opening extra, non-pooled connections (default: False)
+        keep_alive: Reuse connections between requests (default: True)
+        socket_options: TCP socket options for new connections, e.g. from
+            :func:`fossbilling.adapters.tcp_socket_options` (default: the
+            urllib3 defaults, which enable TCP_NODELAY)
+        session: Use this session instead of creating one; it is used as it
+            is, without mounting the pool adapter
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False, keep_alive: bool = True,
+                 socket_options: Optional[Sequence['SocketOption']] = None,
+                 session: Optional['requests.Session'] = None):
+        super().__init__()
+        self._pool_options = {
+            'pool_connections': pool_connections,
+            'pool_maxsize': pool_maxsize,
+            'pool_block': pool_block,
+        }
+        self._socket_options = socket_options
+        self._keep_alive = keep_alive
+        self._session = session
+        self._session_lock = threading.Lock()
+
+    @property
+    def errors(self) -> Tuple[Type[BaseException], ...]:  # type: ignore[override]
+        from requests.exceptions import RequestException
+
+        return (RequestException,)
+
+    @property
+    def session(self) -> 'requests.Session':
+        """The ``requests.Session`` used for every request, created on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    @property
+    def headers(self) -> Any:
+        return self.session.headers
+
+    def _create_session(self) -> 'requests.Session':
+        """Build the session and mount the tuned connection pool adapter."""
+        import requests
+
+        from .adapters import PoolAdapter
+
+        session = requests.Session()
+        if not self._keep_alive:
+            session.headers['Connection'] = 'close'
+
+        adapter = PoolAdapter(socket_options=self._socket_options, **self._pool_options)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def encodings(self) -> Tuple[str, ...]:
+        return requests_encodings()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> 'requests.Response':
+        return self.session.request(method, url, **kwargs)
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+
+class HTTPXTransport(Transport):
+    """
+    Requests sent with ``httpx``, over HTTP/2 by default.
+
+    With HTTP/2, the requests of every thread sharing the client are
+    multiplexed over one connection per host instead of one connection per
+    concurrent request, which saves connection setup and TLS handshakes.
+    HTTP/2 is negotiated over TLS; plain ``http://`` URLs and servers without
+    HTTP/2 fall back to HTTP/1.1.
+
+    Args:
+        http2: Negotiate HTTP/2 (default: True)
+        max_connections: Maximum number of open connections (default: 100)
+        max_keepalive_connections: Maximum number of idle connections kept
+            alive (default: 20)
+        keepalive_expiry: Seconds an idle connection is kept alive (default: 5)
+        **options: Passed to ``httpx.Client`` (e.g. ``verify``, ``proxy``)
+
+    Other arguments given to :meth:`request` are passed to
+    ``httpx.Client.build_request()``, except ``allow_redirects``, which is
+    translated to httpx's ``follow_redirects``.
+
+    Raises:
+        ImportError: If httpx, or h2 for HTTP/2, is not installed
+    """
+
+    def __init__(self, http2: bool = True, max_connections: int = 100,
+                 max_keepalive_connections: int = 20, keepalive_expiry: float = 5.0,
+                 **options: Any):
+        try:
+            import httpx
+            if http2:
+                import h2  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "HTTPXTransport requires httpx and h2; install them with "
+                "'pip install fossbilling[http2]'"
+            ) from None
+        super().__init__()
+        self._httpx = httpx
+        self.errors = (httpx.HTTPError, httpx.StreamError)
+        self.client = httpx.Client(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            **options,
+        )
+
+    @property
+    def headers(self) -> Any:
+        return self.client.headers
+
+    def encodings(self) -> Tuple[str, ...]:
+        return httpx_encodings()
+
+    def request(self, method: str, url: str, params: Optional[Mapping[str, Any]] = None,
+                data: Optional[bytes] = None, headers: Optional[Mapping[str, str]] = None,
+                timeout: Optional[float] = None, stream: bool = False,
+                **kwargs: Any) -> Response:
+        if params is not None:
+            # Like requests, leave out parameters whose value is None.
+            params = {name: value for name, value in params.items() if value is not None}
+        send_options = {}
+        if 'allow_redirects' in kwargs:
+            send_options['follow_redirects'] = kwargs.pop('allow_redirects')
+        if isinstance(data, (bytes, bytearray, str)):
+            kwargs['content'] = data
+        elif data is not None:
+            # Form fields, as requests sends a mapping given as ``data``.
+            kwargs['data'] = data
+        request = self.client.build_request(method, url, params=params, headers=headers,
+                                            timeout=timeout, **kwargs)
+        response = self.client.send(request, stream=stream, **send_options)
+        return _HTTPXResponse(response, stream)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class _HTTPXResponse(Response):
+    """An ``httpx.Response`` behind the interface of ``requests.Response``."""
+
+    def __init__(self, response: Any, stream: bool):
+        super().__init__(response.status_code, response.headers, request=response.request,
+                         on_close=response.close)
+        self._response = response
+        if stream:
+            self._content = None
+            self._chunks = response.iter_bytes
+        else:
+            self._content = response.content
+
+    @property
+    def http_version(self) -> str:
+        """Protocol of the response, e.g. ``'HTTP/2'``."""
+        return self._response.http_version
+
+    @property
+    def num_bytes_downloaded(self) -> int:
+        """Body bytes read from the connection, before decoding (for metrics hooks)."""
+        return self._response.num_bytes_downloaded
+
+
+#: A handler of the in-memory transport: takes the request and returns a
+#: :class:`Response`, body bytes, or any JSON-serialisable value
+Handler = Callable[['Request'], Any]
+
+
+class Request:
+    """
+    A request received by an :class:`InMemoryTransport` handler.
+
+    Attributes:
+        method: HTTP method, upper case
+        url: Absolute URL
+        endpoint: API endpoint, the path after ``/api/`` (e.g. ``'admin/client/get/1'``)
+        params: Query parameters
+        headers: Request headers, including the client's default headers,
+            looked up case-insensitively
+        body: Request body bytes, as sent (possibly compressed)
+    """
+
+    __slots__ = ('method', 'url', 'endpoint', 'params', 'headers', 'body')
+
+    def __init__(self, method: str, url: str, endpoint: str, params: Dict[str, Any],
+                 headers: Headers, body: bytes):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.params = params
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        """Decode the JSON body, decompressing it first if needed; None if empty."""
+        body = self.body
+        encoding = self.headers.get('Content-Encoding')
+        if encoding == 'gzip':
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+        return get_codec().loads(body) if body else None
+
+    def __repr__(self) -> str:
+        return f"<Request {self.method} {self.endpoint}>"
+
+
+class InMemoryTransport(Transport):
+    """
+    Requests dispatched to Python handlers, without a network.
+
+    Handlers are registered per endpoint. An endpoint also matches the
+    endpoints below it, the longest registered one winning, so a handler for
+    ``'admin/invoice'`` receives ``'admin/invoice/12/pdf'`` too, and a
+    handler for ``''`` receives every request. Requests to unknown endpoints
+    get a 404 response. A handler returns a
+    :class:`Response` for full control, bytes for a raw body, or any other
+    value to be sent as JSON; raising :class:`TransportError` simulates a
+    connection failure.
+
+    Args:
+        handlers: Mapping of endpoint to handler
+        codec: JSON codec encoding handler results (default: 'auto')
+
+    Example:
+        transport = InMemoryTransport({
+            'admin/system/info': lambda request: {'version': '0.6.0'},
+        })
+        client = Client('https://billing.test/', 'key', transport=transport)
+        assert client.system.info() == {'version': '0.6.0'}
+    """
+
+    def __init__(self, handlers: Optional[Mapping[str, Handler]] = None,
+                 codec: Any = 'auto'):
+        super().__init__()
+        self.codec: JSONCodec = get_codec(codec)
+        self._handlers: Dict[str, Handler] = {}
+        # (endpoint, method) pairs, most specific first
+        self._routes: List[Tuple[str, Optional[str]]] = []
+        for endpoint, handler in (handlers or {}).items():
+            self.route(endpoint, handler)
+
+    def route(self, endpoint: str, handler: Optional[Handler] = None,
+              method: Optional[str] = None) -> Any:
+        """
+        Register a handler for an endpoint, optionally for one HTTP method only.
+
+        Can be used as a decorator when ``handler`` is omitted::
+
+            @transport.route('admin/client/get', method='GET')
+            def get_client(request):
+                return {'id': int(request.endpoint.rsplit('/', 1)[-1])}
+        """
+        if handler is None:
+            def decorator(function: Handler) -> Handler:
+                self.route(endpoint, function, method)
+                return function
+            return decorator
+        endpoint = endpoint.strip('/')
+        method = method.upper() if method else None
+        self._handlers[f'{method} {endpoint}' if method else endpoint] = handler
+        if (endpoint, method) not in self._routes:
+            self._routes.append((endpoint, method))
+            # Longest endpoint first; method-specific before catch-all.
+            self._routes.sort(key=lambda route: (-len(route[0]), route[1] is None))
+        return None
+
+    def _handler(self, method: str, endpoint: str) -> Optional[Handler]:
+        for route, route_method in self._routes:
+            if route_method is not None and route_method != method:
+                continue
+            if endpoint == route or endpoint.startswith(route + '/') or not route:
+                return self._handlers[f'{route_method} {route}' if route_method else route]
+        return None
+
+    def request(self, method: str, url: str, params: Optional[Mapping[str, Any]] = None,
+                data: Optional[bytes] = None, headers: Optional[Mapping[str, str]] = None,
+                timeout: Optional[float] = None, stream: bool = False,
+                **kwargs: Any) -> Response:
+        # Other ``requests`` arguments, e.g. allow_redirects or verify, do not
+        # apply without a network and are ignored.
+        path = urlsplit(url).path
+        endpoint = path.split('/api/', 1)[1] if '/api/' in path else path.lstrip('/')
+        request_headers = Headers(self.headers)
+        request_headers.update(headers or {})
+        body = data or b''
+        if body:
+            request_headers['Content-Length'] = str(len(body))
+        request = Request(method.upper(), url, endpoint,
+                          {name: value for name, value in (params or {}).items()
+                           if value is not None},
+                          request_headers, body)
+
+        handler = self._handler(request.method, endpoint)
+        if handler is None:
+            return self._json(404, {'error': {'message': f"No handler for {endpoint}"}}, request)
+        result = handler(request)
+        if isinstance(result, Response):
+            if result.request is None:
+                result.request = request
+            return result
+        if isinstance(result, (bytes, bytearray)):
+            return Response(200, {'Content-Length': str(len(result))}, bytes(result), request)
+        return self._json(200, result, request)
+
+    def _json(self, status_code: int, value: Any, request: Request) -> Response:
+        content = self.codec.dumps(value)
+        return Response(status_code, {'Content-Type': 'application/json',
+                                      'Content-Length': str(len(content))}, content, request)
+
+    def httpx_transport(self) -> Any:
+        """
+        Return an ``httpx`` transport dispatching to the same handlers.
+
+        Used by :class:`~fossbilling.AsyncClient` when it is given an
+        in-memory transport; handlers are called on the event loop thread.
+        """
+        import httpx
+
+        def handle(request: 'httpx.Request') -> 'httpx.Response':
+            try:
+                response = self.request(request.method, str(request.url),
+                                        params=dict(request.url.params), data=request.content,
+                                        headers=dict(request.headers))
+            except TransportError as e:
+                raise httpx.TransportError(str(e), request=request) from e
+            return httpx.Response(response.status_code, headers=dict(response.headers),
+                                  content=response.content, request=request)
+
+        return httpx.MockTransport(handle)
@@ -0,0 +1,145 @@
+"""
+Shared fixtures: a small in-memory FOSSBilling server and clients bound to it.
+"""
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from fossbilling import Client
+from fossbilling.transports import InMemoryTransport, Request, Response
+
+BASE_URL = 'https://billing.test/'
+API_KEY = 'test-key'
+
+#: Entity name -> endpoint of its resource
+ENDPOINTS = {
+    'clients': 'admin/client',
+    'invoices': 'admin/invoice',
+    'orders': 'admin/order',
+    'services': 'admin/service',
+    'logs': 'admin/system/logs',
+}
+
+
+class FakeBilling:
+    """
+    FOSSBilling stand-in served by an :class:`InMemoryTransport`.
+
+    Every entity is a list of records. Listings are paginated with ``page``
+    and ``per_page`` and filtered by equality on the other query
+    parameters; logs are listed newest first, as FOSSBilling does. Records
+    are read, created, updated and deleted by ID, and POSTs to
+    ``<id>/<action>`` succeed with ``True``. Every request is recorded in
+    :attr:`requests` as ``(method, endpoint, params)``.
+
+    Tests register their own handlers on :attr:`transport` for anything
+    else; the longest matching endpoint wins.
+    """
+
+    def __init__(self):
+        self.transport = InMemoryTransport()
+        self.records: Dict[str, List[Dict[str, Any]]] = {name: [] for name in ENDPOINTS}
+        self.requests: List[Tuple[str, str, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        for name, endpoint in ENDPOINTS.items():
+            self.transport.route(endpoint, self._handler(name, endpoint))
+
+    def add(self, entity: str, **fields: Any) -> Dict[str, Any]:
+        """Store a record, giving it the next ID unless it has one."""
+        with self._lock:
+            records = self.records[entity]
+            record = {'id': max((r['id'] for r in records), default=0) + 1, **fields}
+            records.append(record)
+        return record
+
+    def add_many(self, entity: str, count: int, **fields: Any) -> List[Dict[str, Any]]:
+        return [self.add(entity, **fields) for _ in range(count)]
+
+    def find(self, entity: str, record_id: Any) -> Optional[Dict[str, Any]]:
+        for record in self.records[entity]:
+            if str(record['id']) == str(record_id):
+                return record
+        return None
+
+    def calls(self, method: Optional[str] = None, endpoint: Optional[str] = None) -> int:
+        """Count the recorded requests, optionally by method and endpoint prefix."""
+        return sum(1 for m, e, _ in self.requests
+                   if (method is None or m == method)
+                   and (endpoint is None or e == endpoint or e.startswith(endpoint + '/')))
+
+    def _handler(self, entity: str, endpoint: str) -> Any:
+        def handle(request: Request) -> Any:
+            with self._lock:
+                self.requests.append((request.method, request.endpoint, dict(request.params)))
+            path = request.endpoint[len(endpoint):].strip('/')
+            record_id, _, action = path.partition('/')
+            if not record_id:
+                if request.method == 'POST':
+                    return self.add(entity, **(request.json() or {}))['id']
+                return self._listing(entity, request.params)
+            record = self.find(entity, record_id)
+            if record is None:
+                return Response(404, content=b'{"error": {"message": "Not found"}}')
+            if action:
+                return True
+            if request.method == 'PUT':
+                record.update(request.json() or {})
+                return True
+            if request.method == 'DELETE':
+                self.records[entity].remove(record)
+                return True
+            return record
+        return handle
+
+    def _listing(self, entity: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        filters = {name: value for name, value in params.items()
+                   if name not in ('page', 'per_page')}
+        records = [record for record in self.records[entity]
+                   if all(str(record.get(name)) == str(value) for name, value in filters.items())]
+        if entity == 'logs':
+            records = records[::-1]
+        page = int(params.get('page', 1))
+        per_page = int(params.get('per_page', 100))
+        return {
+            'list': records[(page - 1) * per_page:page * per_page],
+            'page': page,
+            'per_page': per_page,
+            'pages': max(1, -(-len(records) // per_page)),
+            'total': len(records),
+        }
+
+
+@pytest.fixture
+def billing() -> FakeBilling:
+    return FakeBilling()
+
+
+@pytest.fixture
+def client(billing: FakeBilling) -> Client:
+    with Client(BASE_URL, API_KEY, transport=billing.transport) as client:
+        yield client
+
+
+@pytest.fixture
+def make_client(billing: FakeBilling) -> Any:
+    """Build clients with extra options, bound to the fake server."""
+    def make(**options: Any) -> Client:
+        return Client(BASE_URL, API_KEY, transport=billing.transport, **options)
+    return make
+
+
+@pytest.fixture
+def make_async_client(billing: FakeBilling) -> Any:
+    """
+    Build async clients bound to the fake server.
+
+    Call it inside the coroutine that uses the client, so that it binds to
+    that coroutine's event loop.
+    """
+    pytest.importorskip('httpx')
+
+    def make(**options: Any) -> Any:
+        from fossbilling import AsyncClient
+        return AsyncClient(BASE_URL, API_KEY, transport=billing.transport, **options)
+    return make
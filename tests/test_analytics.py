@@ -0,0 +1,174 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from fossbilling import analytics
+from fossbilling.analytics import InvoiceTable, OrderTable, _cents
+
+INVOICES = [
+    {'id': 1, 'client_id': 1, 'currency': 'USD', 'status': 'paid', 'subtotal': '8.00',
+     'tax': '2.00', 'total': '10.00', 'created_at': '2024-01-05 09:00:00',
+     'due_at': '2024-01-15 00:00:00', 'paid_at': '2024-01-10 12:00:00'},
+    {'id': 2, 'client_id': 1, 'currency': 'USD', 'status': 'paid', 'total': '20.005',
+     'created_at': '2024-02-01 09:00:00', 'paid_at': '2024-02-03 12:00:00'},
+    {'id': 3, 'client_id': 2, 'currency': 'EUR', 'status': 'paid', 'total': '5.00',
+     'created_at': '2024-01-20 09:00:00', 'paid_at': '2024-02-15 12:00:00'},
+    {'id': 4, 'client_id': 2, 'currency': 'EUR', 'status': 'unpaid', 'total': '7.00',
+     'created_at': '2024-03-01 09:00:00', 'due_at': '2024-03-10 00:00:00'},
+    {'id': 5, 'client_id': 3, 'currency': 'USD', 'status': 'unpaid', 'total': '3.00',
+     'created_at': '2024-06-01 09:00:00', 'due_at': '2024-06-20 00:00:00'},
+    {'id': 6, 'client_id': 3, 'currency': 'USD', 'status': 'unpaid', 'total': '4.00',
+     'created_at': '2024-06-01 09:00:00', 'due_at': '2024-07-15 00:00:00'},
+    {'id': 7, 'client_id': 1, 'currency': 'USD', 'status': 'unpaid', 'total': '1.00',
+     'created_at': '2024-05-01 09:00:00', 'due_at': None},
+]
+
+ORDERS = [
+    {'id': 1, 'total': '10.00', 'activated_at': '2024-01-10 00:00:00'},
+    {'id': 2, 'total': '5.00', 'activated_at': '2024-01-20 00:00:00',
+     'canceled_at': '2024-02-05 00:00:00'},
+    {'id': 3, 'total': '7.00', 'created_at': '2024-02-01 00:00:00',
+     'canceled_at': '2024-03-10 00:00:00'},
+    {'id': 4, 'total': '1.00'},
+    {'id': 5, 'total': '2.00', 'activated_at': '2024-03-01 00:00:00'},
+]
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def use_numpy(request):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+        return True
+    return False
+
+
+@pytest.fixture
+def invoices(use_numpy):
+    return InvoiceTable.from_records(INVOICES, use_numpy=use_numpy)
+
+
+def test_totals(invoices):
+    assert [(row['period'], row['currency'], row['count'], row['total'])
+            for row in invoices.totals()] == [
+        ('2024-01', 'EUR', 1, Decimal('5.00')),
+        ('2024-01', 'USD', 1, Decimal('10.00')),
+        ('2024-02', 'USD', 1, Decimal('20.01')),
+        ('2024-03', 'EUR', 1, Decimal('7.00')),
+        ('2024-05', 'USD', 1, Decimal('1.00')),
+        ('2024-06', 'USD', 2, Decimal('7.00')),
+    ]
+    assert invoices.totals(by=('client_id',), status=['paid']) == [
+        {'client_id': 1, 'count': 2, 'total': Decimal('30.01')},
+        {'client_id': 2, 'count': 1, 'total': Decimal('5.00')},
+    ]
+    assert invoices.totals(by=('period',), period='year', status='void') == []
+
+    with pytest.raises(ValueError):
+        invoices.totals(by=('notes',))
+    with pytest.raises(ValueError):
+        invoices.totals(period='week')
+
+
+def test_revenue(invoices):
+    assert invoices.revenue() == [
+        {'period': '2024-01', 'currency': 'USD', 'count': 1, 'subtotal': Decimal('8.00'),
+         'tax': Decimal('2.00'), 'total': Decimal('10.00')},
+        {'period': '2024-02', 'currency': 'EUR', 'count': 1, 'subtotal': Decimal('0.00'),
+         'tax': Decimal('0.00'), 'total': Decimal('5.00')},
+        {'period': '2024-02', 'currency': 'USD', 'count': 1, 'subtotal': Decimal('0.00'),
+         'tax': Decimal('0.00'), 'total': Decimal('20.01')},
+    ]
+    assert [row['period'] for row in invoices.revenue(by=('period',), period='quarter')] == \
+        ['2024-Q1']
+
+
+def test_aging(invoices):
+    assert invoices.aging(as_of='2024-06-30') == [
+        {'currency': 'EUR', 'bucket': '91+', 'count': 1, 'total': Decimal('7.00')},
+        {'currency': 'USD', 'bucket': 'current', 'count': 1, 'total': Decimal('4.00')},
+        {'currency': 'USD', 'bucket': '1-30', 'count': 1, 'total': Decimal('3.00')},
+        {'currency': 'USD', 'bucket': '31-60', 'count': 1, 'total': Decimal('1.00')},
+    ]
+    assert [row['bucket'] for row in invoices.aging(as_of=datetime.date(2024, 6, 30),
+                                                     buckets=(0, 45), by=())] == \
+        ['current', '1-45', '46+']
+
+    with pytest.raises(ValueError):
+        invoices.aging(buckets=(30, 0))
+
+
+def test_aging_leaves_out_undated_invoices(use_numpy):
+    records = INVOICES + [{'id': 8, 'client_id': 4, 'currency': 'EUR', 'status': 'unpaid',
+                           'total': '9.00', 'created_at': None, 'due_at': None}]
+    table = InvoiceTable.from_records(records, use_numpy=use_numpy)
+    rows = table.aging(as_of='2024-06-30')
+    assert rows == InvoiceTable.from_records(INVOICES, use_numpy=use_numpy).aging(as_of='2024-06-30')
+    assert {'currency': 'EUR', 'bucket': '91+', 'count': 1, 'total': Decimal('7.00')} in rows
+    assert table.totals(by=('currency',), status='unpaid')[0]['count'] == 2
+
+
+def test_lifetime_value(invoices):
+    assert invoices.lifetime_value() == [
+        {'client_id': 1, 'currency': 'USD', 'count': 2, 'total': Decimal('30.01'),
+         'first_paid_at': datetime.date(2024, 1, 10), 'last_paid_at': datetime.date(2024, 2, 3)},
+        {'client_id': 2, 'currency': 'EUR', 'count': 1, 'total': Decimal('5.00'),
+         'first_paid_at': datetime.date(2024, 2, 15),
+         'last_paid_at': datetime.date(2024, 2, 15)},
+    ]
+    assert [row['client_id'] for row in invoices.lifetime_value(by=('client_id',), top=1)] == [1]
+
+
+def test_churn(use_numpy):
+    orders = OrderTable.from_records(ORDERS, use_numpy=use_numpy)
+    assert [(row['period'], row['active_start'], row['new'], row['churned'], row['active_end'],
+             row['churn_rate'], row['churned_total']) for row in orders.churn()] == [
+        ('2024-01', 0, 2, 0, 2, None, Decimal('0.00')),
+        ('2024-02', 2, 1, 1, 2, 0.5, Decimal('5.00')),
+        ('2024-03', 2, 1, 1, 2, 0.5, Decimal('7.00')),
+    ]
+    assert orders.churn(id=4) == []
+
+
+def test_backends_agree():
+    pytest.importorskip('numpy')
+    python = InvoiceTable.from_records(INVOICES, use_numpy=False)
+    numpy = InvoiceTable.from_records(INVOICES, use_numpy=True)
+
+    assert repr(numpy) == '<InvoiceTable rows=7 backend=numpy>'
+    for report in ('totals', 'revenue', 'lifetime_value'):
+        assert getattr(python, report)() == getattr(numpy, report)()
+    assert python.aging(as_of='2024-06-30') == numpy.aging(as_of='2024-06-30')
+
+
+def test_numpy_columns_need_numpy(monkeypatch):
+    monkeypatch.setattr(analytics, '_numpy', lambda: None)
+    table = InvoiceTable.from_records(INVOICES)
+    assert repr(table) == '<InvoiceTable rows=7 backend=python>'
+
+    with pytest.raises(ImportError):
+        InvoiceTable.from_records(INVOICES, use_numpy=True)
+
+
+def test_cents():
+    assert _cents('1.005') == 101
+    assert _cents('-2.345') == -235
+    assert _cents(Decimal('19.99')) == 1999
+    assert _cents(10) == 1000
+    assert _cents(0.1) == 10
+    assert _cents(None) == 0
+    assert _cents('') == 0
+    assert _cents('NaN') == 0
+    assert _cents('Infinity') == 0
+
+
+def test_from_client(client, billing):
+    for record in INVOICES:
+        billing.add('invoices', **record)
+
+    table = InvoiceTable.from_client(client, per_page=2, use_numpy=False, status='paid')
+    assert len(table) == 3
+    assert table.totals(by=('currency',), period='year') == [
+        {'currency': 'EUR', 'count': 1, 'total': Decimal('5.00')},
+        {'currency': 'USD', 'count': 2, 'total': Decimal('30.01')},
+    ]
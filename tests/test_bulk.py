@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fossbilling import NotFoundError
+from fossbilling.bulk import arun_bulk, run_bulk
+
+
+def test_bulk_suspend_collects_errors_per_id(client, billing):
+    billing.add_many('orders', 3, status='active')
+
+    result = client.orders.bulk_suspend([1, 2, 99, 3, 2], reason='overdue')
+    assert result.succeeded == [1, 2, 3]
+    assert result.failed == [99]
+    assert isinstance(result.errors[99], NotFoundError)
+    assert not result.ok and len(result) == 4
+    # Duplicate IDs are sent once.
+    assert billing.calls('POST', 'admin/order') == 4
+
+
+def test_bulk_action_endpoints(client, billing):
+    billing.add_many('services', 2)
+
+    assert client.services.bulk_renew([1, 2]).ok
+    assert sorted(endpoint for _, endpoint, _ in billing.requests) == [
+        'admin/service/1/renew', 'admin/service/2/renew',
+    ]
+
+
+def test_run_bulk_bounds_concurrency():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def work(item_id):
+        with lock:
+            running.append(item_id)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(item_id)
+        return item_id * 2
+
+    result = run_bulk(work, range(20), max_workers=3)
+    assert result.results == {item_id: item_id * 2 for item_id in range(20)}
+    assert max(peak) <= 3
+
+
+def test_async_bulk(make_async_client, billing):
+    billing.add_many('orders', 2)
+
+    async def main():
+        async with make_async_client() as client:
+            return await client.orders.bulk_cancel([1, 2, 3], reason='moved')
+
+    result = asyncio.run(main())
+    assert result.succeeded == [1, 2]
+    assert isinstance(result.errors[3], NotFoundError)
+
+
+def test_arun_bulk_reraises_cancellation():
+    async def call(item_id):
+        if item_id == 2:
+            raise asyncio.CancelledError()
+        if item_id == 3:
+            raise ValueError('bad')
+        return item_id
+
+    async def main():
+        return await arun_bulk(call, [1, 2, 3])
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(main())
+
+    result = asyncio.run(arun_bulk(call, [1, 3]))
+    assert result.results == {1: 1}
+    assert isinstance(result.errors[3], ValueError)
+
+
+def test_get_many(client, billing):
+    billing.add_many('clients', 5)
+
+    result = client.clients.get_many([5, 1, 7])
+    assert result.succeeded == [5, 1]
+    assert result.results[5]['id'] == 5
+    assert result.failed == [7]
+
+
+def test_get_many_via_filtered_listing(client, billing):
+    for index in range(40):
+        billing.add('invoices', client_id=42 if index < 10 else 7)
+
+    result = client.invoices.get_many(range(1, 11), via_list=True, per_page=5, client_id=42)
+    assert result.succeeded == list(range(1, 11))
+    assert billing.calls('GET', 'admin/invoice') == 2
+
+
+def test_get_many_via_list_needs_filters(client, billing):
+    billing.add_many('invoices', 40)
+
+    result = client.invoices.get_many(range(1, 11), via_list=True, per_page=5)
+    assert result.succeeded == list(range(1, 11))
+    # The listing cannot be narrowed to the IDs, so each one is fetched.
+    assert all(params == {} for _, _, params in billing.requests)
+    assert billing.calls() == 10
@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from fossbilling import MemoryCache, NotFoundError, SQLiteCache
+from fossbilling.cache import CachePolicy, cache_key, invalidation_prefixes
+
+
+def test_get_responses_are_cached(make_client, billing):
+    billing.add('clients', email='a@example.com')
+    client = make_client(cache=MemoryCache())
+
+    assert client.clients.get(1)['email'] == 'a@example.com'
+    assert client.clients.get(1)['email'] == 'a@example.com'
+    assert billing.calls('GET') == 1
+
+
+def test_cached_values_are_copies(make_client, billing):
+    billing.add('clients', email='a@example.com')
+    client = make_client(cache=MemoryCache())
+
+    client.clients.get(1)['email'] = 'changed'
+    assert client.clients.get(1)['email'] == 'a@example.com'
+
+
+def test_writes_invalidate_the_entity_and_its_listing(make_client, billing):
+    billing.add_many('clients', 2)
+    client = make_client(cache=MemoryCache())
+    client.clients.get(1)
+    client.clients.get(2)
+    client.clients.list()
+
+    client.clients.update(1, {'email': 'new@example.com'})
+    assert client.clients.get(1)['email'] == 'new@example.com'
+    client.clients.get(2)
+    client.clients.list()
+    # Entity 1 and the listing are fetched again; entity 2 stays cached.
+    assert billing.calls('GET') == 3 + 2
+
+
+def test_failed_write_still_invalidates(make_client, billing):
+    billing.add('clients')
+    client = make_client(cache=MemoryCache())
+    client.clients.list()
+
+    with pytest.raises(NotFoundError):
+        client.clients.update(99, {})
+    client.clients.list()
+    assert billing.calls('GET') == 2
+
+
+def test_ttl_per_endpoint_prefix(make_client, billing):
+    billing.add('clients')
+    billing.add('orders')
+    client = make_client(cache=MemoryCache(), cache_ttl={'admin/client': 60})
+
+    client.clients.get(1)
+    client.clients.get(1)
+    client.orders.get(1)
+    client.orders.get(1)
+    assert billing.calls('GET', 'admin/client') == 1
+    assert billing.calls('GET', 'admin/order') == 2
+
+
+def test_cache_policy():
+    policy = CachePolicy({'admin/system': 300, 'admin/system/logs': 0, 'admin/client': 30})
+    assert policy.ttl_for('admin/system/info') == 300
+    assert policy.ttl_for('admin/system/logs') is None
+    assert policy.ttl_for('admin/client/5') == 30
+    assert policy.ttl_for('admin/order') is None
+    assert CachePolicy(10).ttl_for('admin/order') == 10
+
+
+def test_cache_keys():
+    assert cache_key('admin/client/', {'b': 2, 'a': 1, 'c': None}) == 'admin/client?a=1&b=2'
+    assert invalidation_prefixes('admin/client/5/balance') == [
+        'admin/client?', 'admin/client/5?', 'admin/client/5/',
+    ]
+    assert invalidation_prefixes('admin/client') == ['admin/client?']
+
+
+def test_memory_cache_expiry_and_eviction():
+    cache = MemoryCache(maxsize=2)
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=60)
+    cache.get('a')
+    cache.set('c', 3, ttl=60)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+    cache.set('short', 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get('short') is None
+
+
+def test_sqlite_cache(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), maxsize=2)
+    cache.set('admin/client?', {'list': [1]}, ttl=60)
+    cache.set('admin/client/1?', {'id': 1}, ttl=60)
+    assert cache.get('admin/client?') == {'list': [1]}
+
+    cache.delete_prefix('admin/client/1')
+    assert cache.get('admin/client/1?') is None
+
+    cache.set('x', 1, ttl=60)
+    cache.set('y', 2, ttl=60)
+    assert cache.get('admin/client?') is None
+
+    # The file is shared: a second instance sees the same entries.
+    assert SQLiteCache(str(tmp_path / 'cache.db')).get('y') == 2
+    cache.clear()
+    assert cache.get('y') is None
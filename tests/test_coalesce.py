@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fossbilling import APIError
+from fossbilling.coalesce import SingleFlight
+from fossbilling.transports import Response
+
+
+def gated(billing, endpoint, result):
+    """Route ``endpoint`` to a handler that answers once ``release`` is set."""
+    entered = threading.Event()
+    release = threading.Event()
+
+    def handle(request):
+        entered.set()
+        release.wait(5)
+        return result() if callable(result) else result
+
+    billing.transport.route(endpoint, handle)
+    return entered, release
+
+
+def run_threads(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_gets_share_one_request(make_client, billing):
+    calls = []
+    entered, release = gated(billing, 'admin/system/stats',
+                             lambda: calls.append(1) or {'calls': len(calls)})
+    client = make_client(single_flight=True)
+
+    threads, results, errors = run_threads(5, client.system.stats)
+    assert entered.wait(5)
+    time.sleep(0.1)  # let the other threads join the request in flight
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == [None] * 5
+    assert calls == [1]
+    assert results == [{'calls': 1}] * 5
+    # Every caller receives its own copy.
+    assert len({id(result) for result in results}) == 5
+    assert len(client._flight) == 0
+
+
+def test_errors_reach_every_caller(make_client, billing):
+    entered, release = gated(billing, 'admin/system/stats', lambda: Response(500))
+    client = make_client(single_flight=True)
+
+    threads, results, errors = run_threads(3, client.system.stats)
+    entered.wait(5)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(error, APIError) for error in errors)
+
+
+def test_without_single_flight_each_call_is_sent(make_client, billing):
+    calls = []
+    billing.transport.route('admin/system/stats', lambda request: calls.append(1) or {})
+    client = make_client()
+
+    threads, _, _ = run_threads(3, client.system.stats)
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 3
+
+
+def test_writes_are_not_coalesced(make_client, billing):
+    calls = []
+    billing.transport.route('admin/system/config', lambda request: calls.append(1) or True,
+                            method='POST')
+    client = make_client(single_flight=True)
+
+    threads, _, _ = run_threads(3, lambda: client.system.update_config({'a': 1}))
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 3
+
+
+def test_single_flight_returns_to_sequential_calls():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('a', lambda: 2) == (2, False)
+    with pytest.raises(ValueError):
+        flight.do('a', lambda: int('x'))
+    assert len(flight) == 0
+
+
+def test_async_single_flight(make_async_client, billing):
+    calls = []
+
+    async def main():
+        async with make_async_client(single_flight=True) as client:
+            return await asyncio.gather(*(client.system.stats() for _ in range(5)))
+
+    billing.transport.route('admin/system/stats',
+                            lambda request: calls.append(1) or {'calls': len(calls)})
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert results == [{'calls': 1}] * 5
+    assert len({id(result) for result in results}) == 5
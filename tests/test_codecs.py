@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from fossbilling import codecs
+from fossbilling.codecs import JSONCodec, OrjsonCodec, StdlibCodec, get_codec
+from fossbilling.transports import Response
+
+BODY = {
+    'client_id': 42,
+    'email': 'zoë@example.com',
+    'items': [{'title': 'Hébergement €', 'price': 19.99, 'quantity': 2, 'taxed': True}],
+    'notes': None,
+    'meta': {1: 'int keys become strings', 'nested': [[], {}]},
+}
+
+
+@pytest.fixture(params=['json', 'orjson'])
+def codec(request):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    return get_codec(request.param)
+
+
+def test_get_codec():
+    assert isinstance(get_codec('json'), StdlibCodec)
+    instance = StdlibCodec()
+    assert get_codec(instance) is instance
+
+    with pytest.raises(ValueError):
+        get_codec('simplejson')
+
+
+def test_auto_falls_back_without_orjson(monkeypatch):
+    monkeypatch.setattr(codecs, 'orjson', None)
+    assert isinstance(get_codec(), StdlibCodec)
+    with pytest.raises(ImportError):
+        OrjsonCodec()
+
+
+def test_auto_prefers_orjson():
+    pytest.importorskip('orjson')
+    assert isinstance(get_codec('auto'), OrjsonCodec)
+
+
+def test_decodes_bytes(codec):
+    data = '{"email": "zoë@example.com", "total": "€19.99"}'.encode('utf-8')
+    assert codec.loads(data) == {'email': 'zoë@example.com', 'total': '€19.99'}
+    assert codec.loads(b'\xef\xbb\xbf' + data) == codec.loads(data)
+    assert codec.loads('[1, 2]') == [1, 2]
+
+    with pytest.raises(ValueError):
+        codec.loads(b'{"truncated": ')
+
+
+def test_request_bodies_agree(codec):
+    encoded = codec.dumps(BODY)
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == json.loads(StdlibCodec().dumps(BODY))
+    assert json.loads(encoded)['meta']['1'] == 'int keys become strings'
+    # Non-ASCII text is sent as UTF-8, not escaped.
+    assert 'zoë'.encode('utf-8') in encoded
+
+
+def test_client_uses_its_codec(make_client, billing, codec):
+    billing.transport.route('admin/system/info',
+                            lambda request: Response(200, content=b'\xef\xbb\xbf{"v": "0.6"}'))
+    received = []
+    billing.transport.route('admin/client', lambda request: received.append(request.body) or 1,
+                            method='POST')
+    client = make_client(codec=codec)
+
+    assert client.system.info() == {'v': '0.6'}
+    client.post('admin/client', {'email': 'zoë@example.com'})
+    assert json.loads(received[0]) == {'email': 'zoë@example.com'}
+
+
+def test_codec_interface():
+    class Custom(JSONCodec):
+        name = 'custom'
+
+    with pytest.raises(NotImplementedError):
+        Custom().dumps({})
+    assert repr(StdlibCodec()) == '<StdlibCodec>'
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import os
+import stat
+
+import pytest
+
+from fossbilling import APIError, NotFoundError
+from fossbilling.streaming import open_destination
+from fossbilling.transports import Response, TransportError
+
+PDF = b'%PDF-1.7\n' + b'x' * 200_000
+
+
+def pdf_route(billing, content=PDF, fail_after=None):
+    """Serve every invoice PDF in chunks, failing after ``fail_after`` chunks."""
+    def handle(request):
+        invoice_id = request.endpoint.split('/')[2]
+        if billing.find('invoices', invoice_id) is None:
+            return Response(404, content=b'{"error": {"message": "Not found"}}')
+
+        def chunks(size):
+            for index, start in enumerate(range(0, len(content), size)):
+                if fail_after is not None and index == fail_after:
+                    raise TransportError('connection reset')
+                yield content[start:start + size]
+
+        return Response(200, {'Content-Type': 'application/pdf'}, chunks=chunks)
+
+    billing.transport.route('admin/invoice', handle, method='GET')
+
+
+def test_download_to_a_path(client, billing, tmp_path):
+    billing.add('invoices')
+    pdf_route(billing)
+    path = tmp_path / 'invoice.pdf'
+
+    assert client.invoices.download_pdf(1, path, chunk_size=4096) == len(PDF)
+    assert path.read_bytes() == PDF
+
+
+def test_download_to_a_file_object(client, billing):
+    billing.add('invoices')
+    pdf_route(billing)
+    out = io.BytesIO()
+
+    assert client.invoices.download_pdf(1, out) == len(PDF)
+    assert out.getvalue() == PDF and not out.closed
+
+
+def test_failed_download_leaves_no_file(client, billing, tmp_path):
+    billing.add('invoices')
+    pdf_route(billing, fail_after=2)
+    path = tmp_path / 'invoice.pdf'
+    path.write_bytes(b'previous copy')
+
+    with pytest.raises(APIError):
+        client.invoices.download_pdf(1, path, chunk_size=4096)
+    assert path.read_bytes() == b'previous copy'
+    assert [entry.name for entry in tmp_path.iterdir()] == ['invoice.pdf']
+
+
+def test_download_pdfs_into_a_directory(client, billing, tmp_path):
+    billing.add_many('invoices', 5)
+    pdf_route(billing)
+    directory = tmp_path / 'archive' / '2024'
+
+    result = client.invoices.download_pdfs([1, 2, 3, 4, 5, 9], str(directory), max_workers=3)
+    assert result.succeeded == [1, 2, 3, 4, 5]
+    assert result.results[3] == str(directory / 'invoice-3.pdf')
+    assert isinstance(result.errors[9], NotFoundError)
+    assert sorted(os.listdir(directory)) == [f'invoice-{n}.pdf' for n in range(1, 6)]
+    assert all((directory / name).read_bytes() == PDF for name in os.listdir(directory))
+
+
+def test_async_download_pdfs(make_async_client, billing, tmp_path):
+    billing.add_many('invoices', 3)
+    pdf_route(billing)
+
+    async def main():
+        async with make_async_client() as client:
+            return await client.invoices.download_pdfs([1, 2, 3], str(tmp_path),
+                                                       filename='{id}.pdf')
+
+    result = asyncio.run(main())
+    assert result.succeeded == [1, 2, 3]
+    assert (tmp_path / '2.pdf').read_bytes() == PDF
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='POSIX permissions')
+@pytest.mark.parametrize('umask', [0o022, 0o077, 0o002])
+def test_files_get_default_permissions(tmp_path, umask):
+    previous = os.umask(umask)
+    try:
+        with open_destination(tmp_path / 'invoice.pdf') as fh:
+            fh.write(PDF)
+    finally:
+        os.umask(previous)
+    assert stat.S_IMODE(os.stat(tmp_path / 'invoice.pdf').st_mode) == 0o666 & ~umask
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+
+import pytest
+
+from fossbilling.export import export, write_records
+
+RECORDS = [
+    {'id': 1, 'total': '10.00', 'lines': [{'title': 'Hosting', 'price': 10}]},
+    {'id': 2, 'total': '5.50', 'notes': 'late'},
+]
+
+
+def failing(records):
+    yield from records
+    raise RuntimeError('connection lost')
+
+
+def test_ndjson():
+    out = io.BytesIO()
+    assert write_records(RECORDS, out) == 2
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == RECORDS
+
+
+def test_ndjson_fields():
+    out = io.BytesIO()
+    write_records(RECORDS, out, fields=['id', 'notes'])
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {'id': 1, 'notes': None}, {'id': 2, 'notes': 'late'},
+    ]
+
+
+def test_csv_takes_columns_from_the_first_record():
+    out = io.BytesIO()
+    write_records(RECORDS, out, format='csv')
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue().decode('utf-8'))))
+    assert list(rows[0]) == ['id', 'total', 'lines']
+    assert json.loads(rows[0]['lines']) == [{'title': 'Hosting', 'price': 10}]
+    assert rows[1] == {'id': '2', 'total': '5.50', 'lines': ''}
+
+
+def test_csv_fields():
+    out = io.BytesIO()
+    write_records(RECORDS, out, format='csv', fields=['notes', 'id'])
+    assert out.getvalue().decode('utf-8').splitlines() == ['notes,id', ',1', 'late,2']
+
+
+def test_failed_write_leaves_the_stream_open():
+    out = io.BytesIO()
+    with pytest.raises(RuntimeError):
+        write_records(failing(RECORDS), out, format='csv')
+
+    assert not out.closed
+    # Records written before the failure are flushed to the stream.
+    assert out.getvalue().decode('utf-8').splitlines()[-1] == '2,5.50,'
+
+
+def test_path_output_is_atomic(tmp_path):
+    path = tmp_path / 'invoices.ndjson'
+    path.write_bytes(b'previous export\n')
+
+    with pytest.raises(RuntimeError):
+        write_records(failing(RECORDS), path)
+    assert path.read_bytes() == b'previous export\n'
+    assert [entry.name for entry in tmp_path.iterdir()] == ['invoices.ndjson']
+
+    write_records(RECORDS, path)
+    assert len(path.read_bytes().splitlines()) == 2
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        write_records(RECORDS, io.BytesIO(), format='xml')
+
+
+def test_export_from_a_listing(client, billing, tmp_path):
+    for index in range(25):
+        billing.add('invoices', status='unpaid' if index % 5 else 'paid', total='1.00')
+    path = tmp_path / 'unpaid.csv'
+
+    assert export(client, 'invoices', path, format='csv', fields=['id', 'status'],
+                  per_page=10, status='unpaid') == 20
+    lines = path.read_text().splitlines()
+    assert lines[0] == 'id,status' and lines[1] == '2,unpaid' and len(lines) == 21
+
+
+def test_export_logs(client, billing):
+    billing.add_many('logs', 5, message='ok')
+    out = io.BytesIO()
+
+    assert export(client, 'logs', out, max_items=3) == 3
+    assert [json.loads(line)['id'] for line in out.getvalue().splitlines()] == [5, 4, 3]
+
+    with pytest.raises(ValueError):
+        export(client, 'products', out)
+
+
+def test_parquet(client, billing, tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    billing.add_many('invoices', 7, total='2.00', lines=[{'title': 'x'}])
+    path = tmp_path / 'invoices.parquet'
+
+    assert export(client, 'invoices', path, format='parquet', batch_size=3) == 7
+    table = pq.read_table(path)
+    assert table.num_rows == 7
+    assert table.column('id').to_pylist() == list(range(1, 8))
+
+    write_records([], tmp_path / 'empty.parquet', format='parquet', fields=['id'])
+    assert pq.read_table(tmp_path / 'empty.parquet').column_names == ['id']
@@ -0,0 +1,183 @@
+import time
+
+import pytest
+
+from fossbilling import APIError, NotFoundError
+from fossbilling.hooks import Hook, MetricsCollector, RequestContext, endpoint_label
+from fossbilling.retry import RetryPolicy
+from fossbilling.transports import Request, Response, TransportError
+
+
+class Recorder(Hook):
+    def __init__(self):
+        self.events = []
+
+    def before_request(self, context):
+        self.events.append(('before', context.method, context.endpoint, context.attempt))
+
+    def after_response(self, context, response):
+        self.events.append(('after', context.method, context.endpoint, response.status_code))
+
+    def on_error(self, context, error):
+        self.events.append(('error', context.method, context.endpoint, type(error).__name__))
+
+
+class Timed(RequestContext):
+    """A context whose attempt took a fixed time."""
+
+    def __init__(self, elapsed, method='GET', endpoint='admin/client/1'):
+        super().__init__(method, endpoint, 'https://billing.test/api/' + endpoint)
+        self.fixed = elapsed
+
+    @property
+    def elapsed(self):
+        return self.fixed
+
+
+def response(status_code=200, content=b'{}', sent=b''):
+    request = Request('GET', 'https://billing.test/api/x', 'x', {},
+                      {'Content-Length': str(len(sent))} if sent else {}, sent)
+    return Response(status_code, {'Content-Length': str(len(content))}, content, request)
+
+
+def test_hooks_run_around_every_attempt(make_client, billing, monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda delay: None)
+    billing.add('clients')
+    attempts = []
+
+    def flaky(request):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise TransportError('connection reset')
+        return Response(503) if len(attempts) == 2 else {'id': 1}
+
+    billing.transport.route('admin/client/1', flaky)
+    recorder = Recorder()
+    client = make_client(hooks=[recorder], retry_policy=RetryPolicy(jitter=False))
+
+    client.clients.get(1)
+    assert recorder.events == [
+        ('before', 'GET', 'admin/client/1', 0),
+        ('error', 'GET', 'admin/client/1', 'TransportError'),
+        ('before', 'GET', 'admin/client/1', 1),
+        ('after', 'GET', 'admin/client/1', 503),
+        ('before', 'GET', 'admin/client/1', 2),
+        ('after', 'GET', 'admin/client/1', 200),
+    ]
+
+
+def test_hooks_can_be_added_later(client, billing):
+    billing.add('clients')
+    recorder = Recorder()
+    client.add_hook(recorder)
+
+    client.clients.get(1)
+    assert [event[0] for event in recorder.events] == ['before', 'after']
+
+
+def test_metrics_per_endpoint(make_client, billing):
+    billing.add_many('clients', 2)
+    metrics = MetricsCollector()
+    client = make_client(hooks=[metrics])
+
+    client.clients.get(1)
+    client.clients.get(2)
+    with pytest.raises(NotFoundError):
+        client.clients.get(99)
+    client.clients.update(1, {'email': 'a@example.com'})
+
+    stats = metrics.as_dict()
+    assert list(stats) == ['GET admin/client/{id}', 'PUT admin/client/{id}']
+    assert stats['GET admin/client/{id}']['count'] == 3
+    assert stats['GET admin/client/{id}']['errors'] == 1
+    assert stats['PUT admin/client/{id}']['count'] == 1
+    assert stats['PUT admin/client/{id}']['bytes_sent'] > 0
+    assert stats['GET admin/client/{id}']['bytes_received'] > 0
+    assert stats['GET admin/client/{id}']['latency']['sum'] > 0
+
+    metrics.reset()
+    assert metrics.as_dict() == {}
+
+
+def test_connection_errors_are_counted(make_client, billing):
+    def fail(request):
+        raise TransportError('connection refused')
+
+    billing.transport.route('admin/system/stats', fail)
+    metrics = MetricsCollector()
+    client = make_client(hooks=[metrics])
+
+    with pytest.raises(APIError):
+        client.system.stats()
+    stats = metrics.as_dict()['GET admin/system/stats']
+    assert (stats['count'], stats['errors'], stats['bytes_received']) == (1, 1, 0)
+
+
+def test_byte_counters():
+    metrics = MetricsCollector()
+    context = Timed(0.01, 'POST', 'admin/invoice')
+    context.uncompressed_size = 300
+    metrics.after_response(context, response(content=b'x' * 50, sent=b'y' * 100))
+
+    stats = metrics.as_dict()['POST admin/invoice']
+    assert stats['bytes_sent'] == 100
+    assert stats['bytes_sent_uncompressed'] == 300
+    assert stats['bytes_received'] == stats['bytes_received_uncompressed'] == 50
+    assert stats['bytes_saved'] == 200
+
+
+def test_quantiles_interpolate_within_buckets():
+    metrics = MetricsCollector(buckets=(0.1, 0.2, 0.4))
+    for elapsed in [0.05] * 10 + [0.15] * 10:
+        metrics.after_response(Timed(elapsed), response())
+
+    latency = metrics.as_dict()['GET admin/client/{id}']['latency']
+    assert latency['p50'] == pytest.approx(0.1)
+    assert latency['p95'] == pytest.approx(0.19)
+    assert latency['p99'] == pytest.approx(0.198)
+    assert latency['avg'] == pytest.approx(0.1)
+
+    # Beyond the last bound, the estimate is the last bound.
+    metrics.reset()
+    metrics.after_response(Timed(3.0), response())
+    assert metrics.as_dict()['GET admin/client/{id}']['latency']['p99'] == 0.4
+
+
+def test_prometheus_text():
+    metrics = MetricsCollector(buckets=(0.1, 0.5))
+    metrics.after_response(Timed(0.25), response(content=b'x' * 10))
+    metrics.after_response(Timed(0.05), response(status_code=404, content=b'x' * 5))
+
+    assert metrics.to_prometheus(prefix='billing') == '''\
+# HELP billing_requests_total Total API requests.
+# TYPE billing_requests_total counter
+billing_requests_total{method="GET",endpoint="admin/client/{id}"} 2
+# HELP billing_request_errors_total API requests that failed or returned an error status.
+# TYPE billing_request_errors_total counter
+billing_request_errors_total{method="GET",endpoint="admin/client/{id}"} 1
+# HELP billing_request_duration_seconds API request latency.
+# TYPE billing_request_duration_seconds histogram
+billing_request_duration_seconds_bucket{method="GET",endpoint="admin/client/{id}",le="0.1"} 1
+billing_request_duration_seconds_bucket{method="GET",endpoint="admin/client/{id}",le="0.5"} 2
+billing_request_duration_seconds_bucket{method="GET",endpoint="admin/client/{id}",le="+Inf"} 2
+billing_request_duration_seconds_sum{method="GET",endpoint="admin/client/{id}"} 0.3
+billing_request_duration_seconds_count{method="GET",endpoint="admin/client/{id}"} 2
+# HELP billing_request_bytes_total Request body bytes sent.
+# TYPE billing_request_bytes_total counter
+billing_request_bytes_total{method="GET",endpoint="admin/client/{id}"} 0
+# HELP billing_response_bytes_total Response body bytes received.
+# TYPE billing_response_bytes_total counter
+billing_response_bytes_total{method="GET",endpoint="admin/client/{id}"} 15
+# HELP billing_request_uncompressed_bytes_total Request body bytes before compression.
+# TYPE billing_request_uncompressed_bytes_total counter
+billing_request_uncompressed_bytes_total{method="GET",endpoint="admin/client/{id}"} 0
+# HELP billing_response_uncompressed_bytes_total Response body bytes after decompression.
+# TYPE billing_response_uncompressed_bytes_total counter
+billing_response_uncompressed_bytes_total{method="GET",endpoint="admin/client/{id}"} 15
+'''
+
+
+def test_endpoint_label():
+    assert endpoint_label('/admin/client/42/') == 'admin/client/{id}'
+    assert endpoint_label('admin/invoice/7/mark_as_paid') == 'admin/invoice/{id}/mark_as_paid'
+    assert endpoint_label('admin/system/v2') == 'admin/system/v2'
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from fossbilling import APIError, IdempotencyKeyError, MemoryCache
+from fossbilling.idempotency import IDEMPOTENCY_HEADER, operation_key
+from fossbilling.retry import RetryPolicy
+from fossbilling.transports import Response
+
+
+def recording(billing, endpoint, result=True, failures=0):
+    """Route ``endpoint`` to a handler recording the idempotency key of every attempt."""
+    keys = []
+
+    def handle(request):
+        keys.append(request.headers.get(IDEMPOTENCY_HEADER))
+        if len(keys) <= failures:
+            return Response(503)
+        return result
+
+    billing.transport.route(endpoint, handle)
+    return keys
+
+
+def test_writes_get_one_key_per_call(make_client, billing, monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda delay: None)
+    billing.add('invoices')
+    keys = recording(billing, 'admin/invoice/1/mark_as_paid', failures=1)
+    client = make_client(retry_policy=RetryPolicy())
+
+    client.invoices.mark_as_paid(1, retry=True)
+    client.invoices.mark_as_paid(1)
+    # The retry repeats the key of its call; the next call has a new one.
+    assert len(keys) == 3
+    assert keys[0] == keys[1] != keys[2]
+    assert all(keys)
+
+
+def test_reads_are_sent_without_a_key(client, billing):
+    billing.add('clients')
+    keys = recording(billing, 'admin/client/1', result={'id': 1})
+
+    client.clients.get(1)
+    assert keys == [None]
+
+
+def test_journaled_calls_are_sent_once(make_client, billing):
+    billing.add('orders')
+    keys = recording(billing, 'admin/order/1/renew', result={'id': 1, 'status': 'active'})
+    client = make_client(journal=MemoryCache())
+    key = operation_key('renew-order', 1, '2024-10')
+
+    assert client.orders.renew(1, idempotency_key=key) == {'id': 1, 'status': 'active'}
+    assert client.orders.renew(1, idempotency_key=key) == {'id': 1, 'status': 'active'}
+    assert keys == [key]
+
+    client.orders.renew(1, idempotency_key=operation_key('renew-order', 1, '2024-11'))
+    assert len(keys) == 2
+
+
+def test_reusing_a_key_for_another_operation_fails(make_client, billing):
+    billing.add_many('orders', 2)
+    client = make_client(journal=MemoryCache())
+    client.orders.renew(1, idempotency_key='k')
+
+    with pytest.raises(IdempotencyKeyError):
+        client.orders.renew(2, idempotency_key='k')
+    with pytest.raises(ValueError):
+        client.orders.renew(2, idempotency_key='k')
+
+
+def test_failed_calls_are_not_journaled(make_client, billing):
+    billing.add('orders')
+    keys = recording(billing, 'admin/order/1/renew', failures=1)
+    client = make_client(journal=MemoryCache())
+
+    with pytest.raises(APIError):
+        client.orders.renew(1, idempotency_key='k')
+    assert client.orders.renew(1, idempotency_key='k') is True
+    assert keys == ['k', 'k']
+
+
+def test_concurrent_calls_with_the_same_key_share_one_request(make_client, billing):
+    billing.add('orders')
+    entered = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def handle(request):
+        calls.append(request.headers[IDEMPOTENCY_HEADER])
+        entered.set()
+        release.wait(5)
+        return {'renewed': True}
+
+    billing.transport.route('admin/order/1/renew', handle)
+    client = make_client()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        client.orders.renew(1, idempotency_key='k'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert entered.wait(5)
+    time.sleep(0.1)  # let the other threads join the request in flight
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['k']
+    assert results == [{'renewed': True}] * 4
+
+
+def test_operation_key():
+    assert operation_key('renew-order', 7, '2024-10') == operation_key('renew-order', '7', '2024-10')
+    assert operation_key('renew-order', 7) != operation_key('renew-order', 8)
+    assert len(operation_key('x')) == 32
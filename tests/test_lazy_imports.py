@@ -0,0 +1,61 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import fossbilling
+from fossbilling.resources import LazyResource
+
+ROOT = Path(__file__).resolve().parents[1]
+
+SCRIPT = '''
+import json
+import sys
+
+import fossbilling
+
+client = fossbilling.Client('https://billing.test/', 'key')
+client.clients
+client.invoices
+print(json.dumps(sorted(name for name in ('requests', 'urllib3', 'httpx', 'sqlite3', 'numpy')
+                        if name in sys.modules)))
+'''
+
+
+def test_import_and_construction_stay_lazy():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=str(ROOT), env=env,
+                            capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout) == []
+
+
+def test_resources_are_created_once(client):
+    assert isinstance(type(client).clients, LazyResource)
+    assert 'clients' not in vars(client)
+    assert client.clients is client.clients
+    assert vars(client)['clients'] is client.clients
+    assert client.invoices._client is client
+
+
+def test_async_resources_are_created_once(make_async_client):
+    pytest.importorskip('httpx')
+
+    async def main():
+        async with make_async_client() as client:
+            return client.orders, client.orders
+
+    first, second = asyncio.run(main())
+    assert first is second
+    assert type(first).__name__ == 'AsyncOrderResource'
+
+
+def test_lazy_package_attributes():
+    assert fossbilling.Client is fossbilling.client.Client
+    assert 'InMemoryTransport' in dir(fossbilling)
+    with pytest.raises(AttributeError):
+        fossbilling.Server
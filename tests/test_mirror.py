@@ -0,0 +1,109 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from fossbilling.mirror import Mirror
+from fossbilling.models import InvoiceModel
+
+
+@pytest.fixture
+def mirror(client, billing, tmp_path):
+    billing.add('clients', email='a@example.com', status='active')
+    billing.add('clients', email='b@example.com', status='suspended')
+    billing.add('orders', client_id=1, status='active', total='10.00')
+    billing.add('orders', client_id=1, status='canceled', total='5.00')
+    billing.add('invoices', client_id=1, status='unpaid', total='25.00',
+                due_at='2020-01-01 00:00:00')
+    billing.add('invoices', client_id=2, status='paid', total='7.50',
+                due_at='2020-02-01 00:00:00')
+    billing.add('invoices', client_id=2, status='unpaid', total='12.00',
+                due_at='2999-01-01 00:00:00')
+    with Mirror(tmp_path / 'mirror.db', client) as mirror:
+        mirror.refresh()
+        yield mirror
+
+
+def test_refresh_loads_every_entity(mirror):
+    assert mirror.count('clients') == 2
+    assert mirror.count('orders') == 2
+    assert mirror.count('services') == 0
+    assert mirror.get('invoices', 1)['total'] == '25.00'
+    assert mirror.get('invoices', 99) is None
+    assert isinstance(mirror.get('invoices', 1, typed=True), InvoiceModel)
+
+
+def test_find_with_filters(mirror):
+    assert [r['id'] for r in mirror.find('invoices', status='unpaid', order_by='-id')] == [3, 1]
+    assert [r['id'] for r in mirror.find('invoices', total__gte=10, order_by='total')] == [3, 1]
+    assert [r['id'] for r in mirror.find('clients', email__like='b@%')] == [2]
+    assert [r['id'] for r in mirror.find('invoices', client_id__in=[2], limit=1)] == [2]
+    assert mirror.count('invoices', due_at__lt=datetime.datetime(2020, 1, 15)) == 1
+    assert mirror.count('orders', client_id__in=[]) == 0
+
+    with pytest.raises(ValueError):
+        mirror.find('invoices', notes='x')
+    with pytest.raises(ValueError):
+        mirror.find('invoices', status__between='x')
+
+
+def test_find_with_client(mirror):
+    invoice, = mirror.find('invoices', with_client=True, id=2)
+    assert invoice['client']['email'] == 'b@example.com'
+
+    with pytest.raises(ValueError):
+        mirror.find('clients', with_client=True)
+
+
+def test_overdue_invoices_and_client_overview(mirror):
+    assert [invoice['id'] for invoice in mirror.overdue_invoices()] == [1]
+
+    overview = mirror.client_overview(1)
+    assert overview['client']['email'] == 'a@example.com'
+    assert [order['id'] for order in overview['orders']] == [2, 1]
+    assert [invoice['id'] for invoice in overview['invoices']] == [1]
+    assert mirror.client_overview(99) is None
+
+
+def test_refresh_only_writes_changes(mirror, billing):
+    billing.find('invoices', 1)['status'] = 'paid'
+    billing.add('clients', email='c@example.com')
+
+    stats = mirror.refresh()
+    assert stats['invoices']['updated'] == 1
+    assert stats['clients']['created'] == 1
+    assert stats['orders'] == {'fetched': 2, 'created': 0, 'updated': 0, 'deleted': 0,
+                               'complete': True}
+    assert mirror.count('invoices', status='paid') == 2
+
+    billing.records['orders'].pop()
+    mirror.refresh(['orders'])
+    assert mirror.count('orders') == 1
+
+
+def test_state_survives_reopening(mirror, client, billing):
+    mirror.close()
+    with Mirror(mirror.path, client) as reopened:
+        assert reopened.refresh()['clients']['created'] == 0
+        assert reopened.count('clients') == 2
+
+
+def test_sql_is_read_only(mirror):
+    rows = mirror.sql("SELECT id, json_extract(data, '$.email') AS email FROM clients "
+                      "WHERE status = ?", ['suspended'])
+    assert rows == [{'id': 2, 'email': 'b@example.com'}]
+
+    with pytest.raises(sqlite3.OperationalError):
+        mirror.sql('DELETE FROM clients')
+    assert mirror.count('clients') == 2
+
+    # The connection is writable again for the next refresh.
+    mirror.refresh(full=True)
+
+
+def test_refresh_requires_a_client(tmp_path):
+    with Mirror(tmp_path / 'mirror.db') as mirror:
+        with pytest.raises(ValueError):
+            mirror.refresh()
+    with pytest.raises(ValueError):
+        Mirror(tmp_path / 'other.db', client=object()).refresh(['logs'])
@@ -0,0 +1,115 @@
+import datetime
+import sys
+from decimal import Decimal
+
+import pytest
+
+from fossbilling.models import (
+    ClientModel, InvoiceItemModel, InvoiceModel, Model, OrderModel, parse_bool, parse_datetime,
+    parse_decimal, parse_int,
+)
+
+INVOICE = {
+    'id': '12',
+    'client_id': 3,
+    'status': 'unpaid',
+    'currency': 'EUR',
+    'total': '19.99',
+    'tax': None,
+    'due_at': '2024-02-01 00:00:00',
+    'items': [{'id': 1, 'title': 'Hosting', 'price': '19.99', 'quantity': '1', 'taxed': '0'}],
+    'notes': 'Thanks',
+    'gateway': {'id': 2},
+}
+
+
+def test_fields_are_converted_on_first_access():
+    invoice = InvoiceModel(INVOICE)
+    total_bit = type(invoice).total.bit
+    assert not invoice._parsed & total_bit
+
+    assert invoice.total == Decimal('19.99')
+    assert invoice._parsed & total_bit
+    # The converted value is cached in the slot.
+    assert invoice.total is invoice.total
+    assert invoice.due_at == datetime.datetime(2024, 2, 1)
+    assert invoice.due_at is invoice.due_at
+    assert invoice.id == 12
+
+
+def test_nested_items_become_models():
+    item, = InvoiceModel(INVOICE).items
+    assert isinstance(item, InvoiceItemModel)
+    assert (item.price, item.quantity, item.taxed) == (Decimal('19.99'), 1, False)
+
+
+def test_missing_and_null_fields():
+    invoice = InvoiceModel(INVOICE)
+    assert invoice.tax is None
+    assert invoice['tax'] is None
+    assert invoice.paid_at is None
+    with pytest.raises(KeyError):
+        invoice['paid_at']
+    assert invoice.get('paid_at', 'unset') == 'unset'
+    assert 'tax' in invoice and 'paid_at' not in invoice
+
+
+def test_unknown_keys_are_kept():
+    invoice = InvoiceModel(INVOICE)
+    assert invoice.extra == {'notes': 'Thanks', 'gateway': {'id': 2}}
+    assert invoice['notes'] == 'Thanks'
+    assert 'gateway' in invoice.keys()
+    assert InvoiceModel({'id': 1}).extra == {}
+
+
+def test_to_dict_round_trip():
+    invoice = InvoiceModel(INVOICE)
+    data = invoice.to_dict()
+    assert set(data) == set(INVOICE)
+    assert data['total'] == Decimal('19.99') and data['notes'] == 'Thanks'
+
+    again = InvoiceModel(data)
+    assert again.total == invoice.total and again.due_at == invoice.due_at
+    assert again.to_dict() == data
+
+
+def test_assignment_skips_conversion():
+    order = OrderModel({'id': 1, 'total': '5.00'})
+    order.total = Decimal('7.50')
+    assert order.total == Decimal('7.50')
+    assert order['total'] == Decimal('7.50')
+
+
+def test_models_have_no_instance_dict():
+    for model in (ClientModel({'id': 1}), InvoiceModel(INVOICE), OrderModel({})):
+        assert not hasattr(model, '__dict__')
+        with pytest.raises(AttributeError):
+            model.undeclared = 1
+
+
+def test_low_cardinality_strings_are_interned():
+    status = ''.join(['un', 'paid'])
+    assert InvoiceModel({'status': status}).status is sys.intern('unpaid')
+
+
+def test_subclasses_inherit_fields():
+    class ResellerModel(ClientModel):
+        fields = {'reseller_id': parse_int}
+
+    reseller = ResellerModel({'id': '4', 'reseller_id': '9', 'balance': '1.50', 'x': 1})
+    assert (reseller.id, reseller.reseller_id, reseller.balance) == (4, 9, Decimal('1.50'))
+    assert reseller.extra == {'x': 1}
+    assert repr(reseller) == '<ResellerModel id=4>'
+    assert Model({'a': 1}).extra == {'a': 1}
+
+
+def test_parsers():
+    assert parse_datetime('2024-01-31T12:00:00') == datetime.datetime(2024, 1, 31, 12)
+    assert parse_datetime('2024-01-31') == datetime.datetime(2024, 1, 31)
+    assert parse_datetime('2024-01-31T12:00:00+00:00').tzinfo is not None
+    assert parse_datetime('soon') is None and parse_datetime('') is None
+    assert parse_decimal(0.1) == Decimal('0.1')
+    assert parse_decimal('abc') is None
+    assert parse_int('7') == 7 and parse_int('x') is None
+    assert [parse_bool(value) for value in ('1', '0', 'false', 'yes', 0, 1)] == \
+        [True, False, False, True, False, True]
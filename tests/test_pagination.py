@@ -0,0 +1,98 @@
+import asyncio
+
+from fossbilling.models import InvoiceModel
+from fossbilling.pagination import iter_records
+
+
+def test_iter_all_reads_every_page_in_order(client, billing):
+    billing.add_many('invoices', 25, status='unpaid')
+
+    ids = [invoice['id'] for invoice in client.invoices.iter_all(per_page=10)]
+    assert ids == list(range(1, 26))
+    assert billing.calls('GET', 'admin/invoice') == 3
+
+
+def test_iter_all_passes_filters(client, billing):
+    for index in range(12):
+        billing.add('invoices', status='paid' if index % 3 else 'unpaid')
+
+    unpaid = list(client.invoices.iter_all(per_page=2, status='unpaid'))
+    assert [invoice['id'] for invoice in unpaid] == [1, 4, 7, 10]
+    assert all(params['status'] == 'unpaid' for _, _, params in billing.requests)
+
+
+def test_iter_all_stops_at_max_items(client, billing):
+    billing.add_many('clients', 50)
+
+    records = list(client.clients.iter_all(per_page=10, max_items=15))
+    assert len(records) == 15
+    # The page after the last one needed may already be prefetched.
+    assert billing.calls('GET', 'admin/client') <= 3
+
+
+def test_iter_all_empty_listing(client, billing):
+    assert list(client.orders.iter_all()) == []
+    assert billing.calls() == 1
+
+
+def test_iter_all_typed(client, billing):
+    billing.add('invoices', status='unpaid', total='10.50')
+
+    invoice, = client.invoices.iter_all(typed=True)
+    assert isinstance(invoice, InvoiceModel)
+    assert invoice.status == 'unpaid'
+
+
+def test_iter_records_without_page_count():
+    pages = {1: [{'id': 1}, {'id': 2}], 2: [{'id': 3}]}
+
+    records = iter_records(lambda page: {'list': pages.get(page, [])}, per_page=2)
+    assert [record['id'] for record in records] == [1, 2, 3]
+
+
+def test_iter_logs(client, billing):
+    billing.add_many('logs', 7, message='entry')
+
+    ids = [entry['id'] for entry in client.system.iter_logs(per_page=3)]
+    assert ids == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_async_iter_all(make_async_client, billing):
+    billing.add_many('services', 23)
+
+    async def main():
+        async with make_async_client() as client:
+            return [service['id'] async for service in client.services.iter_all(per_page=5)]
+
+    assert asyncio.run(main()) == list(range(1, 24))
+    assert billing.calls('GET', 'admin/service') == 5
+
+
+def test_iter_all_with_workers_keeps_order(client, billing):
+    billing.add_many('invoices', 95)
+
+    ids = [invoice['id'] for invoice in client.invoices.iter_all(per_page=10, workers=4)]
+    assert ids == list(range(1, 96))
+    assert billing.calls('GET', 'admin/invoice') == 10
+
+
+def test_iter_all_with_workers_unordered(client, billing):
+    billing.add_many('orders', 42)
+
+    records = client.orders.iter_all(per_page=5, workers=3, ordered=False)
+    assert sorted(order['id'] for order in records) == list(range(1, 43))
+
+
+def test_iter_all_with_workers_stops_at_max_items(client, billing):
+    billing.add_many('clients', 200)
+
+    records = list(client.clients.iter_all(per_page=10, workers=4, max_items=25))
+    assert [record['id'] for record in records] == list(range(1, 26))
+    assert billing.calls() < 20
+
+
+def test_iter_logs_with_workers(client, billing):
+    billing.add_many('logs', 30)
+
+    ids = [entry['id'] for entry in client.system.iter_logs(per_page=7, workers=3)]
+    assert ids == list(range(30, 0, -1))
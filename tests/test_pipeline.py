@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+import pytest
+
+from fossbilling import APIError, ValidationError
+from fossbilling.pipeline import Checkpoint, default_key, is_definitive, run_pipeline
+from fossbilling.transports import Response
+
+
+def specs(count):
+    return [{'client_id': index, 'items': [{'title': f'Item {index}', 'price': 10}]}
+            for index in range(1, count + 1)]
+
+
+def test_create_many(client, billing):
+    result = client.invoices.create_many(specs(10), max_workers=4)
+
+    assert result.ok and len(result.results) == 10
+    assert sorted(invoice['client_id'] for invoice in billing.records['invoices']) == \
+        list(range(1, 11))
+
+
+def test_resume_skips_completed_items(client, billing, tmp_path):
+    checkpoint = str(tmp_path / 'invoices.jsonl')
+    client.invoices.create_many(specs(5), checkpoint=checkpoint)
+
+    result = client.invoices.create_many(specs(8), checkpoint=checkpoint)
+    assert len(result.skipped) == 5
+    assert len(result.results) == 3
+    assert len(billing.records['invoices']) == 8
+
+
+def test_in_flight_items_are_not_sent_again(client, billing, tmp_path):
+    items = specs(3)
+    path = tmp_path / 'invoices.jsonl'
+    in_flight = default_key(1, items[1])
+    # The journal a crash leaves behind: item 1 was sent, its outcome unknown.
+    path.write_text(json.dumps({'key': in_flight, 'status': 'started'}) + '\n')
+
+    result = client.invoices.create_many(items, checkpoint=str(path))
+    assert result.in_doubt == [in_flight]
+    assert not result.ok
+    assert [invoice['client_id'] for invoice in billing.records['invoices']] == [1, 3]
+
+    result = client.invoices.create_many(items, checkpoint=str(path), retry_in_doubt=True)
+    assert list(result.results) == [in_flight]
+    assert len(result.skipped) == 2
+
+
+def test_failures_are_journaled(client, billing, tmp_path):
+    def reject(request):
+        if request.json()['client_id'] == 2:
+            return Response(422, content=b'{"error": {"message": "Unknown client"}}')
+        return 1
+
+    billing.transport.route('admin/invoice', reject, method='POST')
+    checkpoint = str(tmp_path / 'invoices.jsonl')
+
+    result = client.invoices.create_many(specs(3), checkpoint=checkpoint)
+    assert len(result.errors) == 1
+    error, = result.errors.values()
+    assert isinstance(error, ValidationError)
+
+    # A definitive failure is tried again on resume; the rest are skipped.
+    result = client.invoices.create_many(specs(3), checkpoint=checkpoint)
+    assert len(result.skipped) == 2 and len(result.errors) == 1
+
+
+def test_server_errors_leave_items_in_doubt(client, billing, tmp_path):
+    billing.transport.route('admin/invoice', lambda request: Response(502), method='POST')
+    checkpoint = str(tmp_path / 'invoices.jsonl')
+
+    client.invoices.create_many(specs(2), checkpoint=checkpoint)
+    result = client.invoices.create_many(specs(2), checkpoint=checkpoint)
+    assert len(result.in_doubt) == 2 and not result.results
+
+
+def test_mark_many_as_paid_is_keyed_by_invoice(client, billing, tmp_path):
+    billing.add_many('invoices', 3)
+    checkpoint = str(tmp_path / 'payments.jsonl')
+    payments = [{'invoice_id': 1, 'txn_id': 'a'}, {'invoice_id': 2, 'txn_id': 'b'},
+                {'invoice_id': 2, 'txn_id': 'b'}]
+
+    result = client.invoices.mark_many_as_paid(payments, checkpoint=checkpoint)
+    assert sorted(result.results) == ['1', '2']
+
+    result = client.invoices.mark_many_as_paid(payments + [{'invoice_id': 3}],
+                                               checkpoint=checkpoint)
+    assert sorted(result.skipped) == ['1', '2'] and list(result.results) == ['3']
+    assert billing.calls('POST') == 3
+
+
+def test_pipeline_reads_items_lazily():
+    consumed = []
+
+    def items():
+        for index in range(100):
+            consumed.append(index)
+            yield index
+
+    seen_when_called = []
+    run_pipeline(lambda item: seen_when_called.append(len(consumed)), items(),
+                 max_workers=1, max_pending=2)
+    assert max(seen - index for index, seen in enumerate(seen_when_called)) <= 3
+
+
+def test_checkpoint_ignores_a_torn_last_line(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text('{"key": "a", "status": "done", "result": 1}\n{"key": "b", "sta')
+
+    with Checkpoint(str(path)) as checkpoint:
+        assert checkpoint.status('a')['result'] == 1
+        assert checkpoint.status('b') is None
+
+
+def test_is_definitive():
+    assert is_definitive(ValidationError('bad'))
+    assert is_definitive(APIError('bad request', code=400))
+    assert not is_definitive(APIError('bad gateway', code=502))
+    assert not is_definitive(APIError('connection reset'))
+    assert is_definitive(KeyError('x'))
+
+
+def test_async_create_many(make_async_client, billing, tmp_path):
+    checkpoint = str(tmp_path / 'invoices.jsonl')
+
+    async def main():
+        async with make_async_client() as client:
+            first = await client.invoices.create_many(specs(4), checkpoint=checkpoint)
+            second = await client.invoices.create_many(specs(6), checkpoint=checkpoint)
+            return first, second
+
+    first, second = asyncio.run(main())
+    assert len(first.results) == 4
+    assert len(second.skipped) == 4 and len(second.results) == 2
+    assert len(billing.records['invoices']) == 6
+
+
+@pytest.mark.parametrize('max_workers', [1, 8])
+def test_duplicate_items_are_called_once(max_workers):
+    calls = []
+    result = run_pipeline(calls.append, [1, 2, 1, 3, 2], key=lambda index, item: str(item),
+                          max_workers=max_workers)
+    assert sorted(calls) == [1, 2, 3]
+    assert sorted(result.results) == ['1', '2', '3']
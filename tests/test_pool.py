@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import API_KEY, BASE_URL, FakeBilling
+from fossbilling import APIError, AsyncClientPool, Client, ClientPool
+from fossbilling.transports import Response
+
+
+@pytest.fixture
+def servers():
+    """Three installations: one answering, one failing and one hanging."""
+    servers = {name: FakeBilling() for name in ('eu', 'us', 'asia')}
+    servers['eu'].transport.route('admin/system/stats', lambda request: {'clients': 3})
+    servers['us'].transport.route('admin/system/stats', lambda request: Response(500))
+    release = threading.Event()
+    servers['asia'].transport.route('admin/system/stats',
+                                    lambda request: release.wait(5) and {'clients': 1})
+    servers['asia'].release = release
+    yield servers
+    release.set()
+
+
+@pytest.fixture
+def pool(servers):
+    clients = {name: Client(BASE_URL, API_KEY, transport=server.transport)
+               for name, server in servers.items()}
+    with ClientPool(clients, timeout=0.2) as pool:
+        yield pool
+
+
+def test_call_collects_results_errors_and_timeouts(pool):
+    result = pool.call('system.stats')
+
+    assert list(result.results) == ['eu']
+    assert result.results['eu'] == {'clients': 3}
+    assert isinstance(result.errors['us'], APIError)
+    assert result.timed_out == ['asia']
+    assert isinstance(result.errors['asia'], TimeoutError)
+    assert isinstance(result.elapsed['asia'], float)
+    assert result.elapsed['asia'] >= 0.2
+    assert result.elapsed['eu'] < 0.2
+
+
+def test_stream_yields_timeouts_last(pool):
+    names = [outcome.name for outcome in pool.stream('system.stats')]
+    assert sorted(names[:2]) == ['eu', 'us']
+    assert names[2] == 'asia'
+
+
+def test_names_and_callables(pool, servers):
+    servers['eu'].add_many('clients', 2)
+
+    result = pool.call(lambda client, page: len(client.clients.list(page=page)), 1,
+                       names=(name for name in ['eu']))
+    assert result.results == {'eu': 2}
+    assert not result.errors
+
+    with pytest.raises(KeyError):
+        pool.call('system.stats', names=['moon'])
+
+
+def test_calls_run_concurrently(servers):
+    entered = threading.Barrier(2, timeout=5)
+    for server in servers.values():
+        server.transport.route('admin/system/info',
+                               lambda request: entered.wait() is not None or {})
+    clients = {name: Client(BASE_URL, API_KEY, transport=servers[name].transport)
+               for name in ('eu', 'us')}
+
+    # Each call only returns once both are in flight.
+    assert ClientPool(clients).call('system.info').ok
+
+
+def test_async_pool(servers):
+    pytest.importorskip('httpx')
+    from fossbilling import AsyncClient
+
+    async def slow_stats(client):
+        await asyncio.sleep(5)
+
+    async def main():
+        clients = {name: AsyncClient(BASE_URL, API_KEY, transport=server.transport)
+                   for name, server in servers.items() if name != 'asia'}
+        async with AsyncClientPool(clients, timeout=0.2) as pool:
+            result = await pool.call('system.stats')
+            slow = await pool.call(slow_stats, names=['eu'])
+        return result, slow
+
+    result, slow = asyncio.run(main())
+    assert result.results == {'eu': {'clients': 3}}
+    assert isinstance(result.errors['us'], APIError)
+    assert slow.timed_out == ['eu']
+    assert slow.elapsed['eu'] >= 0.2
@@ -0,0 +1,134 @@
+import email.utils
+import time
+
+import pytest
+
+from fossbilling import APIError
+from fossbilling.retry import RateLimiter, RetryPolicy, parse_retry_after
+from fossbilling.transports import Response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the delays the client sleeps for, without sleeping."""
+    delays = []
+    monkeypatch.setattr(time, 'sleep', delays.append)
+    return delays
+
+
+def flaky(failures, status=503, headers=None):
+    """A handler failing ``failures`` times before answering."""
+    attempts = []
+
+    def handle(request):
+        attempts.append(request.method)
+        if len(attempts) <= failures:
+            return Response(status, headers)
+        return {'ok': True}
+
+    handle.attempts = attempts
+    return handle
+
+
+def test_get_is_retried(make_client, billing, sleeps):
+    handler = flaky(2)
+    billing.transport.route('admin/system/stats', handler)
+    client = make_client(retry_policy=RetryPolicy(max_retries=3, backoff_factor=0.1,
+                                                  jitter=False))
+
+    assert client.system.stats() == {'ok': True}
+    assert len(handler.attempts) == 3
+    assert sleeps == [0.1, 0.2]
+
+
+def test_gives_up_after_max_retries(make_client, billing, sleeps):
+    handler = flaky(10)
+    billing.transport.route('admin/system/stats', handler)
+    client = make_client(retry_policy=RetryPolicy(max_retries=2))
+
+    with pytest.raises(APIError) as excinfo:
+        client.system.stats()
+    assert excinfo.value.code == 503
+    assert len(handler.attempts) == 3
+
+
+def test_put_and_delete_are_retried_by_default(make_client, billing, sleeps):
+    billing.add('clients')
+    handler = flaky(1)
+    billing.transport.route('admin/client/1', handler, method='PUT')
+    client = make_client(retry_policy=RetryPolicy())
+
+    client.clients.update(1, {'email': 'a@example.com'})
+    assert handler.attempts == ['PUT', 'PUT']
+
+
+def test_post_is_only_retried_when_the_call_opts_in(make_client, billing, sleeps):
+    billing.add('invoices')
+    handler = flaky(1)
+    billing.transport.route('admin/invoice/1/mark_as_paid', handler)
+    client = make_client(retry_policy=RetryPolicy())
+
+    with pytest.raises(APIError):
+        client.invoices.mark_as_paid(1)
+    assert len(handler.attempts) == 1
+
+    assert client.invoices.mark_as_paid(1, retry=True) == {'ok': True}
+
+
+def test_client_errors_are_not_retried(make_client, billing, sleeps):
+    handler = flaky(1, status=400)
+    billing.transport.route('admin/system/stats', handler)
+    client = make_client(retry_policy=RetryPolicy())
+
+    with pytest.raises(APIError):
+        client.system.stats()
+    assert len(handler.attempts) == 1
+
+
+def test_retry_after_is_honoured(make_client, billing, sleeps):
+    billing.transport.route('admin/system/stats', flaky(1, 429, {'Retry-After': '2'}))
+    client = make_client(retry_policy=RetryPolicy(max_backoff=30))
+
+    client.system.stats()
+    assert sleeps == [2.0]
+
+
+def test_retry_after_beyond_max_backoff_is_not_retried(make_client, billing, sleeps):
+    handler = flaky(1, 503, {'Retry-After': '3600'})
+    billing.transport.route('admin/system/stats', handler)
+    client = make_client(retry_policy=RetryPolicy(max_backoff=5))
+
+    with pytest.raises(APIError) as excinfo:
+        client.system.stats()
+    assert excinfo.value.code == 503
+    assert len(handler.attempts) == 1
+    assert sleeps == []
+
+
+def test_backoff():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.backoff(attempt) for attempt in range(5)] == [1, 2, 4, 5, 5]
+    assert 0 <= RetryPolicy(backoff_factor=1).backoff(3) <= 8
+    assert RetryPolicy(respect_retry_after=False, jitter=False).backoff(0, '10') == 0.5
+    assert RetryPolicy(max_backoff=5).backoff(0, '5') == 5.0
+    assert RetryPolicy(max_backoff=5).backoff(0, '6') is None
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after('-1') == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    later = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 <= parse_retry_after(later) <= 60
+
+
+def test_rate_limiter_reserves_tokens():
+    limiter = RateLimiter(rate=10, burst=2)
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == pytest.approx(0.1, abs=0.01)
+    assert limiter.reserve() == pytest.approx(0.2, abs=0.01)
+
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
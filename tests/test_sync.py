@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+from fossbilling.sync import CREATED, DELETED, UPDATED, IncrementalSync, SyncSpec, SyncState
+
+
+def changes(sync, full=False):
+    return [(change.kind, change.entity, change.id) for change in sync.run(full=full)]
+
+
+def test_first_run_reports_every_record_as_created(client, billing):
+    billing.add_many('clients', 2)
+    billing.add('invoices')
+    sync = IncrementalSync(client)
+
+    assert changes(sync) == [
+        (CREATED, 'clients', 1), (CREATED, 'clients', 2), (CREATED, 'invoices', 1),
+    ]
+    assert sync.last_run['clients'][CREATED] == 2
+    assert sync.last_run['orders']['complete']
+
+
+def test_only_changes_are_reported(client, billing):
+    billing.add_many('clients', 3, email='a@example.com')
+    sync = IncrementalSync(client, specs=['clients'])
+    changes(sync)
+    assert changes(sync) == []
+
+    billing.find('clients', 2)['email'] = 'b@example.com'
+    billing.add('clients')
+    billing.records['clients'].remove(billing.find('clients', 3))
+    assert changes(sync) == [
+        (UPDATED, 'clients', 2), (CREATED, 'clients', 4), (DELETED, 'clients', 3),
+    ]
+
+
+def test_state_is_saved_between_runs(client, billing, tmp_path):
+    path = tmp_path / 'state.json'
+    billing.add_many('orders', 2)
+    changes(IncrementalSync(client, specs=['orders'], state=str(path)))
+
+    saved = json.loads(path.read_text())
+    assert sorted(saved['entities']['orders']['hashes']) == ['1', '2']
+
+    billing.add('orders')
+    assert changes(IncrementalSync(client, specs=['orders'], state=SyncState(path))) == [
+        (CREATED, 'orders', 3),
+    ]
+
+
+def test_newest_first_listings_stop_at_the_mark(client, billing):
+    billing.add_many('clients', 30)
+    billing.records['clients'].reverse()
+    sync = IncrementalSync(client, specs=[SyncSpec('clients', mark='id', newest_first=True)],
+                           per_page=10)
+    assert len(changes(sync)) == 30
+    assert sync.state.entity('clients')['mark'] == 30
+
+    billing.add('clients')
+    billing.records['clients'].sort(key=lambda record: record['id'], reverse=True)
+    before = billing.calls('GET')
+    assert changes(sync) == [(CREATED, 'clients', 31)]
+    assert billing.calls('GET') - before == 1
+    assert not sync.last_run['clients']['complete']
+
+    # Deletions are only seen by a complete listing.
+    billing.records['clients'].remove(billing.find('clients', 5))
+    assert changes(sync) == []
+    assert changes(sync, full=True) == [(DELETED, 'clients', 5)]
+
+
+def test_timestamp_marks_keep_an_overlap(client, billing):
+    spec = SyncSpec('invoices', newest_first=True)
+    billing.add('invoices', updated_at='2024-01-01 10:00:00')
+    sync = IncrementalSync(client, specs=[spec], overlap=60)
+    changes(sync)
+
+    # Updated in the same minute as the last run, listed first.
+    billing.records['invoices'].insert(0, {'id': 2, 'updated_at': '2024-01-01 09:59:30'})
+    assert changes(sync) == [(CREATED, 'invoices', 2)]
+    assert sync.state.entity('invoices')['mark'] == '2024-01-01 10:00:00'
+
+
+def test_async_sync(make_async_client, billing):
+    billing.add_many('clients', 2)
+
+    async def main():
+        async with make_async_client() as client:
+            sync = IncrementalSync(client, specs=['clients'])
+            first = [change.kind async for change in sync.arun()]
+            billing.records['clients'].pop()
+            second = [(change.kind, change.id) async for change in sync.arun()]
+            return first, second
+
+    assert asyncio.run(main()) == ([CREATED, CREATED], [(DELETED, 2)])
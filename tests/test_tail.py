@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+import pytest
+
+from fossbilling.tail import AdaptiveInterval, LogCursor
+
+
+def take(entries, count):
+    return [next(entries)['id'] for _ in range(count)]
+
+
+def test_follow_logs_yields_backlog_then_new_entries(client, billing):
+    billing.add_many('logs', 5)
+    stop = threading.Event()
+    entries = client.system.follow_logs(interval=0.001, max_interval=0.01, backlog=2, stop=stop)
+
+    assert take(entries, 2) == [4, 5]
+    billing.add_many('logs', 3)
+    assert take(entries, 3) == [6, 7, 8]
+    billing.add('logs')
+    assert take(entries, 1) == [9]
+
+    stop.set()
+    assert list(entries) == []
+
+
+def test_follow_logs_only_fetches_new_pages(client, billing):
+    billing.add_many('logs', 50)
+    entries = client.system.follow_logs(interval=0.001, max_interval=0.01, backlog=1,
+                                        per_page=10, stop=threading.Event())
+    assert take(entries, 1) == [50]
+    billing.add_many('logs', 25)
+
+    before = billing.calls('GET')
+    assert take(entries, 25) == list(range(51, 76))
+    # Three pages of new entries, the last one reaching the known ones.
+    assert billing.calls('GET') - before == 3
+    entries.close()
+
+
+def test_follow_logs_passes_filters(client, billing):
+    billing.add('logs', type='error')
+    billing.add('logs', type='info')
+    entries = client.system.follow_logs(interval=0.001, backlog=10, type='error',
+                                        stop=threading.Event())
+
+    assert take(entries, 1) == [1]
+    assert all(params.get('type') == 'error' for _, _, params in billing.requests)
+    entries.close()
+
+
+def test_cursor_on_an_oldest_first_listing():
+    log = [{'id': index} for index in range(1, 26)]
+
+    def page(number, per_page=10):
+        return {'list': log[(number - 1) * per_page:number * per_page], 'page': number,
+                'pages': -(-len(log) // per_page), 'total': len(log)}
+
+    def poll(cursor):
+        number = cursor.first_page(10)
+        while number is not None:
+            number = cursor.feed(page(number))
+        return [entry['id'] for entry in cursor.take()]
+
+    cursor = LogCursor(backlog=3, newest_first=False)
+    assert poll(cursor) == [23, 24, 25]
+    log.extend({'id': index} for index in range(26, 33))
+    assert cursor.first_page(10) == 3
+    assert poll(cursor) == list(range(26, 33))
+    assert poll(cursor) == []
+
+
+def test_cursor_drops_duplicates_with_the_same_timestamp():
+    cursor = LogCursor(mark='created_at')
+    cursor.feed({'list': [{'id': 2, 'created_at': '2024-01-01 10:00:00'}]})
+
+    cursor.feed({'list': [{'id': 3, 'created_at': '2024-01-01 10:00:00'},
+                          {'id': 2, 'created_at': '2024-01-01 10:00:00'}]})
+    assert [entry['id'] for entry in cursor.take()] == [3]
+
+
+def test_adaptive_interval():
+    delay = AdaptiveInterval(1, 5)
+    assert [delay.next(False) for _ in range(4)] == [2, 4, 5, 5]
+    assert delay.next(True) == 1
+
+    with pytest.raises(ValueError):
+        AdaptiveInterval(2, 1)
+
+
+def test_async_follow_logs(make_async_client, billing):
+    billing.add_many('logs', 3)
+
+    async def main():
+        async with make_async_client() as client:
+            entries = client.system.follow_logs(interval=0.001, max_interval=0.01, backlog=1)
+            first = await entries.__anext__()
+            billing.add('logs')
+            second = await entries.__anext__()
+            await entries.aclose()
+            return first['id'], second['id']
+
+    assert asyncio.run(main()) == (3, 4)
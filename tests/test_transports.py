@@ -0,0 +1,283 @@
+import asyncio
+import gzip
+import importlib.util
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fossbilling import APIError, Client, NotFoundError
+from fossbilling.adapters import PoolAdapter, tcp_socket_options
+from fossbilling.hooks import MetricsCollector
+from fossbilling.retry import RetryPolicy
+from fossbilling.transports import (
+    Headers, HTTPXTransport, InMemoryTransport, Request, Response, TransportError,
+)
+
+from conftest import API_KEY, BASE_URL
+
+
+def test_routes_match_the_longest_endpoint_and_method():
+    transport = InMemoryTransport({
+        '': lambda request: 'any',
+        'admin/invoice': lambda request: 'invoice',
+    })
+    transport.route('admin/invoice', lambda request: 'created', method='POST')
+    client = Client(BASE_URL, API_KEY, transport=transport)
+
+    assert client.get('admin/invoice/12/pdf') == 'invoice'
+    assert client.post('admin/invoice', {}) == 'created'
+    assert client.get('admin/system/info') == 'any'
+
+
+def test_route_as_decorator(client, billing):
+    @billing.transport.route('admin/system/info', method='GET')
+    def info(request):
+        return {'version': '0.6.0', 'key': request.headers['x-api-key']}
+
+    assert client.system.info() == {'version': '0.6.0', 'key': API_KEY}
+
+
+def test_unknown_endpoint_is_not_found(client):
+    with pytest.raises(NotFoundError):
+        client.get('admin/unknown')
+
+
+def test_handler_results():
+    transport = InMemoryTransport({
+        'raw': lambda request: b'%PDF',
+        'full': lambda request: Response(201, {'X-Test': 'yes'}, b'{"ok": true}'),
+    })
+    raw = transport.request('GET', BASE_URL + 'api/raw')
+    assert raw.content == b'%PDF' and raw.headers['content-length'] == '4'
+    full = transport.request('GET', BASE_URL + 'api/full')
+    assert full.status_code == 201 and full.json() == {'ok': True}
+    assert full.headers['x-test'] == 'yes'
+    assert isinstance(full.request, Request)
+
+
+def test_in_memory_transport_ignores_network_arguments(billing):
+    billing.transport.route('admin/system/info', lambda request: {'version': '0.6.0'})
+    response = billing.transport.request('GET', BASE_URL + 'api/admin/system/info',
+                                         params={'a': 1}, allow_redirects=False, verify=False,
+                                         cert=None, proxies={})
+    assert response.status_code == 200 and response.json() == {'version': '0.6.0'}
+    assert billing.transport.request('GET', BASE_URL + 'api/admin/x',
+                                     allow_redirects=True).status_code == 404
+
+
+def test_transport_error_is_retried(make_client, billing):
+    attempts = []
+
+    def flaky(request):
+        attempts.append(request)
+        if len(attempts) < 3:
+            raise TransportError("connection reset")
+        return {'version': '0.6.0'}
+
+    billing.transport.route('admin/system/info', flaky)
+    client = make_client(retry_policy=RetryPolicy(backoff_factor=0))
+    assert client.system.info() == {'version': '0.6.0'}
+    assert len(attempts) == 3
+
+
+def test_transport_error_without_retries(client, billing):
+    def down(request):
+        raise TransportError("connection refused")
+
+    billing.transport.route('admin/system/info', down)
+    with pytest.raises(APIError, match='connection refused'):
+        client.system.info()
+
+
+def test_headers_are_case_insensitive():
+    headers = Headers({'Content-Type': 'application/json'})
+    headers['x-api-key'] = 'key'
+    assert headers['content-type'] == 'application/json'
+    assert headers.get('X-API-KEY') == 'key'
+    assert list(headers) == ['Content-Type', 'x-api-key']
+    del headers['CONTENT-TYPE']
+    assert 'Content-Type' not in headers and len(headers) == 1
+
+
+def test_request_json_decompresses_with_any_header_case():
+    body = gzip.compress(b'{"a": 1}')
+    request = Request('POST', BASE_URL, '', {}, Headers({'content-encoding': 'gzip'}), body)
+    assert request.json() == {'a': 1}
+
+
+def test_compressed_request_body(make_client, billing):
+    received = []
+    billing.transport.route('admin/client', lambda request: received.append(request) or 1,
+                            method='POST')
+    client = make_client(compress_requests='gzip')
+    data = {'note': 'x' * 20000}
+
+    client.post('admin/client', data)
+    assert received[0].headers['Content-Encoding'] == 'gzip'
+    assert len(received[0].body) < 20000
+    assert received[0].json() == data
+
+
+def test_async_client_with_in_memory_transport(make_async_client, billing):
+    received = []
+    billing.transport.route('admin/client', lambda request: received.append(request) or 1,
+                            method='POST')
+    billing.add('clients', email='a@example.com')
+    data = {'note': 'x' * 20000}
+
+    async def main():
+        async with make_async_client(compress_requests='gzip') as client:
+            record = await client.clients.get(1)
+            await client.post('admin/client', data)
+            return record
+
+    assert asyncio.run(main())['email'] == 'a@example.com'
+    assert received[0].headers['Content-Encoding'] == 'gzip'
+    assert received[0].json() == data
+
+
+def test_httpx_transport_forwards_arguments(billing):
+    pytest.importorskip('httpx')
+    received = []
+    billing.transport.route('admin/system/info',
+                            lambda request: received.append(request) or {'version': '0.6.0'})
+    transport = HTTPXTransport(http2=False, transport=billing.transport.httpx_transport())
+    client = Client(BASE_URL, API_KEY, transport=transport)
+
+    assert client.system.info() == {'version': '0.6.0'}
+    assert received[0].headers['X-API-Key'] == API_KEY
+
+    response = transport.request('GET', BASE_URL + 'api/admin/system/info',
+                                 params={'a': 1, 'b': None}, cookies={'session': 's1'},
+                                 allow_redirects=False)
+    assert response.json() == {'version': '0.6.0'}
+    assert received[1].params == {'a': '1'}
+    assert received[1].headers['cookie'] == 'session=s1'
+
+    with pytest.raises(TypeError):
+        transport.request('GET', BASE_URL + 'api/admin/system/info', unknown=True)
+    client.close()
+
+
+def installed(*modules):
+    return any(importlib.util.find_spec(module) is not None for module in modules)
+
+
+def gzip_route(billing, endpoint, value):
+    """Serve ``value`` as gzip-encoded JSON; returns the compressed size."""
+    content = gzip.compress(billing.transport.codec.dumps(value))
+    billing.transport.route(endpoint, lambda request: Response(
+        200, {'Content-Type': 'application/json', 'Content-Encoding': 'gzip',
+              'Content-Length': str(len(content))}, content))
+    return len(content)
+
+
+def test_accept_encoding_matches_installed_decoders(make_async_client, billing):
+    pytest.importorskip('httpx')
+    received = []
+    billing.transport.route('admin/system/info',
+                            lambda request: received.append(request) or {'version': '0.6.0'})
+    sync = Client(BASE_URL, API_KEY,
+                  transport=HTTPXTransport(http2=False,
+                                           transport=billing.transport.httpx_transport()))
+    sync.system.info()
+
+    async def main():
+        async with make_async_client() as client:
+            await client.system.info()
+
+    asyncio.run(main())
+    default = Client(BASE_URL, API_KEY).default_headers['Accept-Encoding']
+    for header in (received[0].headers['Accept-Encoding'], received[1].headers['Accept-Encoding'],
+                   default):
+        encodings = header.split(', ')
+        assert encodings[-2:] == ['gzip', 'deflate']
+        assert ('br' in encodings) == installed('brotli', 'brotlicffi')
+        assert 'zstd' not in encodings or installed('zstandard')
+    sync.close()
+
+
+def test_compression_can_be_turned_off(make_client, make_async_client, billing):
+    received = []
+    billing.transport.route('admin/system/info',
+                            lambda request: received.append(request) or {'version': '0.6.0'})
+    client = make_client(compression=False)
+    assert client.default_headers['Accept-Encoding'] == 'identity'
+    client.system.info()
+    assert received[0].headers['Accept-Encoding'] == 'identity'
+
+    async def main():
+        async with make_async_client(compression=False) as client:
+            await client.system.info()
+
+    asyncio.run(main())
+    assert received[1].headers['Accept-Encoding'] == 'identity'
+
+
+def test_compressed_response_sizes_per_endpoint(make_async_client, billing):
+    pytest.importorskip('httpx')
+    stats = {'active': 250, 'notes': ['paid on time'] * 200}
+    info = {'version': '0.6.0'}
+    compressed = gzip_route(billing, 'admin/system/stats', stats)
+    plain = len(billing.transport.codec.dumps(info))
+    billing.transport.route('admin/system/info', lambda request: info)
+    metrics = MetricsCollector()
+
+    async def main():
+        async with make_async_client(hooks=[metrics]) as client:
+            return await client.system.stats(), await client.system.info()
+
+    assert asyncio.run(main()) == (stats, info)
+    report = metrics.as_dict()
+    gzipped = report['GET admin/system/stats']
+    assert gzipped['bytes_received'] == compressed
+    assert gzipped['bytes_received_uncompressed'] == len(billing.transport.codec.dumps(stats))
+    assert gzipped['bytes_saved'] == gzipped['bytes_received_uncompressed'] - compressed > 0
+    identity = report['GET admin/system/info']
+    assert identity['bytes_received'] == identity['bytes_received_uncompressed'] == plain
+    assert identity['bytes_saved'] == 0
+
+
+def test_pool_options_reach_the_adapter():
+    options = tcp_socket_options(keepalive_idle=60)
+    client = Client(BASE_URL, API_KEY, pool_connections=4, pool_maxsize=32, pool_block=True,
+                    socket_options=options, keep_alive=False)
+    session = client.transport.session
+
+    adapter = session.get_adapter('https://billing.example.com/api/admin/client')
+    assert isinstance(adapter, PoolAdapter)
+    assert session.get_adapter('http://billing.example.com/') is adapter
+    assert (adapter._pool_connections, adapter._pool_maxsize, adapter._pool_block) == (4, 32, True)
+    assert adapter.poolmanager.connection_pool_kw['maxsize'] == 32
+    assert adapter.poolmanager.connection_pool_kw['socket_options'] == options
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in options
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+    assert session.headers['Connection'] == 'close'
+    assert session.headers['X-API-Key'] == API_KEY
+    client.close()
+
+
+def test_default_pool_keeps_urllib3_socket_options():
+    client = Client(BASE_URL, API_KEY)
+    adapter = client.transport.session.get_adapter('https://billing.example.com/')
+    assert adapter._pool_maxsize == 10
+    assert 'socket_options' not in adapter.poolmanager.connection_pool_kw
+    client.close()
+
+
+def test_client_shared_across_threads(make_client, billing):
+    billing.add_many('clients', 50)
+    client = make_client()
+
+    def fetch(client_id):
+        record = client.clients.get(client_id)
+        client.clients.update(client_id, {'email': f'{client_id}@example.com'})
+        return record['id']
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        ids = list(pool.map(fetch, range(1, 51)))
+    assert ids == list(range(1, 51))
+    assert billing.calls('GET', 'admin/client') == 50
+    assert billing.calls('PUT', 'admin/client') == 50
+    assert all(billing.find('clients', n)['email'] == f'{n}@example.com' for n in range(1, 51))